@@ -0,0 +1,50 @@
+# api/admin_routes.py
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse, Response
+from app.core.admin import require_admin
+from app.core.profiling import loop_monitor, profiler
+from app.core.response import ServiceResponse, ServiceStatus
+from app.core.settings import settings
+import logging
+logger = logging.getLogger(__name__)
+
+admin = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@admin.get("/profile", summary="Снять cProfile за N секунд")
+async def capture_profile(
+    seconds: float = Query(10, gt=0, le=settings.PROFILE_MAX_SECONDS),
+    format: str = Query("pstats", pattern="^(pstats|text)$", description="pstats — файл для pstats/snakeviz, text — топ функций"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$"),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """Профилирует поток event loop текущего воркера в течение seconds"""
+    try:
+        profile = await profiler.capture(seconds)
+    except (RuntimeError, ValueError) as e:
+        logger.warning(f"Профилирование не выполнено: {e}")
+        return ServiceResponse(status=ServiceStatus.error, message="Профилирование не выполнено", error=str(e)).to_dict()
+    if format == "text":
+        return PlainTextResponse(profiler.to_text(profile, sort, limit))
+    filename = f"profile-{datetime.now():%Y%m%d-%H%M%S}.pstats"
+    return Response(profiler.to_pstats(profile), media_type="application/octet-stream",
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@admin.get("/loop", summary="Блокировки event loop")
+async def get_loop_stats():
+    """Счётчики и последние callback'и, блокировавшие event loop дольше LOOP_BLOCK_THRESHOLD, со стеками"""
+    return ServiceResponse(status=ServiceStatus.success, message="Состояние event loop", data=loop_monitor.loop_stats()).to_dict()
+
+
+@admin.get("/routes", summary="CPU по маршрутам")
+async def get_route_stats():
+    """Суммарное и среднее процессорное время обработчиков по шаблонам маршрутов (с момента запуска воркера)"""
+    return ServiceResponse(status=ServiceStatus.success, message="CPU по маршрутам", data=loop_monitor.route_stats()).to_dict()
+
+
+@admin.delete("/routes", summary="Сбросить счётчики CPU по маршрутам")
+async def reset_route_stats():
+    loop_monitor.routes.clear()
+    return ServiceResponse(status=ServiceStatus.success, message="Счётчики сброшены").to_dict()
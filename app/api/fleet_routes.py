@@ -0,0 +1,66 @@
+# api/fleet_routes.py
+import json
+from fastapi import APIRouter, Query, Depends
+from fastapi.responses import StreamingResponse
+from app.use_cases.fanout_services import FanoutService
+from app.infrastructure.prox_api_client import ProxmoxAPIClient
+from app.core.response import ServiceResponse, ServiceStatus
+from app.core.settings import settings
+import logging
+logger = logging.getLogger(__name__)
+
+HOST_KINDS = {"pve", "router", "guest"}
+
+
+def get_fanout_service() -> FanoutService:
+    """Dependency для FastAPI. Возвращает экземпляр FanoutService"""
+    return FanoutService(api_client=ProxmoxAPIClient(logger=logger), logger=logger)
+
+
+def _parse_kinds(targets: str) -> set[str]:
+    kinds = {t.strip() for t in targets.split(",") if t.strip()}
+    unknown = kinds - HOST_KINDS
+    if unknown:
+        raise ValueError(f"Неизвестные типы хостов: {', '.join(sorted(unknown))}")
+    return kinds
+
+
+fleet = APIRouter(prefix="/fleet", tags=["fleet"])
+
+
+@fleet.get("/inventory", summary="Список хостов для массового выполнения команд")
+async def get_inventory(targets: str = Query("pve,router,guest", description="pve, router, guest через запятую"),
+                        service: FanoutService = Depends(get_fanout_service)):
+    try:
+        hosts = await service.inventory(_parse_kinds(targets))
+    except Exception as e:
+        logger.error(f"Ошибка получения списка хостов: {e}")
+        return ServiceResponse(status=ServiceStatus.error, message="Ошибка получения списка хостов", error=str(e)).to_dict()
+    return ServiceResponse(status=ServiceStatus.success, message="Список хостов", data={"hosts": [h.to_dict() for h in hosts]}).to_dict()
+
+
+@fleet.post("/run", summary="Выполнение команды на многих хостах")
+async def run_on_fleet(
+    command: str,
+    targets: str = Query("pve", description="pve, router, guest через запятую"),
+    hosts: str | None = Query(None, description="Ограничить хостами (имена через запятую)"),
+    concurrency: int = Query(settings.FANOUT_CONCURRENCY, ge=1, le=256),
+    timeout: float = Query(settings.FANOUT_TIMEOUT, gt=0, le=600),
+    service: FanoutService = Depends(get_fanout_service),
+):
+    """Результаты приходят NDJSON-строками по мере завершения хостов, последняя строка — сводка
+    с группировкой одинакового вывода. Общее время равно времени самого медленного хоста."""
+    try:
+        inventory = await service.inventory(_parse_kinds(targets))
+    except Exception as e:
+        logger.error(f"Ошибка получения списка хостов: {e}")
+        return ServiceResponse(status=ServiceStatus.error, message="Ошибка получения списка хостов", error=str(e)).to_dict()
+    if hosts:
+        names = {h.strip() for h in hosts.split(",")}
+        inventory = [h for h in inventory if h.name in names]
+
+    async def stream():
+        async for item in service.run(command, inventory, concurrency, timeout):
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
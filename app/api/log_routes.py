@@ -0,0 +1,56 @@
+# api/log_routes.py
+from datetime import datetime
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from app.use_cases.log_services import LogService
+from app.core.settings import settings
+import logging
+logger = logging.getLogger(__name__)
+
+logs = APIRouter(prefix="/api/logs", tags=["logs"])
+service = LogService(logger)
+
+
+@logs.get("/tail", summary="Последние записи лога")
+async def tail_logs(
+    limit: int = Query(100, ge=1, le=settings.LOG_QUERY_MAX_LIMIT),
+    level: str | None = Query(None, description="Уровень или несколько через запятую: ERROR,CRITICAL"),
+    module: str | None = Query(None, description="Префикс имени логгера"),
+    trace_id: str | None = None,
+):
+    """Последние limit записей по активному и ротированным файлам (чтение с конца через mmap)"""
+    query = service.build_query(level, module, trace_id)
+    response = await service.tail(query, limit)
+    return response.to_dict()
+
+
+@logs.get("/filter", summary="Поиск записей лога")
+async def filter_logs(
+    limit: int = Query(100, ge=1, le=settings.LOG_QUERY_MAX_LIMIT),
+    level: str | None = Query(None, description="Уровень или несколько через запятую: ERROR,CRITICAL"),
+    module: str | None = Query(None, description="Префикс имени логгера"),
+    trace_id: str | None = None,
+    since: datetime | None = Query(None, description="Начало интервала (без зоны — локальное время)"),
+    until: datetime | None = Query(None, description="Конец интервала (без зоны — локальное время)"),
+):
+    """Фильтр по уровню, модулю, trace_id и интервалу времени"""
+    query = service.build_query(level, module, trace_id, since, until)
+    response = await service.filter(query, limit)
+    return response.to_dict()
+
+
+@logs.get("/follow", summary="Потоковый вывод новых записей лога (SSE)")
+async def follow_logs(
+    request: Request,
+    backlog: int = Query(0, ge=0, le=settings.LOG_QUERY_MAX_LIMIT, description="Сколько последних записей отдать сразу"),
+    level: str | None = Query(None, description="Уровень или несколько через запятую: ERROR,CRITICAL"),
+    module: str | None = Query(None, description="Префикс имени логгера"),
+    trace_id: str | None = None,
+):
+    """Аналог tail -f: отдаёт новые записи активного файла по мере появления"""
+    query = service.build_query(level, module, trace_id)
+    return StreamingResponse(
+        service.follow(query, backlog, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,5 +1,6 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from app.use_cases.mikro_services import MikrotikService
+from app.use_cases.ssh_result_services import OutputMode
 import logging
 logger = logging.getLogger(__name__)
 
@@ -13,7 +14,20 @@ async def start_proxmox():
     return response.to_dict()
 
 @mikro.post("/run_command", summary="Выполнение команды на Mikrotik")
-async def run_command(command: str):
-    """Выполнение произвольной команды на Mikrotik"""
-    response = await service.run_command(command)
+async def run_command(command: str, mode: OutputMode = Query(OutputMode.auto, description="inline | auto | spool")):
+    """Выполнение произвольной команды на Mikrotik. Вывод больше SSH_INLINE_MAX_BYTES (или mode=spool)
+    сохраняется на диск: в ответе result_id и начало вывода, остальное — через /ssh/results"""
+    response = await service.run_command(command, mode)
+    return response.to_dict()
+
+@mikro.get("/interfaces", summary="Интерфейсы Mikrotik")
+async def get_interfaces():
+    """Разобранный вывод /interface print (кешируется на несколько секунд)"""
+    response = await service.get_interfaces()
+    return response.to_dict()
+
+@mikro.get("/dhcp_leases", summary="DHCP-аренды Mikrotik")
+async def get_dhcp_leases():
+    """Разобранный вывод /ip dhcp-server lease print (кешируется на несколько секунд)"""
+    response = await service.get_dhcp_leases()
     return response.to_dict()
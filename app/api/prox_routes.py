@@ -1,9 +1,18 @@
 # api/prox_routes.py
-import asyncio
-from fastapi import APIRouter, BackgroundTasks, Query, Depends
+import time
+from fastapi import APIRouter, BackgroundTasks, Query, Depends, Request, Header
+from fastapi.responses import StreamingResponse
 from app.use_cases.prox_services import ProxmoxService
 from app.infrastructure.prox_api_client import ProxmoxAPIClient
 from app.core.response import ServiceResponse, ServiceStatus
+from app.core.conditional import conditional_response
+from app.core.idempotency import run_idempotent
+from app.domain.schedule import Schedule
+from app.use_cases.scheduler import scheduler
+from app.use_cases.task_log_services import task_logs, node_from_upid
+from app.use_cases.vm_inventory_services import vm_inventory
+from app.use_cases.ssh_result_services import OutputMode
+from app.infrastructure.vm_store import VMQuery
 import logging
 logger = logging.getLogger(__name__)
 
@@ -21,32 +30,98 @@ async def start_proxmox(service: ProxmoxService = Depends(get_proxmox_service)):
     return response.to_dict()
 
 @prox.get("/check", summary="Проверяет соединение с Proxmox")
-async def check_connection(service: ProxmoxService = Depends(get_proxmox_service)):
-    """Проверяет соединение с Proxmox (включен или нет)"""
+async def check_connection(request: Request, service: ProxmoxService = Depends(get_proxmox_service)):
+    """Проверяет соединение с Proxmox (включен или нет). Поддерживает If-None-Match (304)"""
     response = await service.check_connection()
-    return response.to_dict()
+    return conditional_response(request, response)
 
 @prox.get("/running", summary="Запущенные ВМ Proxmox", description= 'Возвращает список всех запущенных виртуальных машин на Proxmox')
-async def get_running_vms(service: ProxmoxService = Depends(get_proxmox_service)):
-    '''Роут для получения всех VM со статусом 'running':'''
+async def get_running_vms(request: Request, service: ProxmoxService = Depends(get_proxmox_service)):
+    '''Роут для получения всех VM со статусом 'running'. Поддерживает If-None-Match (304)'''
     response = await service.get_running_vms()
-    return response.to_dict()
+    return conditional_response(request, response)
+
+@prox.get("/vms", summary="Поиск VM по инвентарю", description='Фильтры, выбор полей, сортировка и ограничение по данным cluster/resources')
+async def query_vms(
+    request: Request,
+    node: str | None = None,
+    status: str | None = Query(None, description="running, stopped, paused"),
+    tag: str | None = None,
+    name: str | None = Query(None, description="Префикс имени (без учёта регистра)"),
+    fields: str | None = Query(None, description="Поля через запятую: vmid,name,node,mem"),
+    sort: str | None = Query(None, description="Поле сортировки, '-' в начале — по убыванию: -mem"),
+    limit: int | None = Query(None, ge=1, le=10000),
+):
+    '''Ответ из индексированного инвентаря в памяти; cluster/resources перечитывает лидер раз в VM_STORE_TTL.
+    Поддерживает If-None-Match (304)'''
+    try:
+        projection = vm_inventory.parse_fields(fields)
+    except ValueError as e:
+        return ServiceResponse(status=ServiceStatus.error, message="Некорректный запрос", error=str(e)).to_dict()
+    query = VMQuery(node=node, status=status, tag=tag, name_prefix=name, fields=projection, sort=sort, limit=limit)
+    response = await vm_inventory.query(query)
+    return conditional_response(request, response)
 
 @prox.post("/start_all_vms", summary="Запуск всех ВМ Proxmox", description= 'Запускает все Виртуальные машины Proxmox')
-async def start_all_vms(service: ProxmoxService = Depends(get_proxmox_service)):
-    '''Роут запуска всех ВМ:'''
-    response = await service.start_all_vms()
+async def start_all_vms(service: ProxmoxService = Depends(get_proxmox_service),
+                        idempotency_key: str | None = Header(None, alias="Idempotency-Key")):
+    '''Роут запуска всех ВМ. Повтор с тем же Idempotency-Key вернёт первый ответ'''
+    response = await run_idempotent(idempotency_key, "start_all_vms", service.start_all_vms)
     return response.to_dict()
 
 
 @prox.post("/shutdown", summary="Отключение Proxmox")
-async def shutdown_vms(delay: int = Query(0, ge=0), service: ProxmoxService = Depends(get_proxmox_service)):
-    """Инициация shutdown всех VM и сервера Proxmox"""
-    asyncio.create_task(service.shutdown_server(delay))
-    return ServiceResponse(status=ServiceStatus.success,message=f"Отключение Proxmox и  всех VM через {delay} минут").to_dict()
+async def shutdown_vms(delay: int = Query(0, ge=0), idempotency_key: str | None = Header(None, alias="Idempotency-Key")):
+    """Инициация shutdown всех VM и сервера Proxmox. Ставится разовой задачей в планировщик, поэтому переживает рестарт.
+    Повтор с тем же Idempotency-Key не создаёт вторую задачу"""
+    async def schedule_shutdown() -> ServiceResponse:
+        schedule = Schedule(action="shutdown", name="/prox/shutdown", run_at=time.time() + delay * 60)
+        response = await scheduler.add(schedule)
+        if response.status != ServiceStatus.success:
+            return response
+        return ServiceResponse(status=ServiceStatus.success,message=f"Отключение Proxmox и  всех VM через {delay} минут", data={"schedule_id": schedule.id})
+    response = await run_idempotent(idempotency_key, "shutdown", schedule_shutdown)
+    return response.to_dict()
+
+@prox.get("/shutdown_plan", summary="План выключения VM по фазам")
+async def get_shutdown_plan(service: ProxmoxService = Depends(get_proxmox_service)):
+    '''Показывает, в какой фазе будет выключена каждая VM (по тегам Proxmox)'''
+    response = await service.get_shutdown_plan()
+    return response.to_dict()
 
 @prox.post("/connect_ssh", summary="Выполнение команды в консоли Proxmox")
-async def connect_ssh(command: str, service: ProxmoxService = Depends(get_proxmox_service)):
-    '''Роут для выполнения произвольной команды на Proxmox через SSH:'''
-    response = await service.run_ssh_command(command)
+async def connect_ssh(command: str, mode: OutputMode = Query(OutputMode.auto, description="inline | auto | spool"),
+                      service: ProxmoxService = Depends(get_proxmox_service)):
+    '''Роут для выполнения произвольной команды на Proxmox через SSH.
+    Вывод больше SSH_INLINE_MAX_BYTES (или mode=spool) сохраняется на диск: в ответе result_id, остальное — через /ssh/results'''
+    response = await service.run_ssh_command(command, mode)
     return response.to_dict()
+
+@prox.get("/qm_list", summary="Список VM узла (qm list)")
+async def get_qm_list(service: ProxmoxService = Depends(get_proxmox_service)):
+    '''Разобранный вывод qm list (кешируется на несколько секунд)'''
+    response = await service.get_qm_list()
+    return response.to_dict()
+
+@prox.get("/storage", summary="Состояние хранилищ (pvesm status)")
+async def get_storage_status(service: ProxmoxService = Depends(get_proxmox_service)):
+    '''Разобранный вывод pvesm status (кешируется на несколько секунд)'''
+    response = await service.get_storage_status()
+    return response.to_dict()
+
+@prox.get("/tasks/{upid}/log", summary="Потоковый лог задачи Proxmox (SSE)")
+async def follow_task_log(request: Request, upid: str,
+                          node: str | None = Query(None, description="Узел; по умолчанию берётся из UPID"),
+                          start: int = Query(0, ge=0, description="Номер строки, после которой начинать"),
+                          last_event_id: int | None = Header(None, alias="Last-Event-ID")):
+    '''Новые строки лога задачи (start/stop VM и т.п.) по мере появления, в конце event: end со статусом задачи.
+    При переподключении EventSource продолжает с Last-Event-ID'''
+    try:
+        node = node or node_from_upid(upid)
+    except ValueError as e:
+        return ServiceResponse(status=ServiceStatus.error, message="Некорректный UPID", error=str(e)).to_dict()
+    return StreamingResponse(
+        task_logs.follow(upid, node, last_event_id if last_event_id is not None else start, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
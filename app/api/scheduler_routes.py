@@ -0,0 +1,58 @@
+# api/scheduler_routes.py
+from datetime import datetime
+from fastapi import APIRouter
+from pydantic import BaseModel, Field
+from app.domain.schedule import Schedule, MisfirePolicy
+from app.use_cases.scheduler import scheduler
+from app.core.response import ServiceResponse, ServiceStatus
+import logging
+logger = logging.getLogger(__name__)
+
+schedules = APIRouter(prefix="/scheduler", tags=["scheduler"])
+
+
+class ScheduleCreate(BaseModel):
+    """Новое расписание: cron (периодическое) или run_at (разовое)"""
+    action: str = Field(description="wol | mikrotik_wol | start_all_vms | wake_and_start | shutdown")
+    name: str = ""
+    cron: str | None = Field(None, description="5 полей cron в часовом поясе TIMEZONE, например '0 7 * * *'")
+    run_at: datetime | None = Field(None, description="Время разового запуска (без зоны — TIMEZONE)")
+    enabled: bool = True
+    misfire_policy: MisfirePolicy = MisfirePolicy.run_once
+    misfire_grace: int = Field(900, ge=0, description="Допустимое опоздание после простоя для run_once, сек")
+    params: dict = Field(default_factory=dict)
+
+
+@schedules.get("", summary="Список расписаний")
+async def list_schedules():
+    response = await scheduler.list()
+    return response.to_dict()
+
+
+@schedules.post("", summary="Добавление расписания")
+async def add_schedule(body: ScheduleCreate):
+    """Например: {"action": "wake_and_start", "cron": "0 7 * * *"} или {"action": "shutdown", "cron": "0 1 * * *"}"""
+    run_at = None
+    if body.run_at:
+        run_at = (body.run_at if body.run_at.tzinfo else body.run_at.replace(tzinfo=scheduler.tz)).timestamp()
+    try:
+        schedule = Schedule(
+            action=body.action, name=body.name, cron=body.cron, run_at=run_at, enabled=body.enabled,
+            misfire_policy=body.misfire_policy, misfire_grace=body.misfire_grace, params=body.params,
+        )
+    except ValueError as e:
+        return ServiceResponse(status=ServiceStatus.error, message="Некорректное расписание", error=str(e)).to_dict()
+    response = await scheduler.add(schedule)
+    return response.to_dict()
+
+
+@schedules.delete("/{schedule_id}", summary="Удаление расписания")
+async def remove_schedule(schedule_id: str):
+    response = await scheduler.remove(schedule_id)
+    return response.to_dict()
+
+
+@schedules.post("/{schedule_id}/run", summary="Немедленный запуск расписания")
+async def run_schedule(schedule_id: str):
+    response = await scheduler.run_now(schedule_id)
+    return response.to_dict()
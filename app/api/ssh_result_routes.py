@@ -0,0 +1,68 @@
+# api/ssh_result_routes.py
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from app.core.response import ServiceResponse, ServiceStatus
+from app.use_cases.ssh_result_services import RANGE_MAX_BYTES, ssh_results
+import logging
+logger = logging.getLogger(__name__)
+
+results = APIRouter(prefix="/ssh/results", tags=["ssh"])
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Принимает ли клиент gzip по Accept-Encoding с учётом q-значений (gzip;q=0 — отказ)"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            accepted[coding.lower()] = q
+    return accepted.get("gzip", accepted.get("x-gzip", accepted.get("*", 0.0))) > 0
+
+
+@results.get("/{result_id}", summary="Сведения о сохранённом выводе команды")
+async def get_result(result_id: str):
+    """Команда, размер вывода, код завершения, признаки обрезки по лимиту и срок хранения"""
+    response = await ssh_results.info(result_id)
+    return response.to_dict()
+
+
+@results.get("/{result_id}/range", summary="Фрагмент сохранённого вывода")
+async def get_range(result_id: str,
+                    offset: int = Query(0, ge=0, description="Смещение в байтах (next_offset предыдущего ответа)"),
+                    length: int = Query(64 * 1024, ge=1, le=RANGE_MAX_BYTES, description="Максимум байт")):
+    """Строки вывода из диапазона байт, обрезанного по концу строки; читать дальше — с next_offset до eof"""
+    response = await ssh_results.read_range(result_id, offset, length)
+    return response.to_dict()
+
+
+@results.get("/{result_id}/download", summary="Скачать сохранённый вывод целиком")
+async def download(request: Request, result_id: str):
+    """Потоковая выдача файла. Сжатый результат отдаётся без распаковки, если клиент принимает gzip"""
+    meta = await ssh_results.meta(result_id)
+    if meta is None:
+        return ServiceResponse(status=ServiceStatus.error, message="Результат не найден или срок хранения истёк",
+                               error=result_id).to_dict()
+    raw = meta["compressed"] and _accepts_gzip(request.headers.get("accept-encoding", ""))
+    try:
+        # файл открывается до отправки заголовков: удалённый очисткой результат — ошибка, а не оборванный ответ
+        f = await ssh_results.open_file(meta, raw)
+    except OSError as e:
+        return ServiceResponse(status=ServiceStatus.error, message="Файл результата недоступен", error=str(e)).to_dict()
+    headers = {"Content-Disposition": f'attachment; filename="{result_id}.txt"', "Vary": "Accept-Encoding"}
+    if raw:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(ssh_results.iter_file(f), media_type="text/plain; charset=utf-8", headers=headers)
+
+
+@results.delete("/{result_id}", summary="Удалить сохранённый вывод")
+async def delete_result(result_id: str):
+    response = await ssh_results.delete(result_id)
+    return response.to_dict()
@@ -0,0 +1,56 @@
+# api/transfer_routes.py
+from typing import Literal
+from fastapi import APIRouter
+from pydantic import BaseModel, Field
+from app.domain.transfer import TransferDirection
+from app.use_cases.transfer_services import transfers
+import logging
+logger = logging.getLogger(__name__)
+
+transfer = APIRouter(prefix="/transfers", tags=["transfers"])
+
+
+class TransferFileSpec(BaseModel):
+    remote: str = Field(description="Путь на удалённом хосте")
+    local: str | None = Field(None, description="Путь относительно TRANSFER_DIR; по умолчанию — имя удалённого файла")
+
+
+class TransferCreate(BaseModel):
+    """Задание SFTP-передачи: все файлы идут по одному соединению с target"""
+    target: Literal["pve", "mikrotik"]
+    direction: TransferDirection = Field(description="download — с хоста в TRANSFER_DIR, upload — обратно")
+    files: list[TransferFileSpec] = Field(min_length=1)
+
+
+@transfer.post("", summary="Создание задания передачи файлов")
+async def create_transfer(body: TransferCreate):
+    """Например: {"target": "pve", "direction": "download", "files": [{"remote": "/etc/pve/storage.cfg"}]}.
+    Задание выполняется в фоне, прогресс и скорость — GET /transfers/{id}"""
+    response = await transfers.create(body.target, body.direction, [(f.remote, f.local) for f in body.files])
+    return response.to_dict()
+
+
+@transfer.get("", summary="Список заданий передачи")
+async def list_transfers():
+    response = await transfers.list()
+    return response.to_dict()
+
+
+@transfer.get("/{job_id}", summary="Состояние задания передачи")
+async def get_transfer(job_id: str):
+    """Прогресс по файлам (done_bytes/size), скорость (байт/с), sha256 переданных файлов"""
+    response = await transfers.get(job_id)
+    return response.to_dict()
+
+
+@transfer.post("/{job_id}/cancel", summary="Отмена задания передачи")
+async def cancel_transfer(job_id: str):
+    response = await transfers.cancel(job_id)
+    return response.to_dict()
+
+
+@transfer.post("/{job_id}/resume", summary="Продолжение прерванного задания")
+async def resume_transfer(job_id: str):
+    """Переданные файлы пропускаются, недокачанные продолжаются с места остановки"""
+    response = await transfers.resume(job_id)
+    return response.to_dict()
@@ -0,0 +1,159 @@
+# bench/__main__.py
+"""Нагрузочный прогон API против локальных заглушек Proxmox/SSH.
+
+    python -m app.bench                                   # все сценарии in-process, сравнение с baseline
+    python -m app.bench -s polling_storm -d 5 -c 200      # один сценарий, своя длительность и параллельность
+    python -m app.bench --save-baseline                   # сохранить результат как новый baseline
+    python -m app.bench --mode http --url http://127.0.0.1:8000   # против запущенного сервера
+    python -m app.bench standins                          # только поднять заглушки и вывести env для uvicorn
+    python -m app.bench guests --sizes 1000,10000         # разбор cluster/resources: pydantic против Guest
+
+Код возврата 1, если результат хуже baseline больше чем на --threshold; 2 — baseline нет или он не читается
+(без --save-baseline прогон без сравнения не считается успешным)."""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+from app.bench.runner import ASGITransport, HTTPTransport, compare, run_scenario
+from app.bench.scenarios import SCENARIOS
+from app.bench.standins import StandinConfig, Standins
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m app.bench", description="Нагрузочный прогон API")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "standins", "guests"])
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="адрес сервера для --mode http")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS), help="можно несколько раз")
+    parser.add_argument("-d", "--duration", type=float, help="длительность сценария, сек")
+    parser.add_argument("-c", "--concurrency", type=int, help="число одновременных клиентов")
+    parser.add_argument("--vms", type=int, default=StandinConfig.vms, help="VM в заглушке Proxmox")
+    parser.add_argument("--api-latency", type=float, default=StandinConfig.api_latency)
+    parser.add_argument("--ssh-latency", type=float, default=StandinConfig.ssh_latency)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое ухудшение, доля (0.2 = 20%%)")
+    parser.add_argument("-o", "--output", type=Path, help="записать результат в JSON")
+    parser.add_argument("--sizes", default="1000,10000", help="guests: количества VM через запятую")
+    parser.add_argument("--repeat", type=int, default=7, help="guests: повторов на замер")
+    return parser.parse_args(argv)
+
+
+async def _load_app(env: dict[str, str]):
+    """Импорт приложения после настройки окружения: settings читаются при импорте"""
+    data_dir = tempfile.mkdtemp(prefix="bench-data-")
+    os.environ.update(env)
+    os.environ.update({"DATA_DIR": data_dir, "LOG_DIR": os.path.join(data_dir, "logs"), "CONSOLE_OUTPUT": "false"})
+    from app.main import app
+    return app
+
+
+def _load_baseline(path: Path) -> dict:
+    """Baseline для сравнения; отсутствующий или повреждённый — ValueError"""
+    try:
+        baseline = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise ValueError(f"Baseline {path} не найден (--save-baseline для создания)")
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Baseline {path} не читается: {e}")
+    if not isinstance(baseline, dict) or not isinstance(baseline.get("scenarios"), dict):
+        raise ValueError(f"Baseline {path} без раздела scenarios")
+    return baseline
+
+
+async def run(args: argparse.Namespace) -> int:
+    baseline = None
+    if args.command == "run" and not args.save_baseline:
+        try:
+            baseline = _load_baseline(args.baseline)  # до прогона: не тратить время на замер, который не с чем сравнить
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+    config = StandinConfig(vms=args.vms, api_latency=args.api_latency, ssh_latency=args.ssh_latency)
+    standins = Standins(config)
+    env = await standins.start()
+    if args.command == "standins":
+        print(" ".join(f"{k}={v}" for k, v in env.items()))
+        print("Заглушки запущены, Ctrl+C для остановки", file=sys.stderr)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await standins.stop()
+
+    names = args.scenario or list(SCENARIOS)
+    results: dict[str, dict] = {}
+    try:
+        if args.mode == "inprocess":
+            app = await _load_app(env)
+            transport = ASGITransport(app)
+            lifespan = app.router.lifespan_context(app)
+            await lifespan.__aenter__()
+        else:
+            transport = HTTPTransport(args.url, max(args.concurrency or 0, 100))
+        try:
+            for name in names:
+                scenario = SCENARIOS[name]
+                scenario = replace(scenario, duration=args.duration or scenario.duration,
+                                   concurrency=args.concurrency or scenario.concurrency)
+                print(f"{name}: {scenario.description} (c={scenario.concurrency}, {scenario.duration:g}s)", file=sys.stderr)
+                results[name] = (await run_scenario(scenario, transport)).to_dict()
+                print(f"  {json.dumps(results[name], ensure_ascii=False)}", file=sys.stderr)
+        finally:
+            if args.mode == "inprocess":
+                await lifespan.__aexit__(None, None, None)
+            else:
+                await transport.close()
+    finally:
+        await standins.stop()
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "mode": args.mode,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "standins": {"vms": config.vms, "api_latency": config.api_latency, "ssh_latency": config.ssh_latency},
+        "scenarios": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Baseline сохранён: {args.baseline}", file=sys.stderr)
+        return 0
+    problems = compare(report, baseline, args.threshold)
+    for problem in problems:
+        print(f"РЕГРЕССИЯ {problem}", file=sys.stderr)
+    if not problems:
+        print("Результат в пределах baseline", file=sys.stderr)
+    return 1 if problems else 0
+
+
+def run_guests(args: argparse.Namespace) -> int:
+    from app.bench import guests
+    report = guests.run([int(s) for s in args.sizes.split(",")], args.repeat)
+    print(guests.format_report(report), file=sys.stderr)
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.command == "guests":
+        return run_guests(args)
+    try:
+        return asyncio.run(run(args))
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# bench/guests.py
+"""Сравнение разбора cluster/resources: pydantic VM на каждую запись против пакетного decode_guests.
+Замеряется полный путь /prox/running: разбор -> отбор running -> JSON. Тело ответа у всех путей одинаковое (RUNNING_FIELDS)."""
+import gc
+import json
+import time
+import tracemalloc
+from typing import Callable
+from pydantic import BaseModel
+from app.bench.standins import _vm
+from app.core.response import json_default
+from app.domain.vm import RUNNING_FIELDS, VM, decode_guests
+
+
+class RichVM(BaseModel):
+    """pydantic-модель с теми же полями, что и Guest: сравнение при одинаковом объёме ответа"""
+    vmid: int
+    name: str = ""
+    node: str = ""
+    status: str = ""
+    type: str = "qemu"
+    tags: str = ""
+    cpu: float | None = None
+    maxcpu: int | None = None
+    mem: int | None = None
+    maxmem: int | None = None
+    disk: int | None = None
+    maxdisk: int | None = None
+    uptime: int | None = None
+    netin: int | None = None
+    netout: int | None = None
+    template: int = 0
+    lock: str | None = None
+    hastate: str | None = None
+
+    class Config:
+        extra = "ignore"
+
+
+def _encode(running: list) -> bytes:
+    body = {"status": "success", "message": "Список запущенных VM", "error": None, "data": {"running_vms": running}}
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":"), default=json_default).encode()
+
+
+# путь: (разбор всего списка, отбор running в то, что уходит в JSON)
+PATHS: dict[str, tuple[Callable[[list[dict]], list], Callable[[list], list]]] = {
+    # модель VM: только поля ответа
+    "pydantic_vm": (lambda resources: [VM(**vm) for vm in resources],
+                    lambda vms: [vm.to_dict() for vm in vms if vm.status == "running"]),
+    # pydantic с тем же набором полей, что у Guest
+    "pydantic_full": (lambda resources: [RichVM(**vm) for vm in resources],
+                      lambda vms: [vm.model_dump(include=set(RUNNING_FIELDS)) for vm in vms if vm.status == "running"]),
+    # Guest: пакетный разбор
+    "guest": (decode_guests,
+              lambda guests: [g.to_dict(RUNNING_FIELDS) for g in guests if g.status == "running"]),
+}
+
+
+def _best(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _measure(decode: Callable, select: Callable, resources: list[dict], repeat: int) -> dict:
+    decode_time = _best(lambda: decode(resources), repeat)
+    total_time = _best(lambda: _encode(select(decode(resources))), repeat)
+    gc.collect()
+    tracemalloc.start()
+    models = decode(resources)
+    retained = tracemalloc.get_traced_memory()[0]  # память под разобранный список
+    body = _encode(select(models))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "decode_ms": round(decode_time * 1000, 2),
+        "total_ms": round(total_time * 1000, 2),
+        "models_kb": round(retained / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "body_kb": round(len(body) / 1024, 1),
+    }
+
+
+def run(sizes: list[int], repeat: int = 7) -> dict:
+    report = {}
+    for size in sizes:
+        resources = [_vm(100 + i) for i in range(size)]
+        report[str(size)] = {name: _measure(decode, select, resources, repeat) for name, (decode, select) in PATHS.items()}
+    return report
+
+
+def format_report(report: dict) -> str:
+    columns = ("decode_ms", "total_ms", "models_kb", "peak_kb", "body_kb")
+    lines = [f"{'guests':>7} {'path':<14}" + "".join(f"{c:>11}" for c in columns)]
+    for size, paths in report.items():
+        for name, result in paths.items():
+            lines.append(f"{size:>7} {name:<14}" + "".join(f"{result[c]:>11}" for c in columns))
+    return "\n".join(lines)
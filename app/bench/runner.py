@@ -0,0 +1,188 @@
+# bench/runner.py
+import asyncio
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+from urllib.parse import urlencode
+import aiohttp
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    params: dict | None = None
+    headers: dict | None = None
+
+
+@dataclass
+class Scenario:
+    """Сценарий нагрузки: набор запросов, которые workers гоняют по кругу в течение duration"""
+    name: str
+    requests: list[Request]
+    concurrency: int = 50
+    duration: float = 10.0
+    description: str = ""
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    loop_lag: list[float] = field(default_factory=list)
+    bytes: int = 0
+
+    @staticmethod
+    def _percentile(values: list[float], pct: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def to_dict(self) -> dict:
+        ms = [v * 1000 for v in self.latencies]
+        lag = [v * 1000 for v in self.loop_lag]
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rps": round(self.requests / self.elapsed, 1) if self.elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(self._percentile(ms, 50), 2),
+                "p90": round(self._percentile(ms, 90), 2),
+                "p99": round(self._percentile(ms, 99), 2),
+                "max": round(max(ms, default=0.0), 2),
+                "mean": round(statistics.fmean(ms), 2) if ms else 0.0,
+            },
+            "loop_lag_ms": {
+                "p99": round(self._percentile(lag, 99), 2),
+                "max": round(max(lag, default=0.0), 2),
+            },
+            "mb_received": round(self.bytes / 1e6, 2),
+        }
+
+
+# Транспорт: (method, path, params, headers) -> (status, размер тела)
+Transport = Callable[[Request], Awaitable[tuple[int, int]]]
+
+
+class ASGITransport:
+    """Вызов ASGI-приложения напрямую в том же event loop, без сети"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, request: Request) -> tuple[int, int]:
+        query = urlencode(request.params or {}, doseq=True)
+        headers = [(k.lower().encode(), str(v).encode()) for k, v in (request.headers or {}).items()]
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": request.method.upper(),
+            "scheme": "http", "path": request.path, "raw_path": request.path.encode(), "query_string": query.encode(),
+            "root_path": "", "headers": headers, "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+        }
+        done = asyncio.Event()
+        sent_request = False
+        status = 0
+        size = 0
+
+        async def receive() -> dict:
+            nonlocal sent_request
+            if not sent_request:
+                sent_request = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: dict) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if not message.get("more_body"):
+                    done.set()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            done.set()
+        return status, size
+
+
+class HTTPTransport:
+    """Запросы к запущенному серверу по HTTP"""
+
+    def __init__(self, base_url: str, concurrency: int):
+        self.base_url = base_url.rstrip("/")
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency))
+
+    async def __call__(self, request: Request) -> tuple[int, int]:
+        async with self.session.request(request.method, f"{self.base_url}{request.path}",
+                                        params=request.params, headers=request.headers) as response:
+            size = 0
+            async for chunk in response.content.iter_chunked(65536):
+                size += len(chunk)
+            return response.status, size
+
+    async def close(self) -> None:
+        await self.session.close()
+
+
+async def _monitor_loop_lag(samples: list[float], stop: asyncio.Event, interval: float = 0.01) -> None:
+    """Задержка event loop: насколько позже запланированного просыпается sleep(interval)"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - start - interval))
+
+
+async def run_scenario(scenario: Scenario, transport: Transport) -> ScenarioResult:
+    result = ScenarioResult(name=scenario.name)
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_monitor_loop_lag(result.loop_lag, stop))
+    deadline = time.perf_counter() + scenario.duration
+
+    async def worker(offset: int) -> None:
+        i = offset
+        while time.perf_counter() < deadline:
+            request = scenario.requests[i % len(scenario.requests)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                status, size = await transport(request)
+                if status >= 400:
+                    result.errors += 1
+                result.bytes += size
+            except Exception:
+                result.errors += 1
+            result.latencies.append(time.perf_counter() - start)
+            result.requests += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(scenario.concurrency)))
+    result.elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    return result
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Регрессии относительно baseline: p99 выше на threshold или rps ниже на threshold"""
+    problems = []
+    for name, base in baseline.get("scenarios", {}).items():
+        cur = current.get("scenarios", {}).get(name)
+        if cur is None:
+            continue
+        base_p99, cur_p99 = base["latency_ms"]["p99"], cur["latency_ms"]["p99"]
+        if base_p99 and cur_p99 > base_p99 * (1 + threshold):
+            problems.append(f"{name}: p99 {cur_p99} ms > baseline {base_p99} ms (+{threshold:.0%})")
+        if base["rps"] and cur["rps"] < base["rps"] * (1 - threshold):
+            problems.append(f"{name}: rps {cur['rps']} < baseline {base['rps']} (-{threshold:.0%})")
+        if cur["errors"] > base["errors"]:
+            problems.append(f"{name}: errors {cur['errors']} > baseline {base['errors']}")
+    return problems
@@ -0,0 +1,30 @@
+# bench/scenarios.py
+from app.bench.runner import Request, Scenario
+
+
+SCENARIOS: dict[str, Scenario] = {s.name: s for s in [
+    Scenario(
+        "polling_storm",
+        [Request("GET", "/prox/running"), Request("GET", "/prox/check"), Request("GET", "/api/health")],
+        concurrency=100,
+        description="Много клиентов опрашивают статус: /prox/running, /prox/check, /api/health",
+    ),
+    Scenario(
+        "burst_power",
+        [Request("POST", "/prox/start_all_vms")],
+        concurrency=20,
+        description="Пачка одновременных запусков всех VM",
+    ),
+    Scenario(
+        "streaming",
+        [Request("POST", "/mikro/run_command", params={"command": "/export verbose"})],
+        concurrency=8,
+        description="Длинные команды по SSH с большим выводом (без кеша)",
+    ),
+    Scenario(
+        "readonly",
+        [Request("GET", "/mikro/interfaces"), Request("GET", "/prox/qm_list")],
+        concurrency=50,
+        description="Read-only команды из кеша с разбором вывода",
+    ),
+]}
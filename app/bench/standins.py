@@ -0,0 +1,160 @@
+# bench/standins.py
+import asyncio
+from dataclasses import dataclass, field
+import asyncssh
+from aiohttp import web
+
+
+@dataclass
+class StandinConfig:
+    """Параметры локальных заглушек Proxmox API и SSH"""
+    vms: int = 200                  # сколько VM отдаёт cluster/resources
+    api_latency: float = 0.002      # задержка ответа API, сек
+    ssh_latency: float = 0.005      # задержка выполнения команды по SSH, сек
+    large_output_lines: int = 20000 # размер вывода для "длинных" команд (/export verbose, journalctl)
+    sftp_root: str | None = None    # каталог, который SSH-заглушка отдаёт по SFTP (chroot); None — без SFTP
+
+
+def _vm(vmid: int) -> dict:
+    tags = ("db" if vmid % 10 == 0 else "storage" if vmid % 25 == 0 else "")
+    return {
+        "id": f"qemu/{vmid}", "vmid": vmid, "name": f"vm-{vmid}", "node": f"pve{vmid % 3 + 1}", "type": "qemu",
+        "status": "running" if vmid % 4 else "stopped", "cpu": 0.01, "maxcpu": 4, "mem": 1 << 30, "maxmem": 4 << 30,
+        "disk": 0, "maxdisk": 32 << 30, "uptime": 3600 * vmid, "tags": tags, "template": 0,
+    }
+
+
+class ProxmoxStandin:
+    """Заглушка Proxmox REST API (aiohttp) с управляемым количеством VM и задержкой"""
+
+    def __init__(self, config: StandinConfig):
+        self.config = config
+        self.vms = {100 + i: _vm(100 + i) for i in range(config.vms)}
+        self.runner: web.AppRunner | None = None
+        self.port: int | None = None
+
+    async def _delay(self) -> None:
+        if self.config.api_latency:
+            await asyncio.sleep(self.config.api_latency)
+
+    async def resources(self, request: web.Request) -> web.Response:
+        await self._delay()
+        return web.json_response({"data": list(self.vms.values())})
+
+    async def version(self, request: web.Request) -> web.Response:
+        return web.json_response({"data": {"version": "8.2.0", "release": "8.2"}})
+
+    async def cluster_status(self, request: web.Request) -> web.Response:
+        nodes = sorted({vm["node"] for vm in self.vms.values()})
+        return web.json_response({"data": [{"type": "node", "name": n, "ip": "127.0.0.1", "online": 1} for n in nodes]})
+
+    async def vm_status(self, request: web.Request) -> web.Response:
+        await self._delay()
+        vmid, action = int(request.match_info["vmid"]), request.match_info["action"]
+        vm = self.vms.get(vmid)
+        if vm is None:
+            return web.json_response({"data": None, "message": "not found"}, status=404)
+        vm["status"] = "running" if action == "start" else "stopped"
+        return web.json_response({"data": f"UPID:{vm['node']}:0000:{action}:{vmid}:bench@pam:"})
+
+    async def node_status(self, request: web.Request) -> web.Response:
+        return web.json_response({"data": None})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        app = web.Application()
+        app.router.add_get("/api2/json/cluster/resources", self.resources)
+        app.router.add_get("/api2/json/cluster/status", self.cluster_status)
+        app.router.add_get("/api2/json/version", self.version)
+        app.router.add_post("/api2/json/nodes/{node}/{kind}/{vmid}/status/{action}", self.vm_status)
+        app.router.add_post("/api2/json/nodes/{node}/status", self.node_status)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        if self.runner:
+            await self.runner.cleanup()
+
+
+class _NoAuthServer(asyncssh.SSHServer):
+    def begin_auth(self, username: str) -> bool:
+        return False  # аутентификация не требуется
+
+
+class SSHStandin:
+    """Заглушка SSH-сервера (asyncssh): отвечает заготовленным выводом на известные команды"""
+
+    def __init__(self, config: StandinConfig):
+        self.config = config
+        self.server: asyncssh.SSHAcceptor | None = None
+        self.port: int | None = None
+        large = "\n".join(f"line {i}: " + "x" * 60 for i in range(config.large_output_lines)) + "\n"
+        self.outputs = {
+            "/interface print terse without-paging": "".join(
+                f" {i}  R name=ether{i} default-name=ether{i} type=ether mtu=1500 mac-address=AA:BB:CC:00:00:{i:02X}\n" for i in range(10)),
+            "/interface print": "Flags: R - RUNNING\n #   NAME     TYPE   MTU\n" + "".join(f" {i} R ether{i}  ether  1500\n" for i in range(10)),
+            "qm list": "      VMID NAME                 STATUS     MEM(MB)    BOOTDISK(GB) PID\n" + "".join(
+                f"       {100 + i} vm-{100 + i:<16} running    2048              32.00 {1000 + i}\n" for i in range(config.vms)),
+            "/export verbose": large,
+            "journalctl": large,
+        }
+
+    async def _handle(self, process: asyncssh.SSHServerProcess) -> None:
+        if self.config.ssh_latency:
+            await asyncio.sleep(self.config.ssh_latency)
+        command = (process.command or "").strip()
+        output = self.outputs.get(command)
+        if output is None and command.startswith("journalctl"):
+            output = self.outputs["journalctl"]
+        process.stdout.write(output if output is not None else f"ok: {command}\n")
+        process.exit(0)
+
+    def _sftp_factory(self):
+        root = self.config.sftp_root
+        return lambda chan: asyncssh.SFTPServer(chan, chroot=root)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        self.server = await asyncssh.create_server(
+            _NoAuthServer, host, port,
+            server_host_keys=[asyncssh.generate_private_key("ssh-ed25519")],
+            process_factory=self._handle,
+            sftp_factory=self._sftp_factory() if self.config.sftp_root else None,
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self) -> None:
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+
+@dataclass
+class Standins:
+    """Все заглушки вместе и переменные окружения, которые направляют на них приложение"""
+    config: StandinConfig = field(default_factory=StandinConfig)
+    proxmox: ProxmoxStandin | None = None
+    ssh: SSHStandin | None = None
+
+    async def start(self) -> dict[str, str]:
+        self.proxmox = ProxmoxStandin(self.config)
+        self.ssh = SSHStandin(self.config)
+        api_port = await self.proxmox.start()
+        ssh_port = await self.ssh.start()
+        return {
+            "PROX_MAC": "00:00:00:00:00:00",
+            "PVE_HOST": f"http://127.0.0.1:{api_port}",
+            "PVE_HOST_IP": "127.0.0.1",
+            "PVE_SSH_PORT": str(ssh_port),
+            "PVE_USER": "bench", "PVE_PASSWORD": "bench", "PVE_TOKEN": "bench@pam!bench", "PVE_SECRET": "bench",
+            "MIKROTIK_HOST": "127.0.0.1", "MIKROTIK_PORT": str(ssh_port),
+            "MIKROTIK_USER": "bench", "MIKROTIK_PASSWORD": "bench",
+        }
+
+    async def stop(self) -> None:
+        for standin in (self.proxmox, self.ssh):
+            if standin:
+                await standin.stop()
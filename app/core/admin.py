@@ -0,0 +1,12 @@
+# core/admin.py
+import secrets
+from fastapi import Header, HTTPException
+from app.core.settings import settings
+
+
+def require_admin(x_admin_token: str | None = Header(None, alias="X-Admin-Token")) -> None:
+    """Доступ к /admin только с заголовком X-Admin-Token, равным ADMIN_TOKEN"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API отключён: ADMIN_TOKEN не задан")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Неверный X-Admin-Token")
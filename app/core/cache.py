@@ -0,0 +1,97 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.core.shared_state import SharedStore
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires: float
+    created: float
+
+
+class TTLCache:
+    """Асинхронный кеш с временем жизни записей и объединением одновременных запросов (single-flight):
+    пока значение загружается, остальные запросы с тем же ключом ждут ту же загрузку.
+    Ошибки загрузки не кешируются. С shared (SharedStore) значения видны всем воркерам —
+    они должны сериализоваться в JSON."""
+
+    def __init__(self, maxsize: int = 256, shared: "SharedStore | None" = None, namespace: str = "cache"):
+        self.maxsize = maxsize
+        self.shared = shared
+        self.namespace = namespace
+        self._data: dict[Hashable, CacheEntry] = {}
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{json.dumps(key, default=str)}"
+
+    async def get(self, key: Hashable) -> CacheEntry | None:
+        entry = self._data.get(key)
+        if entry is not None and entry.expires > time.time():
+            return entry
+        self._data.pop(key, None)
+        if self.shared is not None:
+            stored = await asyncio.to_thread(self.shared.get, self._shared_key(key))
+            if stored is not None:
+                entry = CacheEntry(value=stored["value"], expires=stored["expires"], created=stored["created"])
+                self._data[key] = entry
+                return entry
+        return None
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> CacheEntry:
+        now = time.time()
+        if len(self._data) >= self.maxsize and key not in self._data:
+            self._evict(now)
+        entry = CacheEntry(value=value, expires=now + ttl, created=now)
+        self._data[key] = entry
+        return entry
+
+    def _evict(self, now: float) -> None:
+        """Удаляет просроченные записи, а если их нет — ту, что истекает раньше всех"""
+        expired = [k for k, e in self._data.items() if e.expires <= now]
+        for k in expired:
+            del self._data[k]
+        if len(self._data) >= self.maxsize:
+            del self._data[min(self._data, key=lambda k: self._data[k].expires)]
+
+    async def invalidate(self, key: Hashable | None = None) -> None:
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+            if self.shared is not None:
+                await asyncio.to_thread(self.shared.delete, self._shared_key(key))
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        value = await loader()
+        entry = self.set(key, value, ttl)
+        if self.shared is not None:
+            stored = {"value": value, "expires": entry.expires, "created": entry.created}
+            await asyncio.to_thread(self.shared.set, self._shared_key(key), stored, ttl)
+        return value
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # ошибка получена ожидающими; иначе asyncio предупредит о необработанной
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: float) -> tuple[Any, bool, float]:
+        """Возвращает (значение, из кеша ли, возраст в секундах).
+        Загрузка идёт отдельной задачей: отмена одного ожидающего не отменяет её для остальных."""
+        entry = await self.get(key)
+        if entry is not None:
+            return entry.value, True, time.time() - entry.created
+        task = self._inflight.get(key)
+        joined = task is not None
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        value = await asyncio.shield(task)
+        return value, joined, 0.0
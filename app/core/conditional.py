@@ -0,0 +1,34 @@
+import hashlib
+import json
+from fastapi import Request, Response
+from app.core.response import ServiceResponse, ServiceStatus, json_default
+
+
+def make_etag(body: bytes) -> str:
+    """Сильный ETag по содержимому ответа (blake2b, 128 бит)"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Проверка заголовка If-None-Match (список через запятую, W/ и * допускаются)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def conditional_response(request: Request, response: ServiceResponse) -> Response:
+    """Ответ с ETag; если клиент прислал совпадающий If-None-Match — 304 без тела.
+    JSON сериализуется один раз: эти же байты идут и в хеш, и в тело ответа.
+    Ошибки не получают ETag, чтобы их не закешировали."""
+    body = json.dumps(response.to_dict(), ensure_ascii=False, separators=(",", ":"), default=json_default).encode()
+    if response.status != ServiceStatus.success:
+        return Response(content=body, media_type="application/json")
+    etag = make_etag(body)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
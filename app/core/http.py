@@ -6,6 +6,20 @@ from dataclasses import dataclass, field
 from typing import Any, Dict, Literal
 from json import JSONDecodeError
 import socket
+import reprlib
+
+_body_repr = reprlib.Repr()
+_body_repr.maxstring = 200
+_body_repr.maxother = 200
+_body_repr.maxlist = _body_repr.maxdict = 10
+_body_repr.maxlevel = 3
+
+
+def short_repr(value: Any) -> str:
+    """Ограниченное представление тела запроса/ответа для логов: большие ответы не форматируются целиком"""
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    return _body_repr.repr(value)
 
 @dataclass
 class ErrorInfo:
@@ -67,7 +81,8 @@ class RequestFormat:
         self.method = self.method.upper()
 
     def __repr__(self):
-        return f"<RequestFormat method={self.method} endpoint={self.endpoint} params={self.params} json={self.json} data={self.data} headers={self.headers} return_type={self.return_type}>"
+        return (f"<RequestFormat method={self.method} endpoint={self.endpoint} params={short_repr(self.params)} "
+                f"json={short_repr(self.json)} data={short_repr(self.data)} headers={list(self.headers or {})} return_type={self.return_type}>")
 
 # Формат ответа
 @dataclass
@@ -87,7 +102,7 @@ class ResponseFormat:
 
     def __repr__(self):
         """для логов"""
-        return f"<ResponseFormat status={self.status} success={self.success} url={self.url} data={self.data}>"
+        return f"<ResponseFormat status={self.status} success={self.success} url={self.url} data={short_repr(self.data)}>"
 
     @property
     def is_json(self) -> bool:
@@ -190,7 +205,9 @@ class AsyncHttpClient:
         start_time = time.perf_counter()
         for attempt in range(self.max_retries + 1):
             try:
-                self.logger.debug(f"Request attempt {attempt + 1}: {request.method} {url} | params={request.params} json={request.json} data={request.data}")
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(f"Request attempt {attempt + 1}: {request.method} {url} | params={short_repr(request.params)} "
+                                      f"json={short_repr(request.json)} data={short_repr(request.data)}")
 
                 async with self.session.request(
                         method=request.method,
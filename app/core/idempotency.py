@@ -0,0 +1,46 @@
+import asyncio
+from typing import Awaitable, Callable
+from app.core.response import ServiceResponse, ServiceStatus
+from app.core.shared_state import shared_store
+
+IDEMPOTENCY_TTL = 24 * 3600
+PENDING_TTL = 60.0  # аренда записи "pending": продлевается, пока операция идёт; после гибели воркера ключ свободен через минуту
+
+
+async def _keep_pending(record_key: str, stop: asyncio.Event) -> None:
+    """Продлевает аренду pending-записи, пока операция не завершится (stop).
+    Завершается сама, без cancel: начатая в потоке запись успевает закончиться до итогового сохранения"""
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=PENDING_TTL / 3)
+        except asyncio.TimeoutError:
+            await asyncio.to_thread(shared_store.set, record_key, {"state": "pending"}, PENDING_TTL)
+
+
+async def run_idempotent(key: str | None, scope: str, func: Callable[[], Awaitable[ServiceResponse]],
+                         ttl: float = IDEMPOTENCY_TTL) -> ServiceResponse:
+    """Выполняет операцию один раз на ключ Idempotency-Key (в пределах всех воркеров).
+    Повторный запрос с тем же ключом получает сохранённый ответ, а не запускает операцию ещё раз."""
+    if not key:
+        return await func()
+    record_key = f"idempotency:{scope}:{key}"
+    if not await asyncio.to_thread(shared_store.add, record_key, {"state": "pending"}, PENDING_TTL):
+        stored = await asyncio.to_thread(shared_store.get, record_key) or {}
+        if stored.get("state") == "done":
+            response = stored["response"]
+            return ServiceResponse(status=ServiceStatus(response["status"]), message=response["message"],
+                                   error=response["error"], data=response["data"])
+        return ServiceResponse(status=ServiceStatus.warning, message="Запрос с этим Idempotency-Key уже выполняется", error=key)
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_keep_pending(record_key, stop))
+    try:
+        response = await func()
+    except BaseException:
+        stop.set()
+        await heartbeat
+        await asyncio.to_thread(shared_store.delete, record_key)
+        raise
+    stop.set()
+    await heartbeat
+    await asyncio.to_thread(shared_store.set, record_key, {"state": "done", "response": response.to_dict()}, ttl)
+    return response
@@ -0,0 +1,78 @@
+import asyncio
+import fcntl
+import os
+from pathlib import Path
+from typing import Awaitable, Callable
+import logging
+
+
+class LeaderElection:
+    """Выбор лидера среди воркеров uvicorn через эксклюзивную блокировку файла (flock).
+    Фоновые задачи (планировщик, поллеры) запускаются только в лидере. Блокировка снимается ОС
+    при завершении процесса, поэтому остальные воркеры периодически пытаются её перехватить."""
+
+    def __init__(self, lock_path: str | Path, logger: logging.Logger, retry_interval: float = 5.0):
+        self.lock_path = Path(lock_path)
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        self.retry_interval = retry_interval
+        self.is_leader = False
+        self._fd: int | None = None
+        self._task: asyncio.Task | None = None
+        self._workers: list[tuple[str, Callable[[], Awaitable[None]], Callable[[], Awaitable[None]]]] = []
+
+    def register(self, name: str, start: Callable[[], Awaitable[None]], stop: Callable[[], Awaitable[None]]) -> None:
+        """Фоновая задача, которая должна работать только в лидере"""
+        self._workers.append((name, start, stop))
+
+    def _try_acquire(self) -> bool:
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    async def _become_leader(self) -> None:
+        self.is_leader = True
+        self.logger.info(f"Процесс {os.getpid()} выбран лидером, запуск фоновых задач: {[w[0] for w in self._workers]}")
+        for name, start, _ in self._workers:
+            try:
+                await start()
+            except Exception as e:
+                self.logger.error(f"Не удалось запустить фоновую задачу {name}: {e}")
+
+    async def _campaign(self) -> None:
+        while not self.is_leader:
+            await asyncio.sleep(self.retry_interval)
+            if self._try_acquire():
+                await self._become_leader()
+
+    async def start(self) -> None:
+        """Первая попытка — сразу, далее фоновые повторы, пока лидер не найдётся"""
+        if self._try_acquire():
+            await self._become_leader()
+        else:
+            self.logger.info(f"Процесс {os.getpid()} работает как ведомый воркер")
+            self._task = asyncio.create_task(self._campaign(), name="leader-election")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.is_leader:
+            for name, _, stop in reversed(self._workers):
+                try:
+                    await stop()
+                except Exception as e:
+                    self.logger.error(f"Ошибка остановки фоновой задачи {name}: {e}")
+            self.is_leader = False
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
@@ -1,3 +1,4 @@
+import abc
 from datetime import datetime, timezone
 import traceback
 import logging
@@ -49,6 +50,117 @@ class JsonFormatter(logging.Formatter):
 
         return json.dumps(log_record, ensure_ascii=False, default=str)
 
+class _OncePerRecordFilter(logging.Filter, abc.ABC):
+    """Фильтр с состоянием, общий для всех обработчиков: решение принимается один раз на запись
+    и запоминается в ней, поэтому файл и консоль видят одно и то же, а счётчики не удваиваются"""
+    def __init__(self):
+        super().__init__()
+        self._attr = f"_{self.__class__.__name__}_verdict"
+        self._lock = threading.RLock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "log_summary", False):
+            return True
+        verdict = getattr(record, self._attr, None)
+        if verdict is None:
+            with self._lock:
+                verdict = self.decide(record)
+            setattr(record, self._attr, verdict)
+        return verdict
+
+    @abc.abstractmethod
+    def decide(self, record: logging.LogRecord) -> bool:
+        """True — запись проходит. Вызывается один раз на запись, под блокировкой"""
+
+
+class TruncateFilter(_OncePerRecordFilter):
+    """Обрезает сообщение до max_bytes байт (UTF-8) и дописывает исходный размер.
+    Один раз на запись: второй обработчик не обрезает уже обрезанное сообщение"""
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self.max_bytes = max_bytes
+
+    def decide(self, record: logging.LogRecord) -> bool:
+        message = record.getMessage()
+        if len(message) * 4 <= self.max_bytes:  # заведомо короче лимита, без кодирования
+            return True
+        encoded = message.encode("utf-8", errors="replace")
+        if len(encoded) > self.max_bytes:
+            record.msg = f"{encoded[:self.max_bytes].decode('utf-8', errors='ignore')}… [обрезано, всего {len(encoded)} байт]"
+            record.args = None
+        return True
+
+
+class RateLimitFilter(_OncePerRecordFilter):
+    """Ограничение частоты записей каждого логгера: token bucket (rate в секунду, запас burst).
+    Сверх лимита проходит каждая sample_every-я запись, число пропущенных дописывается к следующей прошедшей.
+    Записи уровня max_level и выше не ограничиваются"""
+    def __init__(self, rate: float, burst: int, sample_every: int = 100, max_level: int = logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.sample_every = max(1, sample_every)
+        self.max_level = max_level
+        self._buckets: dict[str, list[float]] = {}  # логгер -> [токены, время обновления, пропущено, сверх лимита]
+
+    def decide(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.max_level:
+            return True
+        now = record.created
+        bucket = self._buckets.get(record.name)
+        if bucket is None:
+            bucket = self._buckets[record.name] = [float(self.burst), now, 0, 0]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+        else:
+            bucket[0] = tokens
+            bucket[3] += 1
+            if bucket[3] % self.sample_every:
+                bucket[2] += 1
+                return False
+        if bucket[2]:
+            record.msg = f"{record.getMessage()} [пропущено {bucket[2]} сообщений логгера {record.name}]"
+            record.args = None
+            bucket[2] = 0
+        return True
+
+
+class DuplicateFilter(_OncePerRecordFilter):
+    """Подавляет подряд идущие одинаковые записи (логгер, уровень, текст).
+    Когда появляется другая запись (или повторы длятся дольше interval секунд), пишется итог: сколько раз повторилось"""
+    def __init__(self, interval: float = 60.0):
+        super().__init__()
+        self.interval = interval
+        self._last: tuple | None = None
+        self._last_record: logging.LogRecord | None = None
+        self._repeats = 0
+        self._since = 0.0
+
+    def _emit_summary(self) -> None:
+        last, repeats = self._last_record, self._repeats
+        self._repeats = 0
+        summary = logging.LogRecord(last.name, last.levelno, last.pathname, last.lineno,
+                                    f"Предыдущее сообщение повторилось ещё {repeats} раз", None, None)
+        summary.log_summary = True
+        logging.getLogger(last.name).handle(summary)
+
+    def decide(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, record.getMessage())
+        if key == self._last:
+            self._repeats += 1
+            if record.created - self._since < self.interval:
+                return False
+            self._emit_summary()
+            self._since = record.created
+            return False
+        if self._repeats:
+            self._emit_summary()
+        self._last, self._last_record, self._since = key, record, record.created
+        return True
+
+
 class SmartTimedRotatingFileHandler(TimedRotatingFileHandler):
     """Ротирует логи в формате app.YYYY-MM-DD.log"""
     def __init__(self, filename, when="midnight", interval=1, backupCount=30, encoding="utf-8"):
@@ -78,7 +190,12 @@ class LoggerConfig:
         backup_count: int = 30,
         encoding: str = "utf-8",
         console_output: bool = True,
-        use_json: bool = False
+        use_json: bool = False,
+        max_message_bytes: int = 0,
+        rate_limit: float = 0,
+        rate_burst: int = 100,
+        sample_every: int = 100,
+        deduplicate: bool = False,
     ):
         self.base_dir = Path(base_dir) if base_dir else Path(__file__).resolve().parent
         self.log_dir = self._resolve_log_dir(log_dir)
@@ -91,6 +208,11 @@ class LoggerConfig:
         self.encoding = encoding
         self.console_output = console_output    # флаг для вывода в консоль
         self.use_json = use_json                # флаг для json логов
+        self.max_message_bytes = max_message_bytes  # обрезка сообщений длиннее N байт (0 — без обрезки)
+        self.rate_limit = rate_limit            # записей в секунду на логгер ниже WARNING (0 — без ограничения)
+        self.rate_burst = rate_burst            # допустимый всплеск записей сверх rate_limit
+        self.sample_every = sample_every        # сверх лимита пропускается каждая N-я запись
+        self.deduplicate = deduplicate          # схлопывание подряд идущих одинаковых записей
         self.app_logger_name = self.log_file.replace(".log", "")    # имя для файла с логами
         try:
             self.log_dir.mkdir(parents=True, exist_ok=True)
@@ -109,6 +231,17 @@ class LoggerConfig:
         else:
             return project_root / log_dir   # если передана папку, то берет корень проекта + папка
 
+    def build_filters(self) -> list[logging.Filter]:
+        """Фильтры объёма логов; одни и те же экземпляры ставятся на все обработчики"""
+        filters: list[logging.Filter] = []
+        if self.deduplicate:
+            filters.append(DuplicateFilter())
+        if self.rate_limit > 0:
+            filters.append(RateLimitFilter(self.rate_limit, self.rate_burst, self.sample_every))
+        if self.max_message_bytes > 0:
+            filters.append(TruncateFilter(self.max_message_bytes))
+        return filters
+
     def setup_logger(self) -> None:
         """Настройка логирования с защитой от повторной инициализации"""
         with self._lock:
@@ -133,7 +266,10 @@ class LoggerConfig:
                 console_handler = logging.StreamHandler()
                 console_handler.setFormatter(formatter)
                 handlers.append(console_handler)
+            filters = self.build_filters()
             for h in handlers:
+                for f in filters:
+                    h.addFilter(f)
                 root.addHandler(h)
             root.setLevel(getattr(logging, self.log_level, logging.INFO))
             self.logger.info(repr(self))
@@ -150,7 +286,8 @@ class LoggerConfig:
 
     def __repr__(self) -> str:
         return (f"LoggerConfig(log_dir={self.log_dir}, log_file={self.log_file}, "
-                f"level={self.log_level}, console={self.console_output}, use_json={self.use_json})")
+                f"level={self.log_level}, console={self.console_output}, use_json={self.use_json}, "
+                f"max_message_bytes={self.max_message_bytes}, rate_limit={self.rate_limit}, deduplicate={self.deduplicate})")
 
 
 
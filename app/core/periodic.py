@@ -0,0 +1,35 @@
+import asyncio
+from typing import Callable
+import logging
+
+
+class PeriodicTask:
+    """Синхронная функция обслуживания (очистка, удаление устаревшего), раз в interval секунд в пуле потоков.
+    start/stop — для leader.register: при нескольких воркерах работает только в лидере."""
+
+    def __init__(self, name: str, func: Callable[[], object], interval: float, logger: logging.Logger):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        self._task: asyncio.Task | None = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                result = await asyncio.to_thread(self.func)
+                if result:
+                    self.logger.debug(f"{self.name}: {result}")
+            except Exception as e:
+                self.logger.warning(f"Ошибка фоновой задачи {self.name}: {e}")
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
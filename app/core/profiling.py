@@ -0,0 +1,254 @@
+# core/profiling.py
+import asyncio
+import cProfile
+import contextvars
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from app.core.settings import settings
+import logging
+logger = logging.getLogger(__name__)
+
+
+class RouteSample:
+    """Счётчик CPU одного запроса; лежит в contextvar, поэтому виден во всех callback'ах его задачи"""
+    __slots__ = ("cpu", "started", "closed")
+
+    def __init__(self):
+        self.cpu = 0.0
+        self.started = time.thread_time()
+        self.closed = False
+
+
+current_route: contextvars.ContextVar[RouteSample | None] = contextvars.ContextVar("current_route", default=None)
+
+
+@dataclass
+class RouteStats:
+    count: int = 0
+    cpu_total: float = 0.0
+    cpu_max: float = 0.0
+    wall_total: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "cpu_total_ms": round(self.cpu_total * 1000, 2),
+            "cpu_avg_ms": round(self.cpu_total * 1000 / self.count, 3) if self.count else 0.0,
+            "cpu_max_ms": round(self.cpu_max * 1000, 3),
+            "wall_avg_ms": round(self.wall_total * 1000 / self.count, 3) if self.count else 0.0,
+        }
+
+
+def _describe_callback(handle: asyncio.Handle) -> str:
+    owner = getattr(handle._callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return f"task {owner.get_name()} ({getattr(coro, '__qualname__', coro)})"
+    return repr(handle)
+
+
+class LoopMonitor:
+    """Постоянный дешёвый контроль event loop.
+
+    Каждый callback цикла (asyncio.Handle._run) оборачивается замером времени: так считается CPU по маршрутам
+    и находятся callback'и, блокирующие цикл дольше threshold. Поток-сторож раз в threshold/4 смотрит,
+    сколько выполняется текущий callback, и при превышении снимает стек потока цикла (sys._current_frames) —
+    по нему видно, какой синхронный вызов держит цикл. Работает только со стандартным циклом asyncio."""
+
+    def __init__(self, logger: logging.Logger, threshold: float = 0.1, history: int = 50):
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        self.threshold = threshold
+        self.blocked: deque[dict] = deque(maxlen=history)
+        self.blocked_total = 0
+        self.max_block = 0.0
+        self.routes: dict[str, RouteStats] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread_id: int | None = None
+        self._current: tuple[float, int] | None = None  # (начало, номер) выполняющегося callback
+        self._seq = 0
+        self._step_cpu = 0.0  # thread_time() начала текущего callback
+        self._stacks: dict[int, str] = {}
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+        self._original_run = None
+
+    @property
+    def active(self) -> bool:
+        return self._watchdog is not None
+
+    def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if not isinstance(loop, asyncio.BaseEventLoop):
+            self.logger.warning(f"Контроль event loop недоступен для {type(loop).__name__}")
+            return
+        if self.active:
+            return
+        self._loop, self._thread_id = loop, threading.get_ident()
+        self._patch()
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        self.logger.info(f"Контроль event loop запущен, порог блокировки {self.threshold * 1000:.0f} мс")
+
+    def stop(self) -> None:
+        if not self.active:
+            return
+        self._stop.set()
+        self._watchdog.join(timeout=1)
+        self._watchdog = None
+        if self._original_run is not None:
+            asyncio.events.Handle._run = self._original_run
+            self._original_run = None
+
+    def _patch(self) -> None:
+        original = self._original_run = asyncio.events.Handle._run
+        monitor = self
+
+        def _run(handle: asyncio.Handle) -> None:
+            if handle._loop is not monitor._loop:
+                return original(handle)
+            monitor._seq += 1
+            seq = monitor._seq
+            start = time.perf_counter()
+            monitor._step_cpu = time.thread_time()
+            monitor._current = (start, seq)
+            try:
+                original(handle)
+            finally:
+                monitor._current = None
+                elapsed = time.perf_counter() - start
+                sample = handle._context.get(current_route) if handle._context is not None else None
+                if sample is not None and not sample.closed:
+                    sample.cpu += time.thread_time() - max(monitor._step_cpu, sample.started)
+                if elapsed >= monitor.threshold:
+                    monitor._record(handle, elapsed, seq)
+
+        asyncio.events.Handle._run = _run
+
+    def _watch(self) -> None:
+        interval = max(self.threshold / 4, 0.005)
+        reported = 0
+        while not self._stop.wait(interval):
+            current = self._current
+            if current is None:
+                continue
+            start, seq = current
+            blocked_for = time.perf_counter() - start
+            if blocked_for < self.threshold:
+                continue
+            if seq not in self._stacks:
+                frame = sys._current_frames().get(self._thread_id)
+                if frame is not None:
+                    self._stacks[seq] = "".join(traceback.format_stack(frame, limit=30))
+            elif seq != reported and blocked_for >= self.threshold * 50:
+                reported = seq  # цикл завис: сообщаем сразу, не дожидаясь окончания callback
+                self.logger.error(f"Event loop заблокирован уже {blocked_for:.1f} с:\n{self._stacks[seq]}")
+
+    def _record(self, handle: asyncio.Handle, elapsed: float, seq: int) -> None:
+        stack = self._stacks.pop(seq, "")
+        self._stacks.clear()  # стеки завершённых callback'ов больше не нужны
+        callback = _describe_callback(handle)
+        self.blocked_total += 1
+        self.max_block = max(self.max_block, elapsed)
+        self.blocked.append({"at": time.time(), "duration_ms": round(elapsed * 1000, 1), "callback": callback,
+                             "stack": stack})
+        self.logger.warning(f"Event loop заблокирован на {elapsed * 1000:.0f} мс: {callback}"
+                            + (f"\n{stack}" if stack else ""))
+
+    def close_sample(self, sample: RouteSample) -> float:
+        """Завершение замера запроса: добавляет CPU текущего callback до этого момента.
+        Остаток callback'а после выхода из обработчика к маршруту не относится"""
+        if self.active and not sample.closed:
+            sample.cpu += time.thread_time() - max(self._step_cpu, sample.started)
+        sample.closed = True
+        return sample.cpu
+
+    def add_route_sample(self, route: str, cpu: float, wall: float) -> None:
+        stats = self.routes.get(route)
+        if stats is None:
+            stats = self.routes[route] = RouteStats()
+        stats.count += 1
+        stats.cpu_total += cpu
+        stats.cpu_max = max(stats.cpu_max, cpu)
+        stats.wall_total += wall
+
+    def route_stats(self) -> dict:
+        ordered = sorted(self.routes.items(), key=lambda item: item[1].cpu_total, reverse=True)
+        return {"pid": os.getpid(), "cpu_tracking": self.active, "routes": {name: s.to_dict() for name, s in ordered}}
+
+    def loop_stats(self) -> dict:
+        return {"pid": os.getpid(), "active": self.active, "threshold_ms": round(self.threshold * 1000, 1),
+                "blocked_total": self.blocked_total, "max_block_ms": round(self.max_block * 1000, 1),
+                "recent": list(self.blocked)}
+
+
+class RouteCPUMiddleware:
+    """ASGI middleware: CPU и время ответа по шаблону маршрута ('GET /prox/running')"""
+
+    def __init__(self, app, monitor: LoopMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        sample = RouteSample()
+        token = current_route.set(sample)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
+            cpu = self.monitor.close_sample(sample)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "<unmatched>"
+            self.monitor.add_route_sample(f"{scope['method']} {path}", cpu, time.perf_counter() - start)
+
+
+class Profiler:
+    """Снятие cProfile потока event loop по запросу. Одновременно выполняется только одно профилирование"""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        self._lock = asyncio.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    async def capture(self, seconds: float) -> cProfile.Profile:
+        if self.busy:
+            raise RuntimeError("Профилирование уже выполняется")
+        async with self._lock:
+            profile = cProfile.Profile()
+            self.logger.info(f"Снятие профиля на {seconds:g} с")
+            profile.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profile.disable()
+        profile.create_stats()
+        return profile
+
+    @staticmethod
+    def to_pstats(profile: cProfile.Profile) -> bytes:
+        """Содержимое файла .pstats (как Profile.dump_stats), открывается pstats.Stats / snakeviz"""
+        return marshal.dumps(profile.stats)
+
+    @staticmethod
+    def to_text(profile: cProfile.Profile, sort: str = "cumulative", limit: int = 50) -> str:
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+loop_monitor = LoopMonitor(logger, threshold=settings.LOOP_BLOCK_THRESHOLD)
+profiler = Profiler(logger)
@@ -3,6 +3,12 @@ from enum import Enum
 from typing import Any
 import json
 
+def json_default(value: Any) -> Any:
+    """default для json.dumps: объекты с to_dict сериализуются через него, остальное — str"""
+    to_dict = getattr(value, "to_dict", None)
+    return to_dict() if to_dict is not None else str(value)
+
+
 class ServiceStatus(str, Enum):
     success = "success"
     error = "error"
@@ -30,4 +36,4 @@ class ServiceResponse:
 
     def to_json(self) -> str:
         """Конвертируем в JSON"""
-        return json.dumps(self.to_dict(), ensure_ascii=False)
+        return json.dumps(self.to_dict(), ensure_ascii=False, default=json_default)
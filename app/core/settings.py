@@ -19,6 +19,7 @@ class Settings(BaseSettings):
     PROX_MAC: str
     PVE_HOST: str  # например
     PVE_HOST_IP: str
+    PVE_SSH_PORT: int = 22
     PVE_USER: str  #
     PVE_PASSWORD: str
     PVE_TOKEN: str  # chatbot
@@ -31,6 +32,11 @@ class Settings(BaseSettings):
     MIKROTIK_PASSWORD: str
 
 
+    # SSH гостевых VM (для массового выполнения команд, /fleet)
+    GUEST_SSH_USER: str | None = None
+    GUEST_SSH_PASSWORD: str | None = None
+    GUEST_SSH_PORT: int = 22
+
     # Application
     APP_NAME: str = "app"
     APP_VERSION: str = "0.1.0"
@@ -43,7 +49,57 @@ class Settings(BaseSettings):
     LOG_DIR: str = "logs"
     CONSOLE_OUTPUT: bool = True
     USE_JSON: bool = False
+    LOG_MAX_MESSAGE_BYTES: int = 8192   # длиннее — обрезается (0 — без обрезки)
+    LOG_RATE_LIMIT: float = 0.0         # записей в секунду на логгер ниже WARNING (0 — без ограничения)
+    LOG_RATE_BURST: int = 200           # допустимый всплеск сверх LOG_RATE_LIMIT
+    LOG_SAMPLE_EVERY: int = 100         # сверх лимита пишется каждая N-я запись
+    LOG_DEDUPLICATE: bool = False       # схлопывать подряд идущие одинаковые записи
+    LOG_QUERY_MAX_LIMIT: int = 5000     # максимум записей в одном ответе /api/logs
+    LOG_FOLLOW_INTERVAL: float = 1.0    # период опроса файла в /api/logs/follow, сек
+    LOG_INDEX_PRUNE_INTERVAL: float = 3600.0  # период удаления индексов ротированных и удалённых файлов (лидер), сек
+
+    # Storage
+    DATA_DIR: str = "data"              # локальные данные приложения (расписания и т.п.)
+    SHARED_STORE_PURGE_INTERVAL: float = 600.0  # период удаления просроченных записей shared_store (лидер), сек
+
+    # Fleet
+    FANOUT_CONCURRENCY: int = 16        # одновременных SSH-сессий при выполнении команды на многих хостах
+    FANOUT_TIMEOUT: float = 15.0        # таймаут на один хост, сек
+
+    # Shutdown: фазы выключения VM, JSON-список [{"name", "tags", "concurrency", "timeout", "stop_timeout"}]
+    # пусто — apps -> databases (db, database) -> infrastructure (storage, nas, router)
+    SHUTDOWN_PHASES: list[dict] = []
+
+    # Инвентарь VM (/prox/vms)
+    VM_STORE_TTL: float = 2.0           # период фонового перечитывания cluster/resources, сек
+
+    # Логи задач Proxmox (/prox/tasks/{upid}/log)
+    TASK_LOG_POLL_MIN: float = 0.5      # интервал опроса, пока появляются новые строки, сек
+    TASK_LOG_POLL_MAX: float = 5.0      # интервал опроса при отсутствии новых строк, сек
+    TASK_LOG_MAX_LINES: int = 20000     # строк лога одной задачи в памяти
+
+    # Вывод SSH-команд (/mikro/run_command, /prox/connect_ssh, /ssh/results)
+    SSH_COMMAND_TIMEOUT: float = 300.0              # жёсткий предел времени выполнения команды, сек
+    SSH_OUTPUT_MAX_BYTES: int = 256 * 1024 * 1024   # жёсткий предел вывода, дальше команда прерывается
+    SSH_INLINE_MAX_BYTES: int = 1024 * 1024         # больше — вывод уходит в файл (mode=auto) или обрезается (inline)
+    SSH_RESULT_COMPRESS: bool = True                # сохранять вывод в gzip
+    SSH_RESULT_TTL: float = 3600.0                  # время хранения сохранённого вывода, сек
+
+    # SFTP-передачи (/transfers)
+    TRANSFER_DIR: str | None = None     # локальный каталог для файлов передач; по умолчанию DATA_DIR/transfers
+    TRANSFER_BLOCK_SIZE: int = 256 * 1024   # размер блока SFTP-запроса, байт
+    TRANSFER_PIPELINE: int = 16         # запросов в полёте на один файл
+    TRANSFER_FILE_CONCURRENCY: int = 4  # файлов одного задания одновременно (по одному соединению)
+    TRANSFER_JOB_TTL: float = 7 * 24 * 3600  # время хранения записи задания, сек
+
+    # Health
+    HEALTH_PROBE_TIMEOUT: float = 2.0   # таймаут одной проверки зависимости, сек
+    HEALTH_CACHE_TTL: float = 5.0       # время жизни результата глубокой проверки, сек
 
+    # Admin / профилирование
+    ADMIN_TOKEN: str | None = None      # заголовок X-Admin-Token для /admin; не задан — /admin отключён
+    LOOP_BLOCK_THRESHOLD: float = 0.1   # callback дольше этого времени блокирует event loop — логируем стек, сек
+    PROFILE_MAX_SECONDS: int = 120      # максимальная длительность снятия cProfile, сек
 
     # API & Timezone
 
@@ -56,9 +112,15 @@ settings = Settings()
 # --- Инициализация логирования ---
 logger_config = LoggerConfig(
     log_file=f"{settings.APP_NAME}.log",
+    log_dir=settings.LOG_DIR,
     log_level=settings.LOG_LEVEL,
     console_output=settings.CONSOLE_OUTPUT,
     use_json=settings.USE_JSON,
+    max_message_bytes=settings.LOG_MAX_MESSAGE_BYTES,
+    rate_limit=settings.LOG_RATE_LIMIT,
+    rate_burst=settings.LOG_RATE_BURST,
+    sample_every=settings.LOG_SAMPLE_EVERY,
+    deduplicate=settings.LOG_DEDUPLICATE,
 )
 logger_config.setup_logger()
 logger = logger_config.get_logger(__name__)
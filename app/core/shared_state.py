@@ -0,0 +1,83 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from app.core.settings import settings
+import logging
+
+
+class SharedStore:
+    """Общее для всех воркеров key-value хранилище на SQLite в режиме WAL (локальный диск).
+    Значения — JSON, у записи может быть срок жизни. Соединение своё у каждого потока.
+    Используется для кешей, расписаний, записей задач и ключей идемпотентности."""
+
+    def __init__(self, path: str | Path, logger: logging.Logger | None = None):
+        self.path = Path(path)
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _expires(ttl: float | None) -> float | None:
+        return time.time() + ttl if ttl is not None else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._conn().execute("SELECT value, expires FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return default
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False, default=str), self._expires(ttl)),
+        )
+
+    def add(self, key: str, value: Any, ttl: float | None = None) -> bool:
+        """Атомарно записывает значение, только если ключа нет (или он истёк). True — если записали"""
+        cursor = self._conn().execute(
+            "INSERT INTO kv (key, value, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires "
+            "WHERE kv.expires IS NOT NULL AND kv.expires <= ?",
+            (key, json.dumps(value, ensure_ascii=False, default=str), self._expires(ttl), time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key: str) -> int:
+        """Атомарный счётчик (используется как версия данных)"""
+        row = self._conn().execute(
+            "INSERT INTO kv (key, value, expires) VALUES (?, '1', NULL) "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1 RETURNING value",
+            (key,),
+        ).fetchone()
+        return int(row[0])
+
+    def delete(self, key: str) -> bool:
+        return self._conn().execute("DELETE FROM kv WHERE key = ?", (key,)).rowcount > 0
+
+    def items(self, prefix: str) -> dict[str, Any]:
+        """Все живые записи с ключом, начинающимся на prefix"""
+        rows = self._conn().execute(
+            "SELECT key, value FROM kv WHERE key >= ? AND key < ? AND (expires IS NULL OR expires > ?)",
+            (prefix, prefix + "\uffff", time.time()),
+        ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def purge_expired(self) -> int:
+        """Удаляет просроченные записи (get их уже не видит, но строки занимают место). Возвращает их число"""
+        return self._conn().execute("DELETE FROM kv WHERE expires IS NOT NULL AND expires <= ?", (time.time(),)).rowcount
+
+
+shared_store = SharedStore(Path(settings.DATA_DIR) / "shared.sqlite3")
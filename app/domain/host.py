@@ -0,0 +1,19 @@
+# domain/host.py
+from dataclasses import dataclass, field
+from typing import Literal
+
+HostKind = Literal["pve", "router", "guest"]
+
+
+@dataclass
+class Host:
+    """Хост, на котором можно выполнить команду по SSH"""
+    name: str
+    address: str
+    kind: HostKind
+    username: str
+    password: str = field(repr=False)
+    port: int = 22
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "address": self.address, "kind": self.kind, "port": self.port}
@@ -0,0 +1,139 @@
+# domain/schedule.py
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, tzinfo
+from enum import Enum
+import uuid
+
+
+class MisfirePolicy(str, Enum):
+    skip = "skip"           # пропущенный запуск не выполняется, ждём следующего по расписанию
+    run_once = "run_once"   # после простоя выполняем один раз (если опоздали не больше misfire_grace)
+
+
+class CronExpression:
+    """Cron-выражение из 5 полей: минута час день_месяца месяц день_недели.
+    Поддерживаются *, списки (1,5), диапазоны (1-5) и шаг (*/15, 1-10/2). День недели 0-7 (0 и 7 — воскресенье)."""
+
+    FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+
+    def __init__(self, expression: str):
+        self.expression = " ".join(expression.split())
+        parts = self.expression.split(" ")
+        if len(parts) != 5:
+            raise ValueError(f"Cron-выражение должно состоять из 5 полей: '{expression}'")
+        values = [self._parse_field(part, low, high) for part, (_, low, high) in zip(parts, self.FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = values
+        self.weekdays = {0 if d == 7 else d for d in weekdays}  # 0 — воскресенье
+        # как в cron: если ограничены и день месяца, и день недели — достаточно совпадения любого
+        self.day_any = parts[2] == "*"
+        self.weekday_any = parts[4] == "*"
+        self._sorted_hours = sorted(self.hours)
+        self._sorted_minutes = sorted(self.minutes)
+
+    @staticmethod
+    def _parse_field(part: str, low: int, high: int) -> set[int]:
+        result: set[int] = set()
+        for item in part.split(","):
+            step = 1
+            if "/" in item:
+                item, step_raw = item.split("/", 1)
+                step = int(step_raw)
+                if step < 1:
+                    raise ValueError(f"Некорректный шаг в cron: '{part}'")
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start, end = (int(x) for x in item.split("-", 1))
+            else:
+                start = end = int(item)
+                if step > 1:
+                    end = high
+            if start < low or end > high or start > end:
+                raise ValueError(f"Значение вне диапазона {low}-{high} в cron: '{part}'")
+            result.update(range(start, end + 1, step))
+        return result
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        day_ok = day.day in self.days
+        weekday_ok = (day.isoweekday() % 7) in self.weekdays
+        if self.day_any and self.weekday_any:
+            return True
+        if self.day_any:
+            return weekday_ok
+        if self.weekday_any:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime, tz: tzinfo) -> datetime | None:
+        """Ближайшее время срабатывания строго после moment (в часовом поясе tz)"""
+        start = moment.astimezone(tz).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0, tzinfo=None)
+        for offset in range(366 * 5):  # 29 февраля может быть раз в 4 года
+            current = day + timedelta(days=offset)
+            if not self._day_matches(current):
+                continue
+            first_day = offset == 0
+            for hour in self._sorted_hours:
+                if first_day and hour < start.hour:
+                    continue
+                for minute in self._sorted_minutes:
+                    if first_day and hour == start.hour and minute < start.minute:
+                        continue
+                    return current.replace(hour=hour, minute=minute, tzinfo=tz)
+        return None
+
+    def __repr__(self):
+        return f"<CronExpression '{self.expression}'>"
+
+
+@dataclass
+class Schedule:
+    """Запись расписания: периодическая (cron) или разовая (run_at)"""
+    action: str
+    name: str = ""
+    cron: str | None = None
+    run_at: float | None = None         # unix timestamp разового запуска
+    enabled: bool = True
+    misfire_policy: MisfirePolicy = MisfirePolicy.run_once
+    misfire_grace: int = 900            # допустимое опоздание для run_once, сек
+    params: dict = field(default_factory=dict)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    created_at: float | None = None
+    last_run: float | None = None
+    last_status: str | None = None
+    last_error: str | None = None
+    next_run: float | None = None
+
+    def __post_init__(self):
+        if not self.cron and self.run_at is None:
+            raise ValueError("Нужно указать cron или run_at")
+        if self.cron and self.run_at is not None:
+            raise ValueError("Нужно указать что-то одно: cron или run_at")
+        self.misfire_policy = MisfirePolicy(self.misfire_policy)
+        self._cron = CronExpression(self.cron) if self.cron else None
+
+    @property
+    def one_shot(self) -> bool:
+        return self._cron is None
+
+    def next_fire(self, after: datetime, tz: tzinfo) -> float | None:
+        """Следующее срабатывание после after (unix timestamp)"""
+        if self._cron is None:
+            return self.run_at if self.last_run is None else None
+        nxt = self._cron.next_after(after, tz)
+        return nxt.timestamp() if nxt else None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["misfire_policy"] = self.misfire_policy.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Schedule":
+        fields = cls.__dataclass_fields__
+        data = {k: v for k, v in data.items() if k in fields}
+        if data.get("cron"):
+            data["run_at"] = None  # записи, сохранённые до запрета cron + run_at: run_at и раньше не действовал
+        return cls(**data)
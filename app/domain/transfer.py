@@ -0,0 +1,107 @@
+# domain/transfer.py
+from dataclasses import dataclass, field, asdict
+from enum import Enum
+import time
+import uuid
+
+
+class TransferDirection(str, Enum):
+    download = "download"   # удалённый хост -> TRANSFER_DIR
+    upload = "upload"       # TRANSFER_DIR -> удалённый хост
+
+
+class TransferStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+def _throughput(transferred: int, started: float | None, finished: float | None) -> float | None:
+    if started is None:
+        return None
+    elapsed = (finished or time.time()) - started
+    return round(transferred / elapsed) if elapsed > 0 else None
+
+
+@dataclass
+class TransferFile:
+    """Один файл задания. local — путь относительно TRANSFER_DIR"""
+    remote: str
+    local: str
+    status: TransferStatus = TransferStatus.pending
+    size: int | None = None
+    mtime: int | None = None        # источника; если size/mtime изменились, докачка начинается заново
+    done_bytes: int = 0             # непрерывно переданное начало файла
+    resumed_from: int = 0           # с какого байта продолжен текущий запуск
+    sha256: str | None = None
+    error: str | None = None
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    def __post_init__(self):
+        self.status = TransferStatus(self.status)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["status"] = self.status.value
+        data["throughput"] = _throughput(self.done_bytes - self.resumed_from, self.started_at, self.finished_at)
+        return data
+
+
+@dataclass
+class TransferJob:
+    """Задание SFTP-передачи: несколько файлов по одному соединению с target"""
+    target: str
+    direction: TransferDirection
+    files: list[TransferFile]
+    status: TransferStatus = TransferStatus.pending
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    updated_at: float | None = None     # последнее сохранение прогресса
+    error: str | None = None
+
+    def __post_init__(self):
+        self.direction = TransferDirection(self.direction)
+        self.status = TransferStatus(self.status)
+        self.files = [f if isinstance(f, TransferFile) else TransferFile(**f) for f in self.files]
+
+    @property
+    def active(self) -> bool:
+        return self.status in (TransferStatus.pending, TransferStatus.running)
+
+    def mark_cancelled(self) -> None:
+        self.status = TransferStatus.cancelled
+        for item in self.files:
+            if item.status in (TransferStatus.pending, TransferStatus.running):
+                item.status = TransferStatus.cancelled
+
+    def to_dict(self) -> dict:
+        files = [f.to_dict() for f in self.files]
+        transferred = sum(f.done_bytes - f.resumed_from for f in self.files)
+        return {
+            "id": self.id,
+            "target": self.target,
+            "direction": self.direction.value,
+            "status": self.status.value,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "updated_at": self.updated_at,
+            "error": self.error,
+            "bytes_total": sum(f.size or 0 for f in self.files),
+            "bytes_done": sum(f.done_bytes for f in self.files),
+            "throughput": _throughput(transferred, self.started_at, self.finished_at),
+            "files": files,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TransferJob":
+        fields = cls.__dataclass_fields__
+        job = cls(**{k: v for k, v in data.items() if k in fields and k != "files"}, files=[])
+        file_fields = TransferFile.__dataclass_fields__
+        job.files = [TransferFile(**{k: v for k, v in f.items() if k in file_fields}) for f in data.get("files", [])]
+        return job
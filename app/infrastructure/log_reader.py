@@ -0,0 +1,410 @@
+# infrastructure/log_reader.py
+import json
+import mmap
+import os
+import re
+import tempfile
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+import logging
+
+# Текстовый формат: "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+TEXT_LINE_RE = re.compile(rb"^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) - ([A-Z]+) - (\S+) - (.*)$", re.DOTALL)
+# JsonFormatter всегда пишет timestamp первым полем — достаём его без json.loads
+JSON_TS_RE = re.compile(rb'"timestamp": "([^"]+)"')
+
+INDEX_DIR_NAME = ".index"
+
+
+def _parse_text_ts(value: bytes) -> float | None:
+    """asctime пишется в локальном времени без зоны"""
+    try:
+        return datetime.strptime(value.decode(), "%Y-%m-%d %H:%M:%S,%f").timestamp()
+    except ValueError:
+        return None
+
+
+def _parse_json_ts(value: bytes | str) -> float | None:
+    """timestamp JsonFormatter-а всегда в UTC"""
+    if isinstance(value, bytes):
+        value = value.decode()
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def reverse_lines(path: Path, end: int | None = None) -> Iterator[tuple[int, bytes]]:
+    """Построчное чтение файла с конца через mmap. Возвращает (offset, line).
+    Незавершённая последняя строка (файл ещё пишется) пропускается."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = size if end is None else min(end, size)
+            pos = mm.rfind(b"\n", 0, end)
+            while pos >= 0:
+                nl = mm.rfind(b"\n", 0, pos)
+                start = nl + 1
+                if start < pos:
+                    yield start, mm[start:pos]
+                pos = nl
+
+
+def forward_lines(path: Path, start: int = 0) -> Iterator[tuple[int, bytes]]:
+    """Построчное чтение файла от смещения start через mmap. Возвращает (offset, line)."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0 or start >= size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = start
+            while True:
+                nl = mm.find(b"\n", pos)
+                if nl == -1:
+                    break
+                if nl > pos:
+                    yield pos, mm[pos:nl]
+                pos = nl + 1
+
+
+@dataclass
+class LogQuery:
+    """Фильтры для выборки логов. since/until — unix timestamp"""
+    levels: frozenset[str] | None = None
+    module: str | None = None
+    trace_id: str | None = None
+    since: float | None = None
+    until: float | None = None
+
+    def prefilter(self, line: bytes) -> bool:
+        """Дешёвая проверка по сырым байтам до разбора строки"""
+        if self.trace_id and self.trace_id.encode() not in line:
+            return False
+        if self.module and self.module.encode() not in line:
+            return False
+        if self.levels and not any(level.encode() in line for level in self.levels):
+            return False
+        return True
+
+    def match(self, record: dict) -> bool:
+        if self.levels and record.get("level") not in self.levels:
+            return False
+        if self.module and not str(record.get("module", "")).startswith(self.module):
+            return False
+        if self.trace_id and record.get("trace_id") != self.trace_id and self.trace_id not in str(record.get("message") or ""):
+            return False
+        ts = record.get("ts")
+        if self.since is not None and (ts is None or ts < self.since):
+            return False
+        if self.until is not None and (ts is None or ts > self.until):
+            return False
+        return True
+
+
+class LogLineParser:
+    """Разбор строк лога в зависимости от формата (text | json)"""
+
+    def __init__(self, use_json: bool):
+        self.use_json = use_json
+
+    def timestamp(self, line: bytes) -> float | None:
+        """Быстрое извлечение времени записи без полного разбора"""
+        if self.use_json:
+            m = JSON_TS_RE.search(line, 0, 64)
+            return _parse_json_ts(m.group(1)) if m else None
+        m = TEXT_LINE_RE.match(line)
+        return _parse_text_ts(m.group(1)) if m else None
+
+    def parse(self, line: bytes) -> dict | None:
+        """Разбор строки в запись. None — строка-продолжение (например, трассировка в текстовом формате)"""
+        if self.use_json:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return None
+            if not isinstance(record, dict) or "timestamp" not in record:
+                return None
+            record["ts"] = _parse_json_ts(str(record["timestamp"]))
+            return record
+        m = TEXT_LINE_RE.match(line)
+        if not m:
+            return None
+        ts_raw, level, module, message = m.groups()
+        return {
+            "timestamp": ts_raw.decode(),
+            "ts": _parse_text_ts(ts_raw),
+            "level": level.decode(),
+            "module": module.decode(errors="replace"),
+            "message": message.decode(errors="replace"),
+        }
+
+
+class LogIndex:
+    """Разреженный индекс (timestamp -> offset) рядом с файлом лога.
+    Строится выборкой строки на каждые step байт, без полного чтения файла."""
+
+    def __init__(self, log_path: Path, parser: LogLineParser, step: int = 256 * 1024):
+        self.log_path = log_path
+        self.parser = parser
+        self.step = step
+        self.index_path = log_path.parent / INDEX_DIR_NAME / f"{log_path.name}.idx"
+        self.size = 0
+        self.inode = 0
+        self.entries: list[tuple[float, int]] = []
+        self._keys: list[float] = []
+
+    def load(self) -> "LogIndex":
+        """Загружает индекс с диска и достраивает его, если файл вырос"""
+        try:
+            stat = self.log_path.stat()
+        except FileNotFoundError:
+            self.size, self.entries, self._keys = 0, [], []
+            return self
+        cached = self._read()
+        self.inode = stat.st_ino
+        # индекс невалиден, если файл подменили ротацией (другой inode) или он стал короче
+        if cached and cached.get("step") == self.step and cached.get("inode") == stat.st_ino \
+                and cached.get("size", 0) <= stat.st_size:
+            self.size = cached["size"]
+            self.entries = [tuple(e) for e in cached.get("entries", [])]
+        else:
+            self.size, self.entries = 0, []
+        if stat.st_size != self.size:
+            self._extend(stat.st_size)
+            self._write()
+        self._keys = [ts for ts, _ in self.entries]
+        return self
+
+    def _read(self) -> dict | None:
+        try:
+            return json.loads(self.index_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        # у каждого писателя свой временный файл: параллельные перестроения индекса не портят друг другу запись
+        with tempfile.NamedTemporaryFile("w", dir=self.index_path.parent, prefix=self.index_path.name,
+                                         suffix=".tmp", delete=False) as tmp:
+            tmp.write(json.dumps({"step": self.step, "inode": self.inode, "size": self.size, "entries": self.entries}))
+        try:
+            os.replace(tmp.name, self.index_path)
+        except OSError:
+            os.unlink(tmp.name)
+            raise
+
+    def _extend(self, size: int) -> None:
+        """Добавляет точки для новой части файла: прыжок на step байт, начало следующей строки"""
+        with open(self.log_path, "rb") as f:
+            if size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = min(size, len(mm))
+                mark = self.entries[-1][1] + self.step if self.entries else 0
+                while mark < size:
+                    start = 0 if mark == 0 else mm.find(b"\n", mark - 1, size) + 1
+                    if start <= 0 and mark != 0:
+                        break
+                    end = mm.find(b"\n", start, size)
+                    if end == -1:
+                        break
+                    ts = self.parser.timestamp(mm[start:end])
+                    if ts is not None:
+                        self.entries.append((ts, start))
+                    mark = max(start, mark) + self.step
+        self.size = size
+
+    def start_offset(self, since: float | None) -> int:
+        """Смещение, с которого можно начинать прямое чтение для since"""
+        if since is None or not self.entries:
+            return 0
+        pos = bisect_left(self._keys, since) - 1
+        return self.entries[pos][1] if pos >= 0 else 0
+
+    def end_offset(self, until: float | None) -> int | None:
+        """Смещение, до которого можно читать с конца для until"""
+        if until is None or not self.entries:
+            return None
+        pos = bisect_right(self._keys, until)
+        return self.entries[pos][1] if pos < len(self.entries) else None
+
+    def first_ts(self) -> float | None:
+        return self.entries[0][0] if self.entries else None
+
+
+class LogReader:
+    """Чтение активного и ротированных файлов лога (app.log, app.YYYY-MM-DD.log)"""
+
+    def __init__(self, log_path: Path, use_json: bool, logger: logging.Logger | None = None):
+        self.log_path = Path(log_path)
+        self.parser = LogLineParser(use_json)
+        self.use_json = use_json
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+
+    def files(self) -> list[Path]:
+        """Файлы логов от самого нового к самому старому"""
+        stem, ext = self.log_path.stem, self.log_path.suffix
+        rotated = sorted(self.log_path.parent.glob(f"{stem}.*{ext}"), reverse=True)
+        rotated = [p for p in rotated if p != self.log_path]
+        files = [self.log_path] if self.log_path.exists() else []
+        return files + rotated
+
+    def _index(self, path: Path) -> LogIndex | None:
+        """Индекс используется только для json логов"""
+        if not self.use_json:
+            return None
+        try:
+            return LogIndex(path, self.parser).load()
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Не удалось построить индекс для {path}: {e}")
+            return None
+
+    def prune_indexes(self) -> int:
+        """Удаляет индексы файлов, которые уже удалены ротацией. Возвращает их число"""
+        index_dir = self.log_path.parent / INDEX_DIR_NAME
+        if not index_dir.is_dir():
+            return 0
+        removed = 0
+        for idx in index_dir.glob("*.idx"):
+            if not (self.log_path.parent / idx.stem).exists():
+                idx.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def tail(self, query: LogQuery, limit: int) -> list[dict]:
+        """Последние limit записей (в хронологическом порядке)"""
+        records: list[dict] = []
+        for path in self.files():
+            # индекс нужен только для until; без него построение/дописывание .idx — лишняя работа на каждый запрос
+            index = self._index(path) if query.until is not None else None
+            end = index.end_offset(query.until) if index else None
+            for record in self._scan_reverse(path, query, end):
+                if query.since is not None and record.get("ts") is not None and record["ts"] < query.since:
+                    return records[::-1]  # дальше только более старые записи
+                if query.match(record):
+                    records.append(record)
+                    if len(records) >= limit:
+                        return records[::-1]
+        return records[::-1]
+
+    def range(self, query: LogQuery, limit: int) -> list[dict]:
+        """Первые limit записей начиная с since (в хронологическом порядке)"""
+        records: list[dict] = []
+        for path in reversed(self.files()):
+            if query.since is not None:
+                last_ts = self._last_ts(path)
+                if last_ts is not None and last_ts < query.since:
+                    continue  # файл целиком старше since
+            index = self._index(path) if query.since is not None or query.until is not None else None
+            if query.until is not None and index and index.first_ts() is not None and index.first_ts() > query.until:
+                break
+            start = index.start_offset(query.since) if index else 0
+            for record in self._scan_forward(path, query, start):
+                if query.until is not None and record.get("ts") is not None and record["ts"] > query.until:
+                    return records
+                if query.match(record):
+                    records.append(record)
+                    if len(records) >= limit:
+                        return records
+        return records
+
+    def _last_ts(self, path: Path) -> float | None:
+        for _, line in reverse_lines(path):
+            ts = self.parser.timestamp(line)
+            if ts is not None:
+                return ts
+        return None
+
+    def _scan_reverse(self, path: Path, query: LogQuery, end: int | None = None) -> Iterator[dict]:
+        """Обратный проход. Строки-продолжения приклеиваются к ближайшей записи выше"""
+        pending: list[bytes] = []
+        for _, line in reverse_lines(path, end):
+            if not self.use_json and not TEXT_LINE_RE.match(line):
+                pending.append(line)
+                continue
+            continuation, pending = pending, []
+            if not query.prefilter(line):
+                # время всё равно нужно, чтобы корректно остановиться по since
+                ts = self.parser.timestamp(line)
+                if ts is not None and query.since is not None and ts < query.since:
+                    yield {"ts": ts}
+                    return
+                continue
+            record = self.parser.parse(line)
+            if record is None:
+                continue
+            if continuation:
+                record["message"] = "\n".join([record.get("message", "")] + [c.decode(errors="replace") for c in reversed(continuation)])
+            yield record
+
+    def _scan_forward(self, path: Path, query: LogQuery, start: int = 0) -> Iterator[dict]:
+        """Прямой проход от смещения start"""
+        current: dict | None = None
+        for _, line in forward_lines(path, start):
+            if not self.use_json and not TEXT_LINE_RE.match(line):
+                if current is not None:
+                    current["message"] = f"{current.get('message', '')}\n{line.decode(errors='replace')}"
+                continue
+            if current is not None:
+                yield current
+                current = None
+            if not query.prefilter(line):
+                ts = self.parser.timestamp(line)
+                if ts is not None and query.until is not None and ts > query.until:
+                    yield {"ts": ts}
+                    return
+                continue
+            current = self.parser.parse(line)
+        if current is not None:
+            yield current
+
+    def follow_from_end(self) -> tuple[int, int]:
+        """Текущая позиция (inode, size) активного файла для follow"""
+        try:
+            stat = self.log_path.stat()
+            return stat.st_ino, stat.st_size
+        except FileNotFoundError:
+            return 0, 0
+
+    def read_new(self, inode: int, pos: int, query: LogQuery, max_bytes: int = 1024 * 1024) -> tuple[int, int, list[dict]]:
+        """Читает дописанные с позиции pos строки активного файла.
+        При ротации (сменился inode или файл стал короче) начинает новый файл с начала."""
+        try:
+            stat = self.log_path.stat()
+        except FileNotFoundError:
+            return inode, pos, []
+        if stat.st_ino != inode or stat.st_size < pos:
+            inode, pos = stat.st_ino, 0
+        if stat.st_size == pos:
+            return inode, pos, []
+        with open(self.log_path, "rb") as f:
+            f.seek(pos)
+            chunk = f.read(min(stat.st_size - pos, max_bytes))
+        end = chunk.rfind(b"\n")
+        next_pos = pos + end + 1
+        if end == -1:
+            if len(chunk) < max_bytes:
+                return inode, pos, []  # строка ещё дописывается
+            # строка длиннее max_bytes: разбираем её начало и идём дальше, остаток пропустится как продолжение
+            end = len(chunk)
+            next_pos = pos + end
+        records: list[dict] = []
+        current: dict | None = None  # последняя подходящая запись, к ней клеятся продолжения
+        for line in chunk[:end].split(b"\n"):
+            if not line:
+                continue
+            if not self.use_json and not TEXT_LINE_RE.match(line):
+                if current is not None:
+                    current["message"] = f"{current.get('message', '')}\n{line.decode(errors='replace')}"
+                continue
+            current = self.parser.parse(line) if query.prefilter(line) else None
+            if current is not None and not query.match(current):
+                current = None
+            if current is not None:
+                records.append(current)
+        return inode, next_pos, records
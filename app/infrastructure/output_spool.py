@@ -0,0 +1,81 @@
+# infrastructure/output_spool.py
+import asyncio
+import gzip
+from pathlib import Path
+
+WRITE_CHUNK = 256 * 1024    # после переноса на диск пишем пачками не меньше этого размера
+COMPRESS_LEVEL = 6
+
+
+class OutputSpool:
+    """Приёмник вывода команды: до threshold байт держит в памяти, дальше переносит всё во временный файл
+    (опционально gzip) и пишет туда пачками из пула потоков. В памяти остаются только буфер
+    до WRITE_CHUNK и первые head_bytes байт для предпросмотра.
+    Сжатый файл — последовательность независимых gzip-членов, по одному на пачку (для gzip/zcat это обычный
+    .gz). index — пары (смещение в выводе, смещение в файле) начала каждого члена: чтение с произвольного
+    места распаковывает не больше одной пачки, а не весь файл с начала."""
+
+    def __init__(self, path: Path, threshold: int, compress: bool = False, head_bytes: int = 4096):
+        self.path = path
+        self.threshold = threshold
+        self.compress = compress
+        self.head_bytes = head_bytes
+        self.size = 0
+        self.head = bytearray()
+        self._buffer = bytearray()
+        self._file = None
+        self._written = 0
+        self.index: list[tuple[int, int]] = []
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    async def write(self, data: bytes) -> None:
+        self.size += len(data)
+        if len(self.head) < self.head_bytes:
+            self.head.extend(data[:self.head_bytes - len(self.head)])
+        self._buffer.extend(data)
+        if self._file is None and len(self._buffer) <= self.threshold:
+            return
+        if self._file is None or len(self._buffer) >= WRITE_CHUNK:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        data, self._buffer = bytes(self._buffer), bytearray()
+        await asyncio.to_thread(self._write_sync, data)
+
+    def _write_sync(self, data: bytes) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "wb")
+        if not data:
+            return
+        if self.compress:
+            self.index.append((self._written, self._file.tell()))
+            self._written += len(data)
+            data = gzip.compress(data, compresslevel=COMPRESS_LEVEL)
+        self._file.write(data)
+
+    def _close_sync(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def getvalue(self) -> bytes:
+        """Вывод целиком — только пока он не перенесён на диск"""
+        if self.spilled:
+            raise RuntimeError("Вывод перенесён на диск")
+        return bytes(self._buffer)
+
+    async def persist(self) -> None:
+        """Дописывает остаток буфера и закрывает файл. Вывод сохраняется, даже если порог не превышен"""
+        data, self._buffer = bytes(self._buffer), bytearray()
+        await asyncio.to_thread(self._write_sync, data)
+        await asyncio.to_thread(self._close_sync)
+
+    async def discard(self) -> None:
+        """Освобождает буфер и удаляет файл, если он был создан"""
+        self._buffer = bytearray()
+        if self._file is not None:
+            await asyncio.to_thread(self._close_sync)
+            self.path.unlink(missing_ok=True)
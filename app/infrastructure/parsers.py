@@ -0,0 +1,66 @@
+# infrastructure/parsers.py
+import re
+
+# ключ RouterOS: name=, mac-address=, host-name=, .id=
+ROUTEROS_KEY_RE = re.compile(r"(?:^|\s)([.a-z][\w.-]*)=")
+
+
+def convert_value(value: str):
+    """Число, если строка похожа на число (в т.ч. '11.59%'), иначе строка как есть"""
+    if value.endswith("%"):
+        number = convert_value(value[:-1])
+        return number if not isinstance(number, str) else value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def parse_routeros_terse(lines: list[str]) -> list[dict]:
+    """Разбор вывода RouterOS `print terse`: `0  R name=ether1 type=ether comment=с пробелами`.
+    Значение ключа — всё до следующего ` ключ=`, поэтому пробелы в значениях не ломают разбор."""
+    records: list[dict] = []
+    for line in lines:
+        matches = list(ROUTEROS_KEY_RE.finditer(line))
+        if not matches:
+            continue
+        prefix = line[:matches[0].start()].split()
+        record: dict = {}
+        if prefix and prefix[0].isdigit():
+            record["index"] = int(prefix[0])
+            prefix = prefix[1:]
+        record["flags"] = "".join(prefix)
+        for i, m in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(line)
+            value = line[m.end():end].strip()
+            if len(value) >= 2 and value[0] == value[-1] == '"':
+                value = value[1:-1]
+            record[m.group(1)] = convert_value(value)
+        records.append(record)
+    return records
+
+
+def _column_name(header: str) -> str:
+    """MEM(MB) -> mem_mb, BOOTDISK(GB) -> bootdisk_gb, % -> percent"""
+    name = header.lower().replace("%", "percent").replace("(", "_").replace(")", "")
+    return re.sub(r"[^\w]+", "_", name).strip("_")
+
+
+def parse_table(lines: list[str]) -> list[dict]:
+    """Разбор табличного вывода с заголовком (qm list, pvesm status).
+    Колонки разделены пробелами; последняя колонка забирает остаток строки."""
+    rows = [line for line in lines if line.strip()]
+    if not rows:
+        return []
+    columns = [_column_name(h) for h in rows[0].split()]
+    records: list[dict] = []
+    for row in rows[1:]:
+        values = row.split(None, len(columns) - 1)
+        if len(values) < len(columns):
+            values += [""] * (len(columns) - len(values))
+        records.append({column: convert_value(value) for column, value in zip(columns, values)})
+    return records
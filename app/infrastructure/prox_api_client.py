@@ -6,7 +6,10 @@ import logging
 logger = logging.getLogger(__name__)
 
 class ProxmoxAPIClient:
-    """Асинхронная обертка над REST API Proxmox с использованием AsyncHttpClient"""
+    """Асинхронная обертка над REST API Proxmox с использованием AsyncHttpClient.
+    Все экземпляры используют один пул соединений на процесс (keep-alive, без TLS-рукопожатия на каждый запрос)"""
+    _pool: AsyncHttpClient | None = None
+    _pool_loop: asyncio.AbstractEventLoop | None = None
 
     def __init__(self, logger=None):
         self.host = settings.PVE_HOST
@@ -15,9 +18,36 @@ class ProxmoxAPIClient:
         self.logger = logging.getLogger(self.__class__.__name__)
 
 
+    async def _get_pool(self) -> AsyncHttpClient:
+        """Общий клиент; пересоздаётся, если закрыт или создан в другом event loop"""
+        cls = ProxmoxAPIClient
+        loop = asyncio.get_running_loop()
+        pool = cls._pool
+        if pool is None or cls._pool_loop is not loop or pool.session is None or pool.session.closed:
+            pool = AsyncHttpClient(url=self.host, headers=self.headers, verify_ssl=False)
+            cls._pool, cls._pool_loop = pool, loop
+            await pool._ensure_session()
+        return pool
+
+    @classmethod
+    async def close_pool(cls) -> None:
+        """Закрытие общего пула (при остановке приложения)"""
+        if cls._pool is not None:
+            await cls._pool.close()
+            cls._pool, cls._pool_loop = None, None
+
     async def request_async(self, request: RequestFormat) -> ResponseFormat:
-        async with AsyncHttpClient(url=self.host, headers=self.headers, verify_ssl=False) as client:
-            return await client.request_async(request)
+        client = await self._get_pool()
+        return await client.request_async(request)
+
+    async def ping(self, timeout: float = 2.0) -> str:
+        """Быстрая проверка доступности API (без повторных попыток). Возвращает версию Proxmox"""
+        request = RequestFormat(method="GET", endpoint="/api2/json/version")
+        async with AsyncHttpClient(url=self.host, headers=self.headers, timeout=timeout, max_retries=0, verify_ssl=False) as client:
+            response: ResponseFormat = await client.request_async(request)
+        if response.success and isinstance(response.data, dict):
+            return (response.data.get("data") or {}).get("version", "")
+        raise Exception(f"[ProxmoxAPIClient.ping] Proxmox API недоступен: {response.error or response.status}")
 
     async def get_vms(self):
         """Получение списка всех VM"""
@@ -28,30 +58,71 @@ class ProxmoxAPIClient:
         else:
             raise Exception(f"[ProxmoxAPIClient.get_vms] Ошибка получения VM: {response.error or response.data}")
 
-    async def start_vm(self, vmid: int, node: str) -> bool:
-        """Запуск конкретной VM"""
-        request = RequestFormat(method="POST", endpoint=f"/api2/json/nodes/{node}/qemu/{vmid}/status/start")
+    async def get_cluster_nodes(self) -> list[dict]:
+        """Узлы кластера с IP-адресами (cluster/status, записи type=node)"""
+        request = RequestFormat(method="GET", endpoint="/api2/json/cluster/status")
+        response: ResponseFormat = await self.request_async(request)
+        if response.success and isinstance(response.data, dict):
+            return [item for item in response.data.get("data", []) if item.get("type") == "node"]
+        raise Exception(f"[ProxmoxAPIClient.get_cluster_nodes] Ошибка получения узлов: {response.error or response.data}")
+
+    async def get_guest_interfaces(self, vmid: int, node: str) -> list[dict]:
+        """Сетевые интерфейсы VM через qemu guest agent"""
+        request = RequestFormat(method="GET", endpoint=f"/api2/json/nodes/{node}/qemu/{vmid}/agent/network-get-interfaces")
+        response: ResponseFormat = await self.request_async(request)
+        if response.success and isinstance(response.data, dict):
+            return (response.data.get("data") or {}).get("result", [])
+        raise Exception(f"[ProxmoxAPIClient.get_guest_interfaces] Guest agent VM {vmid} недоступен: {response.error or response.data}")
+
+    async def start_vm(self, vmid: int, node: str, kind: str = "qemu") -> bool:
+        """Запуск конкретной VM (kind: qemu | lxc)"""
+        request = RequestFormat(method="POST", endpoint=f"/api2/json/nodes/{node}/{kind}/{vmid}/status/start")
         response: ResponseFormat = await self.request_async(request)
         if not response.success:
             raise Exception(f"[ProxmoxAPIClient.start_vm] Не удалось запустить VM {vmid} на узле {node}")
         return True
 
-    async def shutdown_vm(self, vmid: int, node: str) -> bool:
-        """Выключение конкретной VM"""
-        request = RequestFormat(method="POST", endpoint=f"/api2/json/nodes/{node}/qemu/{vmid}/status/shutdown")
+    async def shutdown_vm(self, vmid: int, node: str, kind: str = "qemu") -> bool:
+        """Корректное выключение конкретной VM (ACPI / guest agent)"""
+        request = RequestFormat(method="POST", endpoint=f"/api2/json/nodes/{node}/{kind}/{vmid}/status/shutdown")
         response: ResponseFormat = await self.request_async(request)
         if not response.success:
             raise Exception(f"[ProxmoxAPIClient.shutdown_vm] Не удалось выключить VM {vmid} на узле {node}")
         return True
 
+    async def stop_vm(self, vmid: int, node: str, kind: str = "qemu") -> bool:
+        """Принудительная остановка VM (аналог выдёргивания питания)"""
+        request = RequestFormat(method="POST", endpoint=f"/api2/json/nodes/{node}/{kind}/{vmid}/status/stop")
+        response: ResponseFormat = await self.request_async(request)
+        if not response.success:
+            raise Exception(f"[ProxmoxAPIClient.stop_vm] Не удалось остановить VM {vmid} на узле {node}")
+        return True
+
     async def shutdown_server(self, node_name: str = "pve") -> bool:
         """Выключение Proxmox сервера"""
-        request = RequestFormat(method="POST", endpoint=f"/api2/json/nodes/{node_name}/status/shutdown")
+        request = RequestFormat(method="POST", endpoint=f"/api2/json/nodes/{node_name}/status", json={"command": "shutdown"})
         response: ResponseFormat = await self.request_async(request)
         if not response.success:
             raise Exception(f"[ProxmoxAPIClient.shutdown_server] Не удалось выключить сервер {node_name}")
         return True
 
+    async def get_task_log(self, upid: str, node: str, start: int = 0, limit: int = 500) -> tuple[list[dict], int | None]:
+        """Строки лога задачи начиная со смещения start: ([{"n": номер, "t": текст}], всего строк)"""
+        request = RequestFormat(method="GET", endpoint=f"/api2/json/nodes/{node}/tasks/{upid}/log",
+                                params={"start": start, "limit": limit})
+        response: ResponseFormat = await self.request_async(request)
+        if response.success and isinstance(response.data, dict):
+            return response.data.get("data") or [], response.data.get("total")
+        raise Exception(f"[ProxmoxAPIClient.get_task_log] Ошибка получения лога задачи {upid}: {response.error or response.data}")
+
+    async def get_task_status(self, upid: str, node: str) -> dict:
+        """Статус задачи: status (running | stopped), exitstatus (OK или текст ошибки)"""
+        request = RequestFormat(method="GET", endpoint=f"/api2/json/nodes/{node}/tasks/{upid}/status")
+        response: ResponseFormat = await self.request_async(request)
+        if response.success and isinstance(response.data, dict):
+            return response.data.get("data") or {}
+        raise Exception(f"[ProxmoxAPIClient.get_task_status] Ошибка получения статуса задачи {upid}: {response.error or response.data}")
+
     async def run_ssh_command(self, command: str):
         """Выполнение произвольной команды на Proxmox через SSH"""
         try:
@@ -59,7 +130,8 @@ class ProxmoxAPIClient:
                     host=settings.PVE_HOST_IP,
                     username=settings.PVE_USER,
                     password=settings.PVE_PASSWORD,
-                    logger=self.logger
+                    logger=self.logger,
+                    port=settings.PVE_SSH_PORT
             ) as client:
                 result = await client.run_command(command)
                 return result  # список строк вывода
@@ -0,0 +1,54 @@
+# infrastructure/schedule_store.py
+from app.domain.schedule import Schedule
+from app.core.shared_state import SharedStore
+import logging
+
+
+class ScheduleStore:
+    """Хранение расписаний в SharedStore (SQLite на локальном диске) — общее для всех воркеров.
+    Каждое изменение увеличивает версию, по которой планировщик в лидере понимает, что пора перечитать данные."""
+    PREFIX = "schedule:"
+    VERSION_KEY = "schedules:version"
+
+    def __init__(self, store: SharedStore, logger: logging.Logger | None = None):
+        self.store = store
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+
+    def load(self) -> dict[str, Schedule]:
+        """Загружает все расписания. Повреждённые записи пропускаются"""
+        schedules: dict[str, Schedule] = {}
+        for key, item in self.store.items(self.PREFIX).items():
+            try:
+                schedule = Schedule.from_dict(item)
+                schedules[schedule.id] = schedule
+            except (TypeError, ValueError) as e:
+                self.logger.error(f"Пропущено некорректное расписание {key}: {e}")
+        return schedules
+
+    def get(self, schedule_id: str) -> Schedule | None:
+        item = self.store.get(f"{self.PREFIX}{schedule_id}")
+        return Schedule.from_dict(item) if item else None
+
+    def save(self, schedule: Schedule) -> int:
+        """Сохраняет расписание. Возвращает новую версию"""
+        self.store.set(f"{self.PREFIX}{schedule.id}", schedule.to_dict())
+        return self.store.incr(self.VERSION_KEY)
+
+    def patch(self, schedule_id: str, **fields) -> tuple[Schedule | None, int | None]:
+        """Меняет только указанные поля свежей записи из хранилища, не затирая правки других воркеров.
+        Возвращает (расписание, новая версия); (None, None) — расписание уже удалено"""
+        schedule = self.get(schedule_id)
+        if schedule is None:
+            return None, None
+        for name, value in fields.items():
+            setattr(schedule, name, value)
+        return schedule, self.save(schedule)
+
+    def delete(self, schedule_id: str) -> bool:
+        deleted = self.store.delete(f"{self.PREFIX}{schedule_id}")
+        if deleted:
+            self.store.incr(self.VERSION_KEY)
+        return deleted
+
+    def version(self) -> int:
+        return int(self.store.get(self.VERSION_KEY, 0))
@@ -0,0 +1,150 @@
+# infrastructure/sftp_transfer.py
+import asyncio
+import hashlib
+from collections import deque
+from pathlib import Path
+from typing import Callable
+import asyncssh
+
+HASH_CHUNK = 1024 * 1024
+
+
+def _hash_prefix(path: Path, length: int) -> "hashlib._Hash":
+    """sha256 первых length байт локального файла — продолжение контрольной суммы при докачке"""
+    hasher = hashlib.sha256()
+    if length:
+        with open(path, "rb") as f:
+            while length > 0:
+                data = f.read(min(HASH_CHUNK, length))
+                if not data:
+                    raise EOFError(f"{path}: файл короче {length} байт")
+                hasher.update(data)
+                length -= len(data)
+    return hasher
+
+
+def _open_part(path: Path, offset: int):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = open(path, "r+b" if offset else "wb")
+    f.truncate(offset)
+    f.seek(offset)
+    return f
+
+
+def _write_and_hash(f, hasher, data: bytes) -> None:
+    f.write(data)
+    hasher.update(data)  # hashlib отпускает GIL на больших блоках
+
+
+def _read_and_hash(f, hasher, size: int) -> bytes:
+    data = f.read(size)
+    hasher.update(data)
+    return data
+
+
+class PipelinedSFTP:
+    """Передача файлов по SFTP с конвейером запросов: до pipeline блоков по block_size в полёте на файл.
+    Контрольная сумма sha256 считается потоково в порядке файла: при скачивании блоки приходят в произвольном
+    порядке, но пишутся и хешируются по очереди из окна ожидающих запросов (окно и есть буфер переупорядочивания,
+    памяти не больше pipeline * block_size). Передача в файл .part с продолжением с заданного смещения."""
+
+    def __init__(self, sftp: asyncssh.SFTPClient, block_size: int, pipeline: int):
+        self.sftp = sftp
+        self.block_size = block_size
+        self.pipeline = pipeline
+
+    @staticmethod
+    async def _read_block(src: asyncssh.SFTPClientFile, offset: int, length: int) -> bytes:
+        data = await src.read(length, offset)
+        while len(data) < length:  # сервер вправе вернуть меньше запрошенного
+            more = await src.read(length - len(data), offset + len(data))
+            if not more:
+                raise EOFError(f"Файл стал короче: ожидалось {offset + length} байт, прочитано {offset + len(data)}")
+            data += more
+        return data
+
+    async def download(self, remote: str, part: Path, size: int, offset: int,
+                       progress: Callable[[int], None]) -> str:
+        """Скачивает remote[offset:size] в конец part. Возвращает sha256 всего файла"""
+        hasher = await asyncio.to_thread(_hash_prefix, part, offset)
+        f = await asyncio.to_thread(_open_part, part, offset)
+        window: deque[asyncio.Future] = deque()
+        try:
+            async with self.sftp.open(remote, "rb") as src:
+                position = requested = offset
+                while position < size:
+                    while len(window) < self.pipeline and requested < size:
+                        length = min(self.block_size, size - requested)
+                        window.append(asyncio.ensure_future(self._read_block(src, requested, length)))
+                        requested += length
+                    data = await window.popleft()
+                    await asyncio.to_thread(_write_and_hash, f, hasher, data)
+                    position += len(data)
+                    progress(position)
+        finally:
+            for future in window:
+                future.cancel()
+            await asyncio.to_thread(f.close)
+        return hasher.hexdigest()
+
+    async def upload(self, local: Path, remote_part: str, size: int, offset: int,
+                     progress: Callable[[int], None]) -> str:
+        """Загружает local[offset:size] в remote_part. progress получает длину непрерывно записанного начала
+        (записи завершаются не по порядку — с этого места безопасно продолжать). Возвращает sha256 файла"""
+        hasher = await asyncio.to_thread(_hash_prefix, local, offset)
+        f = await asyncio.to_thread(open, local, "rb")
+        in_flight: dict[asyncio.Future, tuple[int, int]] = {}
+        completed: dict[int, int] = {}     # смещение -> длина записанных, но ещё не непрерывных блоков
+        acked = offset
+
+        def collect(done: set[asyncio.Future]) -> None:
+            nonlocal acked
+            for future in done:
+                start, length = in_flight.pop(future)
+                future.result()
+                completed[start] = length
+            while acked in completed:
+                acked += completed.pop(acked)
+            progress(acked)
+
+        try:
+            await asyncio.to_thread(f.seek, offset)
+            async with self.sftp.open(remote_part, "r+b" if offset else "wb") as dst:
+                position = offset
+                while position < size:
+                    data = await asyncio.to_thread(_read_and_hash, f, hasher, min(self.block_size, size - position))
+                    if not data:
+                        raise EOFError(f"{local}: файл стал короче {size} байт")
+                    if len(in_flight) >= self.pipeline:
+                        done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                        collect(done)
+                    in_flight[asyncio.ensure_future(dst.write(data, position))] = (position, len(data))
+                    position += len(data)
+                if in_flight:
+                    done, _ = await asyncio.wait(in_flight)
+                    collect(done)
+                await dst.truncate(size)
+        finally:
+            for future in in_flight:
+                future.cancel()
+            await asyncio.to_thread(f.close)
+        return hasher.hexdigest()
+
+    async def remote_size(self, path: str) -> int | None:
+        try:
+            return (await self.sftp.stat(path)).size
+        except asyncssh.SFTPNoSuchFile:
+            return None
+
+    async def replace(self, source: str, destination: str) -> None:
+        """Переименование с заменой существующего файла (posix-rename, если сервер поддерживает)"""
+        try:
+            await self.sftp.posix_rename(source, destination)
+            return
+        except asyncssh.SFTPOpUnsupported:
+            pass
+        try:
+            await self.sftp.remove(destination)
+        except asyncssh.SFTPNoSuchFile:
+            pass
+        await self.sftp.rename(source, destination)
@@ -1,8 +1,12 @@
+import asyncio
 import time
 import asyncssh
-from typing import List, AsyncGenerator, Optional
+from typing import List, AsyncGenerator, Awaitable, Callable, Optional
 import logging
 
+READ_CHUNK = 64 * 1024      # байт stdout за одно чтение в execute_command_to
+STDERR_KEEP = 4096          # сколько байт stderr сохраняется для лога и ответа
+
 
 class AsyncSSHClient:
     def __init__(self, host: str, username: str, password: str, logger: logging.Logger, port: int = 22):
@@ -49,6 +53,10 @@ class AsyncSSHClient:
             self.conn = None
             self.logger.info(f"Соединение с хостом {self.host} закрыто")
 
+    def start_sftp(self) -> asyncssh.SFTPClient:
+        '''SFTP-сессия поверх уже открытого соединения (async with client.start_sftp() as sftp)'''
+        return self.conn.start_sftp_client()
+
     async def run_command(self, command: str, streaming: bool = False) -> List[str]:
         """Универсальный метод для выполнения команд, выбирает какой метод использовать
         по умолчанию streaming=False будет выполняться execute_command (одиночный вывод)
@@ -77,12 +85,68 @@ class AsyncSSHClient:
             if result.stderr:
                 self.logger.warning(f"Stderr при выполнении команды: {result.stderr.strip()}")
             lines = [line for line in result.stdout.splitlines() if line]
-            self.logger.info(lines)
+            self.logger.debug(f"Команда '{command}' выполнена: {len(lines)} строк, {len(result.stdout)} символов")
             return lines
         except Exception as e:
             self.logger.exception(f"Ошибка выполнения команды '{command}': {e}")
             raise
 
+    async def execute_command_to(self, command: str, write: Callable[[bytes], Awaitable[None]],
+                                 max_bytes: int, timeout: float) -> dict:
+        """Выполнение команды с передачей stdout кусками в write, без накопления вывода в памяти.
+        Жёсткие ограничения: после max_bytes байт или timeout секунд канал закрывается.
+        Возвращает {"bytes", "exit_status", "truncated", "timed_out", "stderr"}"""
+        self.logger.info(f"Выполняю команду (в поток): {command}")
+        written = 0
+        truncated = False
+        stderr = bytearray()
+
+        async def pump_stdout(process: asyncssh.SSHClientProcess) -> None:
+            nonlocal written, truncated
+            while chunk := await process.stdout.read(READ_CHUNK):
+                if written + len(chunk) > max_bytes:
+                    chunk, truncated = chunk[:max_bytes - written], True
+                written += len(chunk)
+                if chunk:
+                    await write(chunk)
+                if truncated:
+                    return
+
+        async def drain_stderr(process: asyncssh.SSHClientProcess) -> None:
+            # stderr читается всегда, иначе непрочитанный поток остановит канал; хранится только начало
+            while chunk := await process.stderr.read(READ_CHUNK):
+                if len(stderr) < STDERR_KEEP:
+                    stderr.extend(chunk[:STDERR_KEEP - len(stderr)])
+
+        try:
+            async with self.conn.create_process(command, encoding=None) as process:
+                stderr_task = asyncio.create_task(drain_stderr(process))
+                try:
+                    await asyncio.wait_for(pump_stdout(process), timeout)
+                    timed_out = False
+                except asyncio.TimeoutError:
+                    timed_out = True
+                if truncated or timed_out:
+                    process.close()
+                    stderr_task.cancel()
+                    exit_status = None
+                else:
+                    await asyncio.wait({stderr_task}, timeout=5.0)
+                    stderr_task.cancel()
+                    completed = await asyncio.wait_for(process.wait(), 5.0)
+                    exit_status = completed.exit_status
+        except Exception as e:
+            self.logger.exception(f"Ошибка выполнения команды '{command}': {e}")
+            raise
+        text = stderr.decode(errors="replace").strip()
+        if text:
+            self.logger.warning(f"Stderr при выполнении команды: {text}")
+        if truncated or timed_out:
+            reason = f"превышен лимит {max_bytes} байт" if truncated else f"превышен таймаут {timeout} с"
+            self.logger.warning(f"Команда '{command}' прервана: {reason}")
+        self.logger.debug(f"Команда '{command}' выполнена: {written} байт, код {exit_status}")
+        return {"bytes": written, "exit_status": exit_status, "truncated": truncated, "timed_out": timed_out, "stderr": text}
+
     async def execute_command_streaming(self, command: str) -> AsyncGenerator[str, None]:
         """Выполнение команды с потоковым выводом построчно"""
         self.logger.info(f"Выполняю команду (streaming): {command}")
@@ -0,0 +1,142 @@
+# infrastructure/vm_store.py
+import bisect
+import heapq
+from dataclasses import dataclass
+from app.domain.vm import Guest, decode_guests
+
+# Поля cluster/resources, доступные для выборки и сортировки
+VM_FIELDS = Guest.FIELDS
+
+
+@dataclass
+class VMQuery:
+    node: str | None = None
+    status: str | None = None
+    tag: str | None = None
+    name_prefix: str | None = None
+    fields: tuple[str, ...] | None = None   # None — все поля
+    sort: str | None = None                 # имя поля, '-' в начале — по убыванию
+    limit: int | None = None
+
+
+class VMStore:
+    """Инвентарь VM в памяти (Guest) с вторичными индексами: vmid -> запись, node/status/tag -> множество vmid,
+    отсортированный список имён для поиска по префиксу. Обновляется диффом снимка cluster/resources:
+    индексы правятся только для VM, у которых изменились индексируемые поля."""
+
+    def __init__(self):
+        self.by_vmid: dict[int, Guest] = {}
+        self.by_node: dict[str, set[int]] = {}
+        self.by_status: dict[str, set[int]] = {}
+        self.by_tag: dict[str, set[int]] = {}
+        self._names: list[tuple[str, int]] = []     # (имя в нижнем регистре, vmid), отсортировано
+
+    @staticmethod
+    def _keys(vm: Guest) -> tuple[str, str, frozenset[str], str]:
+        return vm.node, vm.status, frozenset(vm.tag_set), vm.name.lower()
+
+    @staticmethod
+    def _index_add(index: dict[str, set[int]], key: str, vmid: int) -> None:
+        index.setdefault(key, set()).add(vmid)
+
+    @staticmethod
+    def _index_remove(index: dict[str, set[int]], key: str, vmid: int) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(vmid)
+            if not ids:
+                del index[key]
+
+    def _unindex(self, vmid: int, keys: tuple) -> None:
+        node, status, tags, name = keys
+        self._index_remove(self.by_node, node, vmid)
+        self._index_remove(self.by_status, status, vmid)
+        for tag in tags:
+            self._index_remove(self.by_tag, tag, vmid)
+        pos = bisect.bisect_left(self._names, (name, vmid))
+        if pos < len(self._names) and self._names[pos] == (name, vmid):
+            del self._names[pos]
+
+    def _index(self, vmid: int, keys: tuple) -> None:
+        node, status, tags, name = keys
+        self._index_add(self.by_node, node, vmid)
+        self._index_add(self.by_status, status, vmid)
+        for tag in tags:
+            self._index_add(self.by_tag, tag, vmid)
+        bisect.insort(self._names, (name, vmid))
+
+    def apply(self, resources: list[dict]) -> dict[str, int]:
+        """Применяет свежий снимок cluster/resources?type=vm. Возвращает количество добавленных/изменённых/удалённых"""
+        seen: set[int] = set()
+        added = updated = 0
+        for vm in decode_guests(resources):
+            vmid = vm.vmid
+            seen.add(vmid)
+            old = self.by_vmid.get(vmid)
+            if old == vm:
+                continue
+            new_keys = self._keys(vm)
+            if old is None:
+                added += 1
+                self._index(vmid, new_keys)
+            else:
+                updated += 1
+                old_keys = self._keys(old)
+                if old_keys != new_keys:
+                    self._unindex(vmid, old_keys)
+                    self._index(vmid, new_keys)
+            self.by_vmid[vmid] = vm
+        removed = [vmid for vmid in self.by_vmid if vmid not in seen]
+        for vmid in removed:
+            self._unindex(vmid, self._keys(self.by_vmid.pop(vmid)))
+        return {"added": added, "updated": updated, "removed": len(removed)}
+
+    def _prefix_ids(self, prefix: str) -> set[int]:
+        prefix = prefix.lower()
+        ids = set()
+        for pos in range(bisect.bisect_left(self._names, (prefix, -1)), len(self._names)):
+            name, vmid = self._names[pos]
+            if not name.startswith(prefix):
+                break
+            ids.add(vmid)
+        return ids
+
+    def _candidates(self, query: VMQuery) -> set[int] | None:
+        """Пересечение индексов по заданным фильтрам (начиная с самого маленького); None — фильтров нет"""
+        sets = []
+        if query.node is not None:
+            sets.append(self.by_node.get(query.node, set()))
+        if query.status is not None:
+            sets.append(self.by_status.get(query.status, set()))
+        if query.tag is not None:
+            sets.append(self.by_tag.get(query.tag.lower(), set()))
+        if query.name_prefix:
+            sets.append(self._prefix_ids(query.name_prefix))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def query(self, query: VMQuery) -> tuple[list[dict], int]:
+        """Выборка по фильтрам с сортировкой, ограничением и проекцией полей. Возвращает (записи, всего найдено)"""
+        ids = self._candidates(query)
+        records = list(self.by_vmid.values()) if ids is None else [self.by_vmid[vmid] for vmid in ids]
+        total = len(records)
+        field, reverse = (query.sort or "vmid"), False
+        if field.startswith("-"):
+            field, reverse = field[1:], True
+
+        def key(vm: Guest):
+            value = getattr(vm, field)
+            missing = value is None  # VM без значения поля — в конце при любом направлении
+            return (not missing if reverse else missing, value if not missing else 0)
+
+        if query.limit is not None and query.limit < total:
+            select = heapq.nlargest if reverse else heapq.nsmallest
+            records = select(query.limit, records, key=key)
+        else:
+            records.sort(key=key, reverse=reverse)
+        return [vm.to_dict(query.fields) for vm in records], total
+
+    def __len__(self) -> int:
+        return len(self.by_vmid)
@@ -1,13 +1,30 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Query
 import subprocess
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
+from pathlib import Path
 
 import logging
 from app.api.prox_routes import prox
 from app.api.mikro_routes import mikro
+from app.api.log_routes import logs, service as log_service
+from app.api.scheduler_routes import schedules
+from app.api.fleet_routes import fleet
+from app.api.admin_routes import admin
+from app.api.ssh_result_routes import results
+from app.api.transfer_routes import transfer
 from app.core.settings import settings
 from app.core.response import ServiceStatus
+from app.core.leader import LeaderElection
+from app.core.periodic import PeriodicTask
+from app.core.shared_state import shared_store
+from app.core.profiling import RouteCPUMiddleware, loop_monitor
+from app.use_cases.health_services import HealthService
+from app.use_cases.scheduler import scheduler
+from app.use_cases.transfer_services import transfers
+from app.use_cases.vm_inventory_services import vm_inventory
+from app.infrastructure.prox_api_client import ProxmoxAPIClient
 
 logging.getLogger("asyncssh").setLevel(logging.WARNING)
 
@@ -16,17 +33,47 @@ logger = logging.getLogger(__name__)
 logger.info("Запуск приложения")
 start_time = datetime.utcnow()
 
-app = FastAPI(title=settings.APP_NAME, version=settings.APP_VERSION)
+health_service = HealthService(logger)
+
+# При запуске с --workers N фоновые задачи работают только в одном воркере-лидере
+leader = LeaderElection(Path(settings.DATA_DIR) / "leader.lock", logger)
+leader.register("scheduler", scheduler.start, scheduler.stop)
+leader.register("vm_inventory", vm_inventory.start, vm_inventory.stop)
+store_purge = PeriodicTask("shared_store_purge", shared_store.purge_expired, settings.SHARED_STORE_PURGE_INTERVAL, logger)
+leader.register("shared_store_purge", store_purge.start, store_purge.stop)
+index_prune = PeriodicTask("log_index_prune", log_service.reader.prune_indexes, settings.LOG_INDEX_PRUNE_INTERVAL, logger)
+leader.register("log_index_prune", index_prune.start, index_prune.stop)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка фоновых задач приложения"""
+    loop_monitor.start()
+    await leader.start()
+    yield
+    await leader.stop()
+    await transfers.stop()
+    loop_monitor.stop()
+    await ProxmoxAPIClient.close_pool()
+
+app = FastAPI(title=settings.APP_NAME, version=settings.APP_VERSION, lifespan=lifespan)
 
 app.include_router(prox)
 app.include_router(mikro)
+app.include_router(logs)
+app.include_router(schedules)
+app.include_router(fleet)
+app.include_router(admin)
+app.include_router(results)
+app.include_router(transfer)
+app.add_middleware(RouteCPUMiddleware, monitor=loop_monitor)
 
 @app.get("/api/health", tags=["Health"], summary="Проверка состояния сервиса")
-async def health_check():
-    """Эндпоинт для проверки доступности сервиса и БД."""
+async def health_check(deep: bool = Query(False, description="Проверить Proxmox API, SSH Proxmox и SSH Mikrotik")):
+    """Эндпоинт для проверки доступности сервиса и его зависимостей."""
     status = ServiceStatus.success
     uptime = (datetime.utcnow() - start_time).total_seconds()
-    return {
+    result = {
         "status": status,
         "service": settings.APP_NAME,
         "version": settings.APP_VERSION,
@@ -34,6 +81,9 @@ async def health_check():
         "debug": settings.DEBUG,
         "uptime_seconds": int(uptime)
     }
+    if deep:
+        result.update(await health_service.deep_health())
+    return result
 
 
 
@@ -0,0 +1,140 @@
+# use_cases/fanout_services.py
+import asyncio
+import hashlib
+import ipaddress
+import time
+from typing import AsyncGenerator, Iterable
+from app.domain.host import Host, HostKind
+from app.infrastructure.prox_api_client import ProxmoxAPIClient
+from app.infrastructure.ssh_client import AsyncSSHClient
+from app.core.settings import settings
+import logging
+
+
+def _guest_ipv4(interfaces: list[dict]) -> str | None:
+    """Первый не-loopback IPv4 из ответа guest agent"""
+    for iface in interfaces:
+        for addr in iface.get("ip-addresses") or []:
+            if addr.get("ip-address-type") != "ipv4":
+                continue
+            ip = addr.get("ip-address", "")
+            try:
+                if not ipaddress.ip_address(ip).is_loopback:
+                    return ip
+            except ValueError:
+                continue
+    return None
+
+
+class FanoutService:
+    """Выполнение одной команды на многих хостах параллельно (узлы PVE, роутер, гостевые VM).
+    Ограничение числа одновременных сессий, таймаут на хост, результаты отдаются по мере готовности."""
+
+    def __init__(self, api_client: ProxmoxAPIClient, logger: logging.Logger):
+        self.client = api_client
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+
+    async def _pve_hosts(self) -> list[Host]:
+        try:
+            nodes = await self.client.get_cluster_nodes()
+        except Exception as e:
+            self.logger.warning(f"Не удалось получить узлы кластера, используем PVE_HOST_IP: {e}")
+            nodes = []
+        hosts = [Host(n["name"], n["ip"], "pve", settings.PVE_USER, settings.PVE_PASSWORD, port=settings.PVE_SSH_PORT)
+                 for n in nodes if n.get("ip")]
+        return hosts or [Host("pve", settings.PVE_HOST_IP, "pve", settings.PVE_USER, settings.PVE_PASSWORD, port=settings.PVE_SSH_PORT)]
+
+    def _router_hosts(self) -> list[Host]:
+        return [Host("mikrotik", settings.MIKROTIK_HOST, "router", settings.MIKROTIK_USER, settings.MIKROTIK_PASSWORD,
+                     port=int(settings.MIKROTIK_PORT))]
+
+    async def _guest_hosts(self) -> list[Host]:
+        """Запущенные qemu VM с IP из guest agent. VM без агента пропускаются"""
+        if not settings.GUEST_SSH_USER:
+            self.logger.warning("GUEST_SSH_USER не задан — гостевые VM пропущены")
+            return []
+        vms = [vm for vm in await self.client.get_vms() if vm.get("type", "qemu") == "qemu" and vm.get("status") == "running"]
+        semaphore = asyncio.Semaphore(settings.FANOUT_CONCURRENCY)
+
+        async def resolve(vm: dict) -> Host | None:
+            async with semaphore:
+                try:
+                    ip = _guest_ipv4(await asyncio.wait_for(self.client.get_guest_interfaces(vm["vmid"], vm["node"]), settings.FANOUT_TIMEOUT))
+                except Exception as e:
+                    self.logger.info(f"IP VM {vm['vmid']} не определён: {e}")
+                    return None
+            if not ip:
+                return None
+            return Host(vm.get("name") or str(vm["vmid"]), ip, "guest", settings.GUEST_SSH_USER,
+                        settings.GUEST_SSH_PASSWORD or "", port=settings.GUEST_SSH_PORT)
+
+        return [h for h in await asyncio.gather(*(resolve(vm) for vm in vms)) if h]
+
+    async def inventory(self, kinds: Iterable[HostKind] = ("pve", "router", "guest")) -> list[Host]:
+        """Список хостов выбранных типов"""
+        kinds = set(kinds)
+        jobs = []
+        if "pve" in kinds:
+            jobs.append(self._pve_hosts())
+        if "guest" in kinds:
+            jobs.append(self._guest_hosts())
+        groups = await asyncio.gather(*jobs)
+        hosts = [h for group in groups for h in group]
+        if "router" in kinds:
+            hosts += self._router_hosts()
+        return hosts
+
+    async def _run_one(self, host: Host, command: str, semaphore: asyncio.Semaphore, timeout: float) -> dict:
+        result = {**host.to_dict(), "ok": False, "output": [], "error": None, "elapsed_ms": None}
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async def execute() -> list[str]:
+                    async with AsyncSSHClient(host.address, host.username, host.password, self.logger, port=host.port) as client:
+                        return await client.run_command(command)
+                result["output"] = await asyncio.wait_for(execute(), timeout=timeout)
+                result["ok"] = True
+            except asyncio.TimeoutError:
+                result["error"] = f"Таймаут {timeout} сек"
+            except Exception as e:
+                result["error"] = str(e) or type(e).__name__
+            result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    @staticmethod
+    def summarize(results: list[dict], elapsed: float) -> dict:
+        """Группировка хостов с одинаковым выводом (и одинаковой ошибкой)"""
+        groups: dict[str, dict] = {}
+        for r in results:
+            payload = "\n".join(r["output"]) if r["ok"] else f"error:{r['error']}"
+            digest = hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+            group = groups.setdefault(digest, {"ok": r["ok"], "hosts": [], "output": r["output"], "error": r["error"]})
+            group["hosts"].append(r["name"])
+        slowest = max(results, key=lambda r: r["elapsed_ms"] or 0, default=None)
+        return {
+            "hosts": len(results),
+            "ok": sum(1 for r in results if r["ok"]),
+            "failed": sum(1 for r in results if not r["ok"]),
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "slowest": {"name": slowest["name"], "elapsed_ms": slowest["elapsed_ms"]} if slowest else None,
+            "groups": sorted(groups.values(), key=lambda g: -len(g["hosts"])),
+        }
+
+    async def run(self, command: str, hosts: list[Host], concurrency: int | None = None,
+                  timeout: float | None = None) -> AsyncGenerator[dict, None]:
+        """Результат каждого хоста по мере готовности ({"type": "result"}), в конце — сводка ({"type": "summary"})"""
+        semaphore = asyncio.Semaphore(concurrency or settings.FANOUT_CONCURRENCY)
+        timeout = timeout or settings.FANOUT_TIMEOUT
+        self.logger.info(f"Выполняю '{command}' на {len(hosts)} хостах")
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(self._run_one(host, command, semaphore, timeout)) for host in hosts]
+        results: list[dict] = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                results.append(result)
+                yield {"type": "result", **result}
+            yield {"type": "summary", **self.summarize(results, time.perf_counter() - start)}
+        finally:
+            for task in tasks:
+                task.cancel()  # клиент отключился — незавершённые сессии не нужны
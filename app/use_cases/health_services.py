@@ -0,0 +1,104 @@
+# use_cases/health_services.py
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+from app.infrastructure.prox_api_client import ProxmoxAPIClient
+from app.infrastructure.ssh_client import AsyncSSHClient
+from app.core.cache import TTLCache
+from app.core.shared_state import shared_store
+from app.core.response import ServiceStatus
+from app.core.settings import settings
+import logging
+
+
+@dataclass
+class ProbeResult:
+    """Результат проверки одной зависимости"""
+    name: str
+    ok: bool = False
+    latency_ms: float | None = None
+    error: str | None = None
+    checked_at: float | None = None
+    last_success: float | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "ok": self.ok,
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+            "checked_at": _iso(self.checked_at),
+            "last_success": _iso(self.last_success),
+        }
+
+
+def _iso(ts: float | None) -> str | None:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+
+class HealthService:
+    """Глубокая проверка зависимостей: Proxmox API, SSH Proxmox, SSH Mikrotik.
+    Все проверки идут параллельно, каждая со своим таймаутом; результат кешируется на HEALTH_CACHE_TTL секунд
+    (общий для всех воркеров), одновременные запросы ждут одну общую проверку."""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        self.api_client = ProxmoxAPIClient(logger=self.logger)
+        self.probes: dict[str, Callable[[], Awaitable[None]]] = {
+            "proxmox_api": self._probe_proxmox_api,
+            "pve_ssh": self._probe_pve_ssh,
+            "mikrotik_ssh": self._probe_mikrotik_ssh,
+        }
+        self.cache = TTLCache(maxsize=1, shared=shared_store, namespace="health")
+
+    async def _probe_proxmox_api(self) -> None:
+        await self.api_client.ping(timeout=settings.HEALTH_PROBE_TIMEOUT)
+
+    async def _probe_pve_ssh(self) -> None:
+        async with AsyncSSHClient(settings.PVE_HOST_IP, settings.PVE_USER, settings.PVE_PASSWORD, self.logger,
+                                  port=settings.PVE_SSH_PORT):
+            pass
+
+    async def _probe_mikrotik_ssh(self) -> None:
+        async with AsyncSSHClient(settings.MIKROTIK_HOST, settings.MIKROTIK_USER, settings.MIKROTIK_PASSWORD,
+                                  self.logger, port=int(settings.MIKROTIK_PORT)):
+            pass
+
+    async def _run_probe(self, name: str, probe: Callable[[], Awaitable[None]]) -> ProbeResult:
+        """Одна проверка с собственным таймаутом"""
+        result = ProbeResult(name=name)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe(), timeout=settings.HEALTH_PROBE_TIMEOUT)
+            result.ok = True
+        except asyncio.TimeoutError:
+            result.error = f"Таймаут {settings.HEALTH_PROBE_TIMEOUT} сек"
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+        result.latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        result.checked_at = time.time()
+        key = f"health:last_success:{name}"
+        if result.ok:
+            await asyncio.to_thread(shared_store.set, key, result.checked_at)
+            result.last_success = result.checked_at
+        else:
+            self.logger.warning(f"Health-check {name} не пройден: {result.error}")
+            result.last_success = await asyncio.to_thread(shared_store.get, key)
+        return result
+
+    async def _probe_all(self) -> dict[str, dict]:
+        results = await asyncio.gather(*(self._run_probe(name, probe) for name, probe in self.probes.items()))
+        return {r.name: r.to_dict() for r in results}
+
+    async def deep_health(self) -> dict:
+        """Данные для /api/health?deep=true"""
+        dependencies, cached, _ = await self.cache.get_or_load("deep", self._probe_all, settings.HEALTH_CACHE_TTL)
+        failed = [name for name, r in dependencies.items() if not r["ok"]]
+        if not failed:
+            status = ServiceStatus.success
+        elif len(failed) < len(dependencies):
+            status = ServiceStatus.warning
+        else:
+            status = ServiceStatus.error
+        return {"status": status, "cached": cached, "dependencies": dependencies}
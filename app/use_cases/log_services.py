@@ -0,0 +1,67 @@
+# use_cases/log_services.py
+import asyncio
+import json
+from datetime import datetime
+from typing import AsyncGenerator, Callable, Awaitable
+from app.infrastructure.log_reader import LogReader, LogQuery
+from app.core.response import ServiceResponse, ServiceStatus
+from app.core.settings import settings, logger_config
+import logging
+
+
+class LogService:
+    """Сервис чтения логов приложения (активный файл + ротированные)"""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        self.reader = LogReader(logger_config.get_log_path(), use_json=settings.USE_JSON, logger=self.logger)
+
+    @staticmethod
+    def build_query(level: str | None = None, module: str | None = None, trace_id: str | None = None,
+                    since: datetime | None = None, until: datetime | None = None) -> LogQuery:
+        """Собирает фильтр из параметров запроса. level — один или несколько уровней через запятую"""
+        levels = frozenset(l.strip().upper() for l in level.split(",") if l.strip()) if level else None
+        return LogQuery(
+            levels=levels or None,
+            module=module or None,
+            trace_id=trace_id or None,
+            since=since.timestamp() if since else None,
+            until=until.timestamp() if until else None,
+        )
+
+    async def tail(self, query: LogQuery, limit: int) -> ServiceResponse:
+        """Последние записи лога"""
+        try:
+            records = await asyncio.to_thread(self.reader.tail, query, limit)
+            return ServiceResponse(status=ServiceStatus.success, message="Последние записи лога", data={"count": len(records), "records": records})
+        except Exception as e:
+            self.logger.error(f"Ошибка чтения логов (tail): {e}")
+            return ServiceResponse(status=ServiceStatus.error, message="Ошибка чтения логов", error=str(e))
+
+    async def filter(self, query: LogQuery, limit: int) -> ServiceResponse:
+        """Записи лога по фильтру. С since — в хронологическом порядке начиная с since, иначе — последние"""
+        try:
+            read = self.reader.range if query.since is not None else self.reader.tail
+            records = await asyncio.to_thread(read, query, limit)
+            return ServiceResponse(status=ServiceStatus.success, message="Записи лога по фильтру", data={"count": len(records), "records": records})
+        except Exception as e:
+            self.logger.error(f"Ошибка чтения логов (filter): {e}")
+            return ServiceResponse(status=ServiceStatus.error, message="Ошибка чтения логов", error=str(e))
+
+    async def follow(self, query: LogQuery, backlog: int, is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncGenerator[str, None]:
+        """SSE-поток новых записей активного файла лога"""
+        inode, pos = self.reader.follow_from_end()
+        if backlog:
+            for record in await asyncio.to_thread(self.reader.tail, query, backlog):
+                yield f"data: {json.dumps(record, ensure_ascii=False, default=str)}\n\n"
+        while not await is_disconnected():
+            try:
+                inode, pos, records = await asyncio.to_thread(self.reader.read_new, inode, pos, query)
+            except Exception as e:
+                self.logger.error(f"Ошибка чтения логов (follow): {e}")
+                yield f"event: error\ndata: {json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
+                return
+            for record in records:
+                yield f"data: {json.dumps(record, ensure_ascii=False, default=str)}\n\n"
+            if not records:
+                await asyncio.sleep(settings.LOG_FOLLOW_INTERVAL)
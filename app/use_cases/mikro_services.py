@@ -1,6 +1,8 @@
 from app.infrastructure.ssh_client import AsyncSSHClient
 from app.core.response import ServiceResponse, ServiceStatus
 from app.core.settings import settings
+from app.use_cases.readonly_services import readonly_commands
+from app.use_cases.ssh_result_services import OutputMode, ssh_results
 import logging
 
 
@@ -10,9 +12,14 @@ class MikrotikService:
     def __init__(self, logger: logging.Logger):
         self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
 
-    async def run_command(self, command: str) -> ServiceResponse:
-        """Выполнение любой команды на Mikrotik"""
+    async def run_command(self, command: str, mode: OutputMode = OutputMode.auto) -> ServiceResponse:
+        """Выполнение любой команды на Mikrotik. Разрешённые read-only команды отдаются из кеша
+        (кроме mode=spool); большой вывод сохраняется и отдаётся ссылкой (см. SSHResultService)"""
         try:
+            spec = readonly_commands.lookup("mikrotik", command) if mode != OutputMode.spool else None
+            if spec is not None:
+                result, cached, _ = await readonly_commands.run_lines(spec)
+                return ServiceResponse(status=ServiceStatus.success, message="Команда выполнена успешно", data={"result": result, "cached": cached})
             async with AsyncSSHClient(
                     host=settings.MIKROTIK_HOST,
                     username=settings.MIKROTIK_USER,
@@ -20,8 +27,8 @@ class MikrotikService:
                     port=int(settings.MIKROTIK_PORT),
                     logger=self.logger
             ) as client:
-                result = await client.run_command(command)
-            return ServiceResponse(status=ServiceStatus.success, message="Команда выполнена успешно", data={"result": result})
+                data = await ssh_results.execute(client, "mikrotik", command, mode)
+            return ServiceResponse(status=ServiceStatus.success, message="Команда выполнена успешно", data=data)
         except Exception as e:
             self.logger.error(f"Ошибка выполнения команды на Mikrotik: {e}")
             return ServiceResponse(status=ServiceStatus.error, message="Ошибка выполнения команды на Mikrotik", error=str(e))
@@ -30,3 +37,11 @@ class MikrotikService:
         """Запуск сервера Proxmox через Mikrotik"""
         self.logger.info("Инициирован запуск Proxmox через Mikrotik (WOL)")
         return await self.run_command("system script run WakeProxmox")
+
+    async def get_interfaces(self) -> ServiceResponse:
+        """Интерфейсы Mikrotik (/interface print), разобранные в записи"""
+        return await readonly_commands.query("mikrotik_interfaces")
+
+    async def get_dhcp_leases(self) -> ServiceResponse:
+        """DHCP-аренды Mikrotik (/ip dhcp-server lease print), разобранные в записи"""
+        return await readonly_commands.query("mikrotik_dhcp_leases")
@@ -1,12 +1,15 @@
 # application/prox_services.py
 import asyncio
 from wakeonlan import send_magic_packet
-import time
-from app.domain.vm import VM
+from app.domain.vm import RUNNING_FIELDS, decode_guests
 from app.infrastructure.prox_api_client import ProxmoxAPIClient
 from app.infrastructure.ssh_client import AsyncSSHClient
 from app.core.response import ServiceResponse, ServiceStatus
 from app.core.settings import settings
+from app.use_cases.readonly_services import readonly_commands
+from app.use_cases.ssh_result_services import OutputMode, ssh_results
+from app.use_cases.shutdown_planner import ShutdownPlanner
+from app.use_cases.vm_inventory_services import vm_inventory
 import logging
 logger = logging.getLogger(__name__)
 
@@ -67,8 +70,7 @@ class ProxmoxService:
         """Возвращает список запущенных VM"""
         try:
             vms_data = await self.client.get_vms()
-            vms = [VM(**vm) for vm in vms_data]
-            running = [vm.to_dict() for vm in vms if vm.status == "running"]
+            running = [vm.to_dict(RUNNING_FIELDS) for vm in decode_guests(vms_data) if vm.status == "running"]
             return ServiceResponse(status=ServiceStatus.success, message="Список запущенных VM", data={"running_vms": running})
         except Exception as e:
             self.logger.error(f"Ошибка получения списка VM: {e}")
@@ -78,6 +80,7 @@ class ProxmoxService:
         """Запуск одной виртуальной машины"""
         try:
             result = await self.client.start_vm(vmid, node)
+            await vm_inventory.invalidate()
             return ServiceResponse(status=ServiceStatus.success, message=f"VM {vmid} запущена", data={"result": result})
         except Exception as e:
             self.logger.error(f"Ошибка запуска VM {vmid}: {e}")
@@ -90,83 +93,95 @@ class ProxmoxService:
             results = {}
             for vm in vms_data:
                 results[vm["vmid"]] = await self.client.start_vm(vm["vmid"], vm["node"])
+            await vm_inventory.invalidate()
             return ServiceResponse(status=ServiceStatus.success, message="Запуск всех VM завершен", data={"results": results})
         except Exception as e:
             self.logger.error(f"Ошибка запуска всех VM: {e}")
             return ServiceResponse(status=ServiceStatus.error, message="Ошибка запуска всех VM", error=str(e))
 
-    async def wait_for_vms_shutdown(self, timeout: int = 120) -> ServiceResponse:
-        """Ждём, пока все VM не выключатся"""
-        start = time.time()
-        try:
-            while True:
-                vms_data = await self.client.get_vms()
-                running = [vm for vm in vms_data if vm.get("status") == "running"]
-
-                if not running:
-                    self.logger.info("Все виртуальные машины выключены")
-                    return ServiceResponse(status=ServiceStatus.success, message=f"Выключено {len(vms_data)} ВМ")
-
-                if time.time() - start > timeout:
-                    self.logger.warning("Таймаут ожидания VM! Некоторые все ещё запущены")
-                    return ServiceResponse(status=ServiceStatus.error, message=f"Таймаут ожидания VM! Некоторые все ещё запущены", error=f"Данные {running} ВМ все ещё запущены")
-
-                self.logger.info(f"Ожидаем выключения VM... Осталось: {len(running)}")
-                await asyncio.sleep(5)
-        except Exception as e:
-            self.logger.error(f"Ошибка wait_for_vms_shutdown: {e}")
-            return ServiceResponse(status=ServiceStatus.error, message="Ошибка wait_for_vms_shutdown", error=str(e))
-
     async def shutdown_all_vms(self) -> ServiceResponse:
-        """Выключаем все VM и ждём завершения"""
+        """Выключаем все VM по фазам (приложения -> БД -> хранилища/сеть) и ждём завершения"""
         try:
-            vms_data = await self.client.get_vms()
-            tasks = [self.client.shutdown_vm(vm["vmid"], vm["node"]) for vm in vms_data]
-            await asyncio.gather(*tasks)
-
-            # Ждём полного выключения VM
-            wait_result = await self.wait_for_vms_shutdown()
-            return wait_result
+            report = await ShutdownPlanner(self.client, self.logger).shutdown_vms()
+            await vm_inventory.invalidate()
+            if report["failed"]:
+                return ServiceResponse(status=ServiceStatus.error, message="Не все VM удалось выключить",
+                                       error=f"Не выключены: {[vm['vmid'] for vm in report['failed']]}", data=report)
+            return ServiceResponse(status=ServiceStatus.success, message="Все VM выключены", data=report)
         except Exception as e:
             self.logger.error(f"Ошибка shutdown_all_vms: {e}")
             return ServiceResponse(status=ServiceStatus.error, message="Ошибка shutdown_all_vms:", error=str(e))
 
-    async def shutdown_server(self, delay: int = 0) -> None:
-        """Выключение всех VM с задержкой и самого сервера Proxmox"""
+    async def get_shutdown_plan(self) -> ServiceResponse:
+        """Распределение VM по фазам выключения (без выполнения)"""
+        try:
+            planner = ShutdownPlanner(self.client, self.logger)
+            vms = await self.client.get_vms()
+            plan = [{"phase": phase.name, "tags": sorted(phase.tags), "concurrency": phase.concurrency, "timeout": phase.timeout,
+                     "vms": [{"vmid": vm["vmid"], "name": vm.get("name"), "status": vm.get("status")} for vm in phase_vms]}
+                    for phase, phase_vms in planner.plan(vms)]
+            return ServiceResponse(status=ServiceStatus.success, message="План выключения", data={"phases": plan})
+        except Exception as e:
+            self.logger.error(f"Ошибка построения плана выключения: {e}")
+            return ServiceResponse(status=ServiceStatus.error, message="Ошибка построения плана выключения", error=str(e))
+
+    async def shutdown_server(self, delay: int = 0) -> ServiceResponse:
+        """Выключение всех VM (с задержкой) и самих узлов Proxmox.
+        VM, не выключившиеся штатно, останавливаются принудительно, поэтому узлы выключаются в любом случае"""
         try:
             if delay > 0:
                 self.logger.info(f"Задержка перед shutdown {delay} минут")
                 await asyncio.sleep(delay * 60)
 
-            # 1. Выключаем все VM
-            vms_result = await self.shutdown_all_vms()
-            if vms_result.status != ServiceStatus.success:
-                return vms_result
+            # 1. Узлы кластера — до выключения VM: без их списка выключать нечего, в том числе узлы без VM
+            try:
+                nodes = [n["name"] for n in await self.client.get_cluster_nodes()]
+            except Exception as e:
+                self.logger.error(f"Не удалось получить узлы кластера, shutdown отменён: {e}")
+                return ServiceResponse(status=ServiceStatus.error, message="Не удалось получить узлы кластера, shutdown отменён",
+                                       error=str(e))
 
-            # 2. Выключаем сервер через SSH
-            async with AsyncSSHClient(
-                settings.PVE_HOST_IP,
-                settings.PVE_USER,
-                settings.PVE_PASSWORD,
-                self.logger
-            ) as client:
-                ssh_result = await client.run_command("shutdown -h now")
+            # 2. Выключаем все VM по фазам
+            planner = ShutdownPlanner(self.client, self.logger)
+            report = await planner.shutdown_vms()
 
+            # 3. Выключаем узлы через API
+            report["node_shutdown"] = await planner.shutdown_nodes(nodes)
             self.logger.info("Shutdown сервера инициирован")
+            failed_nodes = [node for node, error in report["node_shutdown"].items() if error]
+            if failed_nodes:
+                return ServiceResponse(status=ServiceStatus.error, message="Не удалось выключить узлы",
+                                       error=f"Узлы: {failed_nodes}", data=report)
+            return ServiceResponse(status=ServiceStatus.success, message="Shutdown сервера инициирован", data=report)
         except Exception as e:
             self.logger.error(f"Ошибка при shutdown Proxmox: {e}")
+            return ServiceResponse(status=ServiceStatus.error, message="Ошибка при shutdown Proxmox", error=str(e))
 
-    async def run_ssh_command(self, command: str) -> ServiceResponse:
-        """Выполнение команды на сервере через SSH"""
+    async def run_ssh_command(self, command: str, mode: OutputMode = OutputMode.auto) -> ServiceResponse:
+        """Выполнение команды на сервере через SSH. Разрешённые read-only команды отдаются из кеша
+        (кроме mode=spool); большой вывод сохраняется и отдаётся ссылкой (см. SSHResultService)"""
         try:
+            spec = readonly_commands.lookup("pve", command) if mode != OutputMode.spool else None
+            if spec is not None:
+                result, cached, _ = await readonly_commands.run_lines(spec)
+                return ServiceResponse(status=ServiceStatus.success, message="Команда выполнена успешно", data={"result": result, "cached": cached})
             async with AsyncSSHClient(
                 settings.PVE_HOST_IP,
                 settings.PVE_USER,
                 settings.PVE_PASSWORD,
-                self.logger
+                self.logger,
+                port=settings.PVE_SSH_PORT
             ) as client:
-                result = await client.run_command(command)
-            return ServiceResponse(status=ServiceStatus.success, message="Команда выполнена успешно", data={"result": result})
+                data = await ssh_results.execute(client, "pve", command, mode)
+            return ServiceResponse(status=ServiceStatus.success, message="Команда выполнена успешно", data=data)
         except Exception as e:
             self.logger.error(f"Ошибка SSH подключения к Proxmox: {e}")
-            return ServiceResponse(status=ServiceStatus.error, message="Ошибка SSH подключения к Proxmox", error=str(e))
\ No newline at end of file
+            return ServiceResponse(status=ServiceStatus.error, message="Ошибка SSH подключения к Proxmox", error=str(e))
+
+    async def get_qm_list(self) -> ServiceResponse:
+        """Список VM на узле (qm list), разобранный в записи"""
+        return await readonly_commands.query("pve_qm_list")
+
+    async def get_storage_status(self) -> ServiceResponse:
+        """Состояние хранилищ (pvesm status), разобранное в записи"""
+        return await readonly_commands.query("pve_storage")
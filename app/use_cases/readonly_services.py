@@ -0,0 +1,101 @@
+# use_cases/readonly_services.py
+from dataclasses import dataclass
+from typing import Callable, Literal
+from app.infrastructure.ssh_client import AsyncSSHClient
+from app.infrastructure.parsers import parse_routeros_terse, parse_table
+from app.core.cache import TTLCache
+from app.core.shared_state import shared_store
+from app.core.response import ServiceResponse, ServiceStatus
+from app.core.settings import settings
+import logging
+logger = logging.getLogger(__name__)
+
+Target = Literal["mikrotik", "pve"]
+
+
+@dataclass(frozen=True)
+class ReadOnlyCommand:
+    """Разрешённая read-only команда: результат можно безопасно кешировать на ttl секунд"""
+    target: Target
+    command: str
+    ttl: float
+    parser: Callable[[list[str]], list[dict]] | None = None
+
+
+# Типизированные запросы (имя -> команда с разбором вывода)
+TYPED_COMMANDS: dict[str, ReadOnlyCommand] = {
+    "mikrotik_interfaces": ReadOnlyCommand("mikrotik", "/interface print terse without-paging", 10, parse_routeros_terse),
+    "mikrotik_dhcp_leases": ReadOnlyCommand("mikrotik", "/ip dhcp-server lease print terse without-paging", 30, parse_routeros_terse),
+    "pve_qm_list": ReadOnlyCommand("pve", "qm list", 5, parse_table),
+    "pve_storage": ReadOnlyCommand("pve", "pvesm status", 30, parse_table),
+}
+
+# Все команды, вывод которых отдаётся из кеша и через /mikro/run_command, /prox/connect_ssh
+READONLY_COMMANDS: dict[tuple[str, str], ReadOnlyCommand] = {
+    (c.target, c.command): c for c in [
+        *TYPED_COMMANDS.values(),
+        ReadOnlyCommand("mikrotik", "/interface print", 10),
+        ReadOnlyCommand("mikrotik", "/ip dhcp-server lease print", 30),
+        ReadOnlyCommand("mikrotik", "/ip address print", 30),
+        ReadOnlyCommand("mikrotik", "/system resource print", 5),
+        ReadOnlyCommand("pve", "pveversion", 300),
+    ]
+}
+
+
+def normalize_command(command: str) -> str:
+    return " ".join(command.split())
+
+
+class ReadOnlyCommandService:
+    """Слой read-only команд по SSH: кеш с TTL на команду, объединение одновременных одинаковых запросов
+    в одну SSH-сессию и разбор табличного вывода в записи"""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        self.cache = TTLCache(maxsize=256, shared=shared_store, namespace="readonly")
+
+    def lookup(self, target: Target, command: str) -> ReadOnlyCommand | None:
+        """Команда из списка разрешённых или None"""
+        return READONLY_COMMANDS.get((target, normalize_command(command)))
+
+    def _client(self, target: Target) -> AsyncSSHClient:
+        if target == "mikrotik":
+            return AsyncSSHClient(settings.MIKROTIK_HOST, settings.MIKROTIK_USER, settings.MIKROTIK_PASSWORD,
+                                  self.logger, port=int(settings.MIKROTIK_PORT))
+        return AsyncSSHClient(settings.PVE_HOST_IP, settings.PVE_USER, settings.PVE_PASSWORD, self.logger, port=settings.PVE_SSH_PORT)
+
+    async def _execute(self, target: Target, command: str) -> list[str]:
+        async with self._client(target) as client:
+            return await client.run_command(command)
+
+    async def run_lines(self, spec: ReadOnlyCommand) -> tuple[list[str], bool, float]:
+        """Строки вывода команды: (строки, из кеша ли, возраст)"""
+        return await self.cache.get_or_load(
+            ("lines", spec.target, spec.command),
+            lambda: self._execute(spec.target, spec.command),
+            spec.ttl,
+        )
+
+    async def run_records(self, spec: ReadOnlyCommand) -> tuple[list[dict], bool, float]:
+        """Разобранные записи команды: (записи, из кеша ли, возраст)"""
+        async def load() -> list[dict]:
+            lines, _, _ = await self.run_lines(spec)
+            return spec.parser(lines)
+        return await self.cache.get_or_load(("records", spec.target, spec.command), load, spec.ttl)
+
+    async def query(self, name: str) -> ServiceResponse:
+        """Типизированный запрос по имени из TYPED_COMMANDS"""
+        spec = TYPED_COMMANDS.get(name)
+        if spec is None:
+            return ServiceResponse(status=ServiceStatus.not_found, message="Неизвестный запрос", error=name)
+        try:
+            records, cached, age = await self.run_records(spec)
+            return ServiceResponse(status=ServiceStatus.success, message=f"Результат '{spec.command}'",
+                                   data={"records": records, "count": len(records), "cached": cached, "age_seconds": round(age, 1)})
+        except Exception as e:
+            self.logger.error(f"Ошибка выполнения read-only команды '{spec.command}': {e}")
+            return ServiceResponse(status=ServiceStatus.error, message=f"Ошибка выполнения '{spec.command}'", error=str(e))
+
+
+readonly_commands = ReadOnlyCommandService(logger)
@@ -0,0 +1,271 @@
+# use_cases/scheduler.py
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
+from zoneinfo import ZoneInfo
+from app.domain.schedule import Schedule, MisfirePolicy
+from app.infrastructure.prox_api_client import ProxmoxAPIClient
+from app.infrastructure.schedule_store import ScheduleStore
+from app.use_cases.prox_services import ProxmoxService
+from app.use_cases.mikro_services import MikrotikService
+from app.core.response import ServiceResponse, ServiceStatus
+from app.core.shared_state import shared_store
+from app.core.settings import settings
+import logging
+logger = logging.getLogger(__name__)
+
+# как часто лидер проверяет версию расписаний (изменения из других воркеров);
+# заодно цикл не зависит от скачков системных часов
+SYNC_INTERVAL = 2.0
+
+
+class SchedulerService:
+    """Планировщик операций питания по cron-расписанию.
+    Один цикл на все расписания: куча (next_run, id), сон до ближайшего срабатывания.
+    Расписания хранятся в общем хранилище, пропущенные за время простоя запуски обрабатываются по misfire_policy.
+    Цикл работает только в процессе-лидере; добавлять и удалять расписания можно из любого воркера."""
+
+    def __init__(self, logger: logging.Logger, store: ScheduleStore | None = None):
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        self.tz = ZoneInfo(settings.TIMEZONE)
+        self.store = store or ScheduleStore(shared_store, self.logger)
+        self.schedules: dict[str, Schedule] = {}
+        self._version = 0
+        self._heap: list[tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._loop_task: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+        self.actions: dict[str, Callable[[dict], Awaitable[ServiceResponse]]] = {
+            "wol": self._action_wol,
+            "mikrotik_wol": self._action_mikrotik_wol,
+            "start_all_vms": self._action_start_all_vms,
+            "wake_and_start": self._action_wake_and_start,
+            "shutdown": self._action_shutdown,
+        }
+
+    # --- действия ---
+    def _proxmox(self) -> ProxmoxService:
+        return ProxmoxService(api_client=ProxmoxAPIClient(logger=self.logger), logger=self.logger)
+
+    async def _action_wol(self, params: dict) -> ServiceResponse:
+        return await self._proxmox().send_wol()
+
+    async def _action_mikrotik_wol(self, params: dict) -> ServiceResponse:
+        return await MikrotikService(self.logger).wake_proxmox()
+
+    async def _action_start_all_vms(self, params: dict) -> ServiceResponse:
+        return await self._proxmox().start_all_vms()
+
+    async def _action_wake_and_start(self, params: dict) -> ServiceResponse:
+        """WOL, ожидание доступности API (boot_timeout сек), затем запуск всех VM"""
+        service = self._proxmox()
+        wol = await service.send_wol()
+        if wol.status != ServiceStatus.success:
+            return wol
+        deadline = time.monotonic() + int(params.get("boot_timeout", 600))
+        while time.monotonic() < deadline:
+            if (await service.check_connection()).status == ServiceStatus.success:
+                return await service.start_all_vms()
+            await asyncio.sleep(10)
+        return ServiceResponse(status=ServiceStatus.timeout, message="Proxmox не поднялся после WOL", error="boot_timeout")
+
+    async def _action_shutdown(self, params: dict) -> ServiceResponse:
+        return await self._proxmox().shutdown_server(0)
+
+    # --- жизненный цикл ---
+    async def start(self) -> None:
+        """Загрузка расписаний, обработка пропущенных запусков и старт цикла (вызывается в лидере)"""
+        if self._loop_task and not self._loop_task.done():
+            return
+        self._version = await asyncio.to_thread(self.store.version)
+        self.schedules = await asyncio.to_thread(self.store.load)
+        now = time.time()
+        for schedule in list(self.schedules.values()):
+            if schedule.enabled:
+                before = schedule.to_dict()
+                self._plan_after_downtime(schedule, now)
+                if schedule.id not in self.schedules:
+                    await asyncio.to_thread(self.store.delete, schedule.id)
+                elif schedule.to_dict() != before:
+                    await asyncio.to_thread(self.store.save, schedule)
+        self._rebuild_heap()
+        self._loop_task = asyncio.create_task(self._loop(), name="scheduler-loop")
+        self.logger.info(f"Планировщик запущен, расписаний: {len(self.schedules)}")
+
+    async def stop(self) -> None:
+        if self._loop_task:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+
+    def _plan_after_downtime(self, schedule: Schedule, now: float) -> None:
+        """Определяет next_run с учётом запусков, пропущенных пока сервис был выключен"""
+        if schedule.one_shot and schedule.last_run is not None:
+            self.schedules.pop(schedule.id, None)  # разовая задача уже запускалась до рестарта
+            return
+        reference = schedule.last_run or schedule.created_at or now
+        due = schedule.next_fire(datetime.fromtimestamp(reference, self.tz), self.tz)
+        if due is None or due >= now:
+            schedule.next_run = due
+            return
+        # опоздание считаем от последнего пропущенного срабатывания, а не от первого: после простоя в несколько
+        # дней сегодняшний запуск может быть ещё в пределах misfire_grace. Ищем его только в окне grace —
+        # более ранние всё равно опоздали сильнее
+        latest = due if schedule.one_shot else None
+        cursor = None if schedule.one_shot else \
+            schedule.next_fire(datetime.fromtimestamp(max(reference, now - schedule.misfire_grace), self.tz), self.tz)
+        while cursor is not None and cursor <= now:
+            latest = cursor
+            cursor = schedule.next_fire(datetime.fromtimestamp(cursor, self.tz), self.tz)
+        late = now - (latest if latest is not None else due)
+        if schedule.misfire_policy == MisfirePolicy.run_once and latest is not None and late <= schedule.misfire_grace:
+            self.logger.info(f"Расписание {schedule.id} ({schedule.action}) пропущено на {int(late)} сек — выполняем сейчас")
+            schedule.next_run = now
+        else:
+            self.logger.warning(f"Расписание {schedule.id} ({schedule.action}) пропущено на {int(late)} сек — пропускаем")
+            if schedule.one_shot:
+                self.schedules.pop(schedule.id, None)
+            else:
+                schedule.next_run = schedule.next_fire(datetime.now(self.tz), self.tz)
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(s.next_run, next(self._seq), s.id) for s in self.schedules.values() if s.enabled and s.next_run is not None]
+        heapq.heapify(self._heap)
+
+    def _push(self, schedule: Schedule) -> None:
+        if schedule.enabled and schedule.next_run is not None:
+            heapq.heappush(self._heap, (schedule.next_run, next(self._seq), schedule.id))
+        self._wakeup.set()
+
+    def _sync(self) -> None:
+        """Перечитывает расписания, если их изменили (в т.ч. другие воркеры)"""
+        version = self.store.version()
+        if version != self._version:
+            self._version = version
+            self.schedules = self.store.load()
+            self._rebuild_heap()
+
+    async def _loop(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self._sync)
+            except Exception as e:
+                self.logger.error(f"Не удалось синхронизировать расписания: {e}")
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                due, _, schedule_id = heapq.heappop(self._heap)
+                schedule = self.schedules.get(schedule_id)
+                # ленивое удаление: запись устарела, если расписание удалено, выключено или перепланировано
+                if schedule is None or not schedule.enabled or schedule.next_run != due:
+                    continue
+                await self._fire(schedule, now)
+            delay = min(self._heap[0][0] - now, SYNC_INTERVAL) if self._heap else SYNC_INTERVAL
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, schedule: Schedule, now: float) -> None:
+        schedule.last_run = now
+        schedule.next_run = schedule.next_fire(datetime.fromtimestamp(now, self.tz), self.tz)
+        # сохраняем до запуска: после рестарта или перечитывания задача не должна выполниться повторно
+        await self._save(schedule)
+        self._push(schedule)
+        task = asyncio.create_task(self._execute(schedule), name=f"schedule-{schedule.id}")
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _execute(self, schedule: Schedule) -> None:
+        self.logger.info(f"Запуск по расписанию {schedule.id}: {schedule.action} {schedule.name}")
+        try:
+            result = await self.actions[schedule.action](schedule.params)
+            status = result.status.value if isinstance(result.status, ServiceStatus) else str(result.status)
+            error = result.error
+        except Exception as e:
+            self.logger.error(f"Ошибка выполнения расписания {schedule.id} ({schedule.action}): {e}")
+            status, error = ServiceStatus.error.value, str(e)
+        if schedule.one_shot:
+            self.schedules.pop(schedule.id, None)
+            await asyncio.to_thread(self.store.delete, schedule.id)
+            return
+        # действие могло идти долго: пока оно выполнялось, расписание могли изменить (run_now, правка из другого
+        # воркера). Записываем только результат поверх свежей записи, а не весь объект, снятый до запуска
+        try:
+            fresh, version = await asyncio.to_thread(self.store.patch, schedule.id, last_status=status, last_error=error)
+        except Exception as e:
+            self.logger.error(f"Не удалось сохранить результат расписания {schedule.id}: {e}")
+            return
+        if fresh is not None:
+            self._own_version(version)
+            current = self.schedules.get(schedule.id)
+            if current is not None:
+                current.last_status, current.last_error = status, error
+
+    def _own_version(self, version: int) -> None:
+        """Версия, которую записали мы сами, не требует перечитывания в _sync.
+        Если между нашим чтением и записью были чужие изменения (версия прыгнула больше чем на 1) — перечитаем"""
+        if version == self._version + 1:
+            self._version = version
+
+    async def _save(self, schedule: Schedule) -> None:
+        try:
+            self._own_version(await asyncio.to_thread(self.store.save, schedule))
+        except Exception as e:
+            self.logger.error(f"Не удалось сохранить расписание {schedule.id}: {e}")
+
+    # --- управление ---
+    def view(self, schedule: Schedule) -> dict:
+        data = schedule.to_dict()
+        for key in ("run_at", "created_at", "last_run", "next_run"):
+            if data.get(key):
+                data[key] = datetime.fromtimestamp(data[key], self.tz).isoformat()
+        return data
+
+    async def list(self) -> ServiceResponse:
+        schedules = sorted((await asyncio.to_thread(self.store.load)).values(), key=lambda s: s.next_run or float("inf"))
+        return ServiceResponse(status=ServiceStatus.success, message="Список расписаний", data={"schedules": [self.view(s) for s in schedules]})
+
+    async def add(self, schedule: Schedule) -> ServiceResponse:
+        if schedule.action not in self.actions:
+            return ServiceResponse(status=ServiceStatus.error, message="Неизвестное действие",
+                                   error=f"action должен быть одним из: {', '.join(self.actions)}")
+        now = time.time()
+        schedule.created_at = now
+        schedule.next_run = schedule.next_fire(datetime.fromtimestamp(now, self.tz), self.tz)
+        if schedule.one_shot and schedule.next_run is not None and schedule.next_run < now:
+            schedule.next_run = now
+        await asyncio.to_thread(self.store.save, schedule)
+        self._wakeup.set()
+        self.logger.info(f"Добавлено расписание {schedule.id}: {schedule.action} cron={schedule.cron} run_at={schedule.run_at}")
+        return ServiceResponse(status=ServiceStatus.success, message="Расписание добавлено", data=self.view(schedule))
+
+    async def remove(self, schedule_id: str) -> ServiceResponse:
+        schedule = await asyncio.to_thread(self.store.get, schedule_id)
+        if schedule is None or not await asyncio.to_thread(self.store.delete, schedule_id):
+            return ServiceResponse(status=ServiceStatus.not_found, message="Расписание не найдено", error=schedule_id)
+        self._wakeup.set()
+        return ServiceResponse(status=ServiceStatus.success, message="Расписание удалено", data=self.view(schedule))
+
+    async def run_now(self, schedule_id: str) -> ServiceResponse:
+        schedule = await asyncio.to_thread(self.store.get, schedule_id)
+        if schedule is None:
+            return ServiceResponse(status=ServiceStatus.not_found, message="Расписание не найдено", error=schedule_id)
+        if not schedule.enabled:
+            # выключенное расписание цикл не запускает: next_run сохранился бы, а действие не выполнилось
+            return ServiceResponse(status=ServiceStatus.warning, message="Расписание выключено, запуск невозможен",
+                                   data=self.view(schedule))
+        schedule.next_run = time.time()
+        await asyncio.to_thread(self.store.save, schedule)
+        self._wakeup.set()
+        return ServiceResponse(status=ServiceStatus.success, message="Расписание поставлено на немедленный запуск", data=self.view(schedule))
+
+
+scheduler = SchedulerService(logger)
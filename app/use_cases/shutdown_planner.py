@@ -0,0 +1,176 @@
+# use_cases/shutdown_planner.py
+import asyncio
+import time
+from dataclasses import dataclass
+from app.domain.vm import parse_tags
+from app.infrastructure.prox_api_client import ProxmoxAPIClient
+from app.core.settings import settings
+import logging
+
+
+@dataclass
+class ShutdownPhase:
+    """Фаза выключения: VM с любым из тегов (пустой набор — все не попавшие в другие фазы)"""
+    name: str
+    tags: frozenset[str] = frozenset()
+    concurrency: int = 4        # сколько VM выключается одновременно
+    timeout: float = 120        # ожидание корректного выключения одной VM, сек
+    stop_timeout: float = 30    # ожидание после принудительного stop, сек
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ShutdownPhase":
+        return cls(
+            name=data["name"],
+            tags=frozenset(t.lower() for t in data.get("tags", [])),
+            concurrency=int(data.get("concurrency", 4)),
+            timeout=float(data.get("timeout", 120)),
+            stop_timeout=float(data.get("stop_timeout", 30)),
+        )
+
+
+# Сначала приложения, затем базы данных, в конце хранилища и сетевые VM
+DEFAULT_PHASES = [
+    ShutdownPhase("apps", frozenset(), concurrency=8, timeout=120),
+    ShutdownPhase("databases", frozenset({"db", "database"}), concurrency=4, timeout=180),
+    ShutdownPhase("infrastructure", frozenset({"storage", "nas", "router"}), concurrency=2, timeout=180),
+]
+
+
+@dataclass
+class VMShutdownResult:
+    vmid: int
+    name: str
+    node: str
+    phase: str
+    result: str = "pending"     # already_stopped | shutdown | forced_stop | failed
+    error: str | None = None
+    elapsed: float | None = None
+
+    def to_dict(self) -> dict:
+        return {"vmid": self.vmid, "name": self.name, "node": self.node, "phase": self.phase,
+                "result": self.result, "error": self.error, "elapsed": self.elapsed}
+
+
+class StatusWatcher:
+    """Один опрос cluster/resources на всех ожидающих: VM считается выключенной, когда её статус не running"""
+
+    def __init__(self, client: ProxmoxAPIClient, interval: float, logger: logging.Logger):
+        self.client = client
+        self.interval = interval
+        self.logger = logger
+        self._events: dict[int, asyncio.Event] = {}
+        self._task: asyncio.Task | None = None
+
+    def stopped(self, vmid: int) -> asyncio.Event:
+        if vmid not in self._events:
+            self._events[vmid] = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+        return self._events[vmid]
+
+    async def _poll(self) -> None:
+        delay = min(0.5, self.interval)  # короткие выключения замечаем быстро, дальше опрос реже
+        while any(not e.is_set() for e in self._events.values()):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.interval)
+            try:
+                vms = await self.client.get_vms()
+            except Exception as e:
+                self.logger.warning(f"Ошибка опроса статусов VM: {e}")
+                continue
+            status = {vm["vmid"]: vm.get("status") for vm in vms}
+            for vmid, event in self._events.items():
+                if status.get(vmid, "stopped") != "running":
+                    event.set()
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class ShutdownPlanner:
+    """Упорядоченное выключение: фазы идут последовательно, внутри фазы — параллельно с ограничением.
+    VM, не выключившиеся за timeout, принудительно останавливаются (status/stop).
+    В конце узлы выключаются через API."""
+
+    def __init__(self, client: ProxmoxAPIClient, logger: logging.Logger, phases: list[ShutdownPhase] | None = None,
+                 poll_interval: float = 2.0):
+        self.client = client
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        if phases is None:
+            phases = [ShutdownPhase.from_dict(p) for p in settings.SHUTDOWN_PHASES] or DEFAULT_PHASES
+        self.phases = phases
+        self.poll_interval = poll_interval
+
+    def plan(self, vms: list[dict]) -> list[tuple[ShutdownPhase, list[dict]]]:
+        """Распределение VM по фазам: первая фаза с пересекающимися тегами, иначе фаза без тегов (или последняя)"""
+        tagged = [p for p in self.phases if p.tags]
+        fallback = next((p for p in self.phases if not p.tags), self.phases[-1])
+        buckets: dict[str, list[dict]] = {p.name: [] for p in self.phases}
+        for vm in vms:
+            tags = parse_tags(vm.get("tags"))
+            phase = next((p for p in tagged if p.tags & tags), fallback)
+            buckets[phase.name].append(vm)
+        return [(p, buckets[p.name]) for p in self.phases]
+
+    async def _shutdown_one(self, vm: dict, phase: ShutdownPhase, watcher: StatusWatcher,
+                            semaphore: asyncio.Semaphore) -> VMShutdownResult:
+        result = VMShutdownResult(vm["vmid"], vm.get("name", ""), vm["node"], phase.name)
+        if vm.get("status") != "running":
+            result.result = "already_stopped"
+            return result
+        kind = vm.get("type", "qemu")
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                await self.client.shutdown_vm(vm["vmid"], vm["node"], kind)
+                await asyncio.wait_for(watcher.stopped(vm["vmid"]).wait(), timeout=phase.timeout)
+                result.result = "shutdown"
+            except Exception as e:
+                reason = "таймаут" if isinstance(e, asyncio.TimeoutError) else str(e)
+                self.logger.warning(f"VM {vm['vmid']} не выключилась корректно ({reason}) — принудительная остановка")
+                try:
+                    await self.client.stop_vm(vm["vmid"], vm["node"], kind)
+                    await asyncio.wait_for(watcher.stopped(vm["vmid"]).wait(), timeout=phase.stop_timeout)
+                    result.result = "forced_stop"
+                except Exception as stop_error:
+                    result.result = "failed"
+                    result.error = "таймаут stop" if isinstance(stop_error, asyncio.TimeoutError) else str(stop_error)
+            result.elapsed = round(time.monotonic() - start, 1)
+        return result
+
+    async def shutdown_vms(self) -> dict:
+        """Выключение всех VM по фазам. Возвращает отчёт по фазам"""
+        vms = await self.client.get_vms()
+        watcher = StatusWatcher(self.client, self.poll_interval, self.logger)
+        report = []
+        try:
+            for phase, phase_vms in self.plan(vms):
+                if not phase_vms:
+                    continue
+                self.logger.info(f"Фаза выключения '{phase.name}': {len(phase_vms)} VM, параллельно {phase.concurrency}")
+                start = time.monotonic()
+                semaphore = asyncio.Semaphore(phase.concurrency)
+                results = await asyncio.gather(*(self._shutdown_one(vm, phase, watcher, semaphore) for vm in phase_vms))
+                report.append({"phase": phase.name, "elapsed": round(time.monotonic() - start, 1),
+                               "vms": [r.to_dict() for r in results]})
+        finally:
+            await watcher.close()
+        failed = [vm for phase in report for vm in phase["vms"] if vm["result"] == "failed"]
+        return {"phases": report, "failed": failed}
+
+    async def shutdown_nodes(self, nodes: list[str]) -> dict[str, str | None]:
+        """Выключение узлов через API. Возвращает {узел: ошибка или None}"""
+        results: dict[str, str | None] = {}
+
+        async def shutdown(node: str) -> None:
+            try:
+                await self.client.shutdown_server(node)
+                results[node] = None
+            except Exception as e:
+                self.logger.error(f"Не удалось выключить узел {node}: {e}")
+                results[node] = str(e)
+
+        await asyncio.gather(*(shutdown(node) for node in nodes))
+        return results
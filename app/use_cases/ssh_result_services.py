@@ -0,0 +1,181 @@
+# use_cases/ssh_result_services.py
+import asyncio
+import bisect
+import gzip
+import time
+import uuid
+from enum import Enum
+from pathlib import Path
+from typing import AsyncGenerator
+from app.infrastructure.output_spool import OutputSpool
+from app.infrastructure.ssh_client import AsyncSSHClient
+from app.core.response import ServiceResponse, ServiceStatus
+from app.core.shared_state import shared_store
+from app.core.settings import settings
+import logging
+logger = logging.getLogger(__name__)
+
+RESULT_PREFIX = "ssh_result:"
+RANGE_MAX_BYTES = 1024 * 1024   # максимум байт в одном ответе /ssh/results/{id}/range
+DOWNLOAD_CHUNK = 64 * 1024
+PURGE_INTERVAL = 60.0           # не чаще этого удаляются файлы с истёкшим сроком хранения, сек
+
+
+class OutputMode(str, Enum):
+    inline = "inline"   # вывод в ответе; больше SSH_INLINE_MAX_BYTES — обрезается
+    auto = "auto"       # вывод в ответе, если помещается в SSH_INLINE_MAX_BYTES, иначе — сохранённый результат
+    spool = "spool"     # всегда сохранённый результат (файл + ссылка), в ответе только начало вывода
+
+
+def _lines(data: bytes) -> list[str]:
+    return [line for line in data.decode(errors="replace").splitlines() if line]
+
+
+class SSHResultService:
+    """Выполнение SSH-команд с ограниченным расходом памяти.
+    Вывод читается кусками в OutputSpool; если он больше SSH_INLINE_MAX_BYTES, то уходит в файл
+    DATA_DIR/ssh_results (gzip), а метаданные — в shared_store со сроком SSH_RESULT_TTL,
+    так что результат доступен из любого воркера по result_id (range/download)."""
+
+    def __init__(self, logger: logging.Logger, directory: Path | None = None):
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        self.directory = directory or Path(settings.DATA_DIR) / "ssh_results"
+        self._purged_at = 0.0
+
+    async def execute(self, client: AsyncSSHClient, target: str, command: str, mode: OutputMode) -> dict:
+        """Выполняет команду на подключённом клиенте. Возвращает data для ServiceResponse:
+        {"result": [...]} при выводе в ответе или {"result_id", "head": [...]} при сохранённом результате"""
+        result_id = uuid.uuid4().hex
+        suffix = ".out.gz" if settings.SSH_RESULT_COMPRESS else ".out"
+        inline = mode == OutputMode.inline
+        spool = OutputSpool(self.directory / f"{result_id}{suffix}", threshold=settings.SSH_INLINE_MAX_BYTES,
+                            compress=settings.SSH_RESULT_COMPRESS)
+        max_bytes = settings.SSH_INLINE_MAX_BYTES if inline else settings.SSH_OUTPUT_MAX_BYTES
+        try:
+            info = await client.execute_command_to(command, spool.write, max_bytes, settings.SSH_COMMAND_TIMEOUT)
+        except BaseException:
+            await spool.discard()
+            raise
+        limits = {"exit_status": info["exit_status"], "truncated": info["truncated"], "timed_out": info["timed_out"]}
+        if mode != OutputMode.spool and not spool.spilled:
+            result = _lines(spool.getvalue())
+            await spool.discard()
+            return {"result": result, **limits}
+
+        await spool.persist()
+        meta = {
+            "id": result_id,
+            "target": target,
+            "command": command,
+            "file": spool.path.name,
+            "compressed": spool.compress,
+            "index": spool.index,
+            "bytes": spool.size,
+            "created_at": time.time(),
+            "expires_at": time.time() + settings.SSH_RESULT_TTL,
+            "stderr": info["stderr"],
+            **limits,
+        }
+        await asyncio.to_thread(shared_store.set, RESULT_PREFIX + result_id, meta, settings.SSH_RESULT_TTL)
+        self.logger.info(f"Вывод команды '{command}' ({spool.size} байт) сохранён как {result_id}")
+        await self.purge()
+        head = bytes(spool.head)
+        if spool.size > len(head):
+            head = head[:head.rfind(b"\n") + 1]  # без оборванной последней строки
+        return {"result_id": result_id, "bytes": spool.size, "head": _lines(head), **limits}
+
+    async def meta(self, result_id: str) -> dict | None:
+        return await asyncio.to_thread(shared_store.get, RESULT_PREFIX + result_id)
+
+    async def info(self, result_id: str) -> ServiceResponse:
+        meta = await self.meta(result_id)
+        if meta is None:
+            return ServiceResponse(status=ServiceStatus.error, message="Результат не найден или срок хранения истёк", error=result_id)
+        return ServiceResponse(status=ServiceStatus.success, message="Сохранённый вывод команды",
+                               data={k: v for k, v in meta.items() if k != "index"})
+
+    def _read_range(self, meta: dict, offset: int, length: int) -> tuple[bytes, bool]:
+        with open(self.directory / meta["file"], "rb") as raw:
+            if not meta["compressed"]:
+                raw.seek(offset)
+                data = raw.read(length)
+            else:
+                # распаковка с начала gzip-члена, содержащего offset, а не с начала файла
+                index = meta.get("index") or [(0, 0)]
+                i = max(bisect.bisect_right([start for start, _ in index], offset) - 1, 0)
+                start, position = index[i]
+                raw.seek(position)
+                with gzip.GzipFile(fileobj=raw, mode="rb") as f:
+                    f.seek(offset - start)
+                    data = f.read(length)
+        eof = offset + len(data) >= meta["bytes"]
+        if not eof and b"\n" in data:
+            data = data[:data.rfind(b"\n") + 1]  # граница по строке: следующий запрос начнётся с целой строки
+        return data, eof
+
+    async def read_range(self, result_id: str, offset: int, length: int) -> ServiceResponse:
+        """Строки из диапазона байт [offset, offset + length), выровненного по концу строки"""
+        meta = await self.meta(result_id)
+        if meta is None:
+            return ServiceResponse(status=ServiceStatus.error, message="Результат не найден или срок хранения истёк", error=result_id)
+        try:
+            data, eof = await asyncio.to_thread(self._read_range, meta, offset, min(length, RANGE_MAX_BYTES))
+        except OSError as e:
+            self.logger.error(f"Ошибка чтения результата {result_id}: {e}")
+            return ServiceResponse(status=ServiceStatus.error, message="Ошибка чтения результата", error=str(e))
+        return ServiceResponse(status=ServiceStatus.success, message="Фрагмент вывода команды", data={
+            "offset": offset,
+            "next_offset": offset + len(data),
+            "eof": eof,
+            "bytes": meta["bytes"],
+            "lines": _lines(data),
+        })
+
+    async def open_file(self, meta: dict, raw: bool):
+        """Открывает файл результата; raw=True — как есть (gzip без распаковки). Нет файла — FileNotFoundError"""
+        return await asyncio.to_thread(open if raw or not meta["compressed"] else gzip.open,
+                                       self.directory / meta["file"], "rb")
+
+    @staticmethod
+    async def iter_file(f) -> AsyncGenerator[bytes, None]:
+        """Содержимое открытого файла результата кусками; файл закрывается по окончании"""
+        try:
+            while chunk := await asyncio.to_thread(f.read, DOWNLOAD_CHUNK):
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def delete(self, result_id: str) -> ServiceResponse:
+        meta = await self.meta(result_id)
+        if meta is None:
+            return ServiceResponse(status=ServiceStatus.error, message="Результат не найден или срок хранения истёк", error=result_id)
+        await asyncio.to_thread(shared_store.delete, RESULT_PREFIX + result_id)
+        (self.directory / meta["file"]).unlink(missing_ok=True)
+        return ServiceResponse(status=ServiceStatus.success, message="Результат удалён", data={"id": result_id})
+
+    def _purge_sync(self) -> int:
+        live = {meta["file"] for meta in shared_store.items(RESULT_PREFIX).values()}
+        removed = 0
+        for path in self.directory.glob("*.out*"):
+            # файл без записи в shared_store: срок хранения истёк либо команда ещё выполняется —
+            # последние не старше SSH_COMMAND_TIMEOUT
+            if path.name not in live and time.time() - path.stat().st_mtime > settings.SSH_COMMAND_TIMEOUT + PURGE_INTERVAL:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    async def purge(self) -> None:
+        """Удаляет файлы результатов с истёкшим сроком хранения (не чаще раза в PURGE_INTERVAL)"""
+        if time.monotonic() - self._purged_at < PURGE_INTERVAL:
+            return
+        self._purged_at = time.monotonic()
+        try:
+            removed = await asyncio.to_thread(self._purge_sync)
+        except OSError as e:
+            self.logger.warning(f"Ошибка очистки сохранённых результатов: {e}")
+            return
+        if removed:
+            self.logger.info(f"Удалено просроченных результатов команд: {removed}")
+
+
+ssh_results = SSHResultService(logger)
@@ -0,0 +1,172 @@
+# use_cases/task_log_services.py
+import asyncio
+import json
+from typing import AsyncGenerator, Awaitable, Callable
+from app.infrastructure.prox_api_client import ProxmoxAPIClient
+from app.core.settings import settings
+import logging
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 500             # строк за один запрос к /tasks/{upid}/log
+HEARTBEAT_INTERVAL = 15.0   # комментарий SSE, если новых строк нет (и проверка отключения клиента)
+MAX_ERRORS = 3              # подряд неудачных опросов до завершения потока с ошибкой
+PLACEHOLDERS = ("no content", "unable to open file")  # заглушки Proxmox, пока лог задачи пуст
+
+
+def node_from_upid(upid: str) -> str:
+    """UPID:<node>:<pid>:<pstart>:<starttime>:<type>:<id>:<user>: — узел, на котором выполняется задача"""
+    parts = upid.split(":")
+    if len(parts) < 8 or parts[0] != "UPID" or not parts[1]:
+        raise ValueError(f"Некорректный UPID: '{upid}'")
+    return parts[1]
+
+
+def _sse(data: dict, event: str | None = None, event_id: int | None = None) -> str:
+    head = (f"event: {event}\n" if event else "") + (f"id: {event_id}\n" if event_id is not None else "")
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class TaskLogFollower:
+    """Один опрос лога задачи на всех подписчиков.
+    Запрашиваются только новые строки (start = уже полученное количество); интервал опроса растёт
+    от TASK_LOG_POLL_MIN до TASK_LOG_POLL_MAX, пока новых строк нет. Завершается, когда задача остановлена."""
+
+    def __init__(self, client: ProxmoxAPIClient, upid: str, node: str, logger: logging.Logger):
+        self.client = client
+        self.upid = upid
+        self.node = node
+        self.logger = logger
+        self.lines: list[str] = []
+        self.offset = 0                 # номер первой строки в self.lines (старые вытесняются после TASK_LOG_MAX_LINES)
+        self.status: dict | None = None
+        self.error: str | None = None
+        self.done = False
+        self.subscribers = 0
+        self.updated = asyncio.Event()  # заменяется новым при каждом обновлении
+        self._task: asyncio.Task | None = None
+
+    @property
+    def received(self) -> int:
+        return self.offset + len(self.lines)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    def _notify(self) -> None:
+        event, self.updated = self.updated, asyncio.Event()
+        event.set()
+
+    async def _fetch_new(self, finished: bool) -> int:
+        """Догружает строки после уже полученных. Возвращает количество новых"""
+        added = 0
+        while True:
+            items, _ = await self.client.get_task_log(self.upid, self.node, self.received, PAGE_SIZE)
+            new = [item for item in items if int(item.get("n", 0)) > self.received]
+            if (not finished and self.received == 0 and len(new) == 1
+                    and str(new[0].get("t", "")).startswith(PLACEHOLDERS)):
+                return added  # лог ещё не создан: заглушку не считаем строкой, иначе потеряем настоящую первую
+            before = self.received
+            for item in sorted(new, key=lambda i: int(i["n"])):
+                if int(item["n"]) == self.received + 1:
+                    self.lines.append(str(item.get("t", "")))
+            count = self.received - before
+            if not count:
+                return added
+            added += count
+            excess = len(self.lines) - settings.TASK_LOG_MAX_LINES
+            if excess > 0:
+                del self.lines[:excess]
+                self.offset += excess
+            self._notify()
+            if len(items) < PAGE_SIZE:
+                return added
+
+    async def _run(self) -> None:
+        delay = settings.TASK_LOG_POLL_MIN
+        errors = 0
+        while True:
+            try:
+                status = await self.client.get_task_status(self.upid, self.node)
+                finished = status.get("status") == "stopped"
+                added = await self._fetch_new(finished)
+                errors = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                errors += 1
+                self.logger.warning(f"Ошибка опроса лога задачи {self.upid} ({errors}/{MAX_ERRORS}): {e}")
+                if errors >= MAX_ERRORS:
+                    self.error, self.done = str(e), True
+                    self._notify()
+                    return
+                finished, added = False, 0
+            if finished:
+                self.status, self.done = status, True
+                self._notify()
+                return
+            delay = settings.TASK_LOG_POLL_MIN if added else min(delay * 1.5, settings.TASK_LOG_POLL_MAX)
+            await asyncio.sleep(delay)
+
+
+class TaskLogService:
+    """Потоковая выдача логов задач Proxmox (SSE). Подписчики одного UPID используют общий TaskLogFollower"""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        self.client = ProxmoxAPIClient(logger=self.logger)
+        self._followers: dict[str, TaskLogFollower] = {}
+
+    def _acquire(self, upid: str, node: str) -> TaskLogFollower:
+        follower = self._followers.get(upid)
+        if follower is None:
+            follower = self._followers[upid] = TaskLogFollower(self.client, upid, node, self.logger)
+            follower.start()
+            self.logger.info(f"Запущено отслеживание лога задачи {upid}")
+        follower.subscribers += 1
+        return follower
+
+    def _release(self, follower: TaskLogFollower) -> None:
+        follower.subscribers -= 1
+        if follower.subscribers <= 0:
+            follower.stop()
+            if self._followers.get(follower.upid) is follower:
+                del self._followers[follower.upid]
+
+    async def follow(self, upid: str, node: str, start: int,
+                     is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncGenerator[str, None]:
+        """SSE: строки лога начиная с номера start (id события — номер строки), затем event: end со статусом задачи"""
+        follower = self._acquire(upid, node)
+        position = start
+        try:
+            while True:
+                if position < follower.offset:
+                    yield _sse({"skipped": follower.offset - position}, event="truncated")
+                    position = follower.offset
+                updated = follower.updated
+                for text in follower.lines[position - follower.offset:]:
+                    position += 1
+                    yield _sse({"n": position, "t": text}, event_id=position)
+                if updated.is_set():
+                    continue  # пока отдавали строки, пришли новые
+                if follower.done:
+                    if follower.error:
+                        yield _sse({"error": follower.error}, event="error")
+                    else:
+                        yield _sse({"status": follower.status.get("status"),
+                                    "exitstatus": follower.status.get("exitstatus"), "lines": position}, event="end")
+                    return
+                try:
+                    await asyncio.wait_for(updated.wait(), timeout=HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        return
+                    yield ": ping\n\n"
+        finally:
+            self._release(follower)
+
+
+task_logs = TaskLogService(logger)
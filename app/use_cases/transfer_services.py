@@ -0,0 +1,241 @@
+# use_cases/transfer_services.py
+import asyncio
+import os
+import posixpath
+import time
+from pathlib import Path
+from app.domain.transfer import TransferDirection, TransferFile, TransferJob, TransferStatus
+from app.infrastructure.sftp_transfer import PipelinedSFTP
+from app.infrastructure.ssh_client import AsyncSSHClient
+from app.core.response import ServiceResponse, ServiceStatus
+from app.core.shared_state import shared_store
+from app.core.settings import settings
+import logging
+logger = logging.getLogger(__name__)
+
+JOB_PREFIX = "transfer:"
+CANCEL_PREFIX = "transfer_cancel:"  # отдельный ключ: периодическое сохранение задания не затрёт запрос отмены
+SAVE_INTERVAL = 1.0     # как часто прогресс задания пишется в shared_store (и проверяется запрос отмены), сек
+STALE_AFTER = 10.0      # задание без сохранений дольше этого считается брошенным (воркер остановлен), сек
+TARGETS = ("pve", "mikrotik")
+
+
+class TransferService:
+    """SFTP-передачи файлов между TRANSFER_DIR и Proxmox/Mikrotik (выгрузка /export, конфигов, vzdump).
+    Задание — несколько файлов по одному SSH-соединению: до TRANSFER_FILE_CONCURRENCY файлов одновременно,
+    каждый с конвейером блочных запросов (PipelinedSFTP). Файл пишется в .part и переименовывается в конце;
+    прерванное задание продолжается с уже переданного места (resume), если источник не изменился.
+    Записи заданий с прогрессом и скоростью — в shared_store, видны из всех воркеров."""
+
+    def __init__(self, logger: logging.Logger, directory: Path | None = None):
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        self.directory = (directory or Path(settings.TRANSFER_DIR or Path(settings.DATA_DIR) / "transfers")).resolve()
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def local_path(self, local: str) -> Path:
+        """Путь внутри TRANSFER_DIR; выход за его пределы (.., абсолютные пути, симлинки) — ValueError"""
+        path = (self.directory / local).resolve()
+        if path == self.directory or not path.is_relative_to(self.directory):
+            raise ValueError(f"Путь '{local}' вне каталога передач")
+        return path
+
+    @staticmethod
+    def _client(target: str, logger: logging.Logger) -> AsyncSSHClient:
+        if target == "pve":
+            return AsyncSSHClient(settings.PVE_HOST_IP, settings.PVE_USER, settings.PVE_PASSWORD, logger,
+                                  port=settings.PVE_SSH_PORT)
+        return AsyncSSHClient(settings.MIKROTIK_HOST, settings.MIKROTIK_USER, settings.MIKROTIK_PASSWORD, logger,
+                              port=int(settings.MIKROTIK_PORT))
+
+    async def _load(self, job_id: str) -> TransferJob | None:
+        data = await asyncio.to_thread(shared_store.get, JOB_PREFIX + job_id)
+        return TransferJob.from_dict(data) if data else None
+
+    def _save_sync(self, job: TransferJob) -> None:
+        job.updated_at = time.time()
+        shared_store.set(JOB_PREFIX + job.id, job.to_dict(), settings.TRANSFER_JOB_TTL)
+
+    async def _save(self, job: TransferJob) -> None:
+        await asyncio.to_thread(self._save_sync, job)
+
+    def _start(self, job: TransferJob) -> None:
+        self._tasks[job.id] = asyncio.create_task(self._run(job))
+
+    async def create(self, target: str, direction: TransferDirection, files: list[tuple[str, str | None]]) -> ServiceResponse:
+        """files — пары (удалённый путь, локальный путь относительно TRANSFER_DIR или None — имя удалённого файла)"""
+        try:
+            if target not in TARGETS:
+                raise ValueError(f"Неизвестный хост '{target}', доступны: {', '.join(TARGETS)}")
+            items = [TransferFile(remote=remote, local=local or posixpath.basename(remote.rstrip("/")))
+                     for remote, local in files]
+            paths = {self.local_path(item.local) for item in items}
+            if len(paths) != len(items):
+                raise ValueError("Несколько файлов задания указывают на один локальный путь")
+        except ValueError as e:
+            return ServiceResponse(status=ServiceStatus.error, message="Некорректное задание передачи", error=str(e))
+        job = TransferJob(target=target, direction=direction, files=items)
+        await self._save(job)
+        self._start(job)
+        self.logger.info(f"Задание передачи {job.id} создано: {direction.value} {target}, файлов: {len(items)}")
+        return ServiceResponse(status=ServiceStatus.success, message="Задание передачи создано", data=job.to_dict())
+
+    async def resume(self, job_id: str) -> ServiceResponse:
+        """Повторный запуск прерванного задания: готовые файлы пропускаются, остальные продолжаются с .part"""
+        job = await self._load(job_id)
+        if job is None:
+            return ServiceResponse(status=ServiceStatus.error, message="Задание не найдено", error=job_id)
+        if job.active:
+            return ServiceResponse(status=ServiceStatus.warning, message="Задание уже выполняется", data=job.to_dict())
+        if job.status == TransferStatus.done:
+            return ServiceResponse(status=ServiceStatus.warning, message="Задание уже завершено", data=job.to_dict())
+        job.status, job.error, job.finished_at = TransferStatus.pending, None, None
+        await self._save(job)
+        self._start(job)
+        self.logger.info(f"Задание передачи {job.id} продолжено")
+        return ServiceResponse(status=ServiceStatus.success, message="Задание передачи продолжено", data=job.to_dict())
+
+    async def cancel(self, job_id: str) -> ServiceResponse:
+        """Отмена задания. Если оно выполняется в другом воркере — тот увидит флаг при очередном сохранении"""
+        job = await self._load(job_id)
+        if job is None:
+            return ServiceResponse(status=ServiceStatus.error, message="Задание не найдено", error=job_id)
+        if not job.active:
+            return ServiceResponse(status=ServiceStatus.warning, message="Задание не выполняется", data=job.to_dict())
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.wait({task})
+            job = await self._load(job_id) or job
+        elif time.time() - (job.updated_at or job.created_at) > STALE_AFTER:
+            # воркер, выполнявший задание, остановлен без сохранения итога: отмечаем сразу, чтобы можно было resume
+            job.mark_cancelled()
+            await self._save(job)
+        else:
+            await asyncio.to_thread(shared_store.set, CANCEL_PREFIX + job_id, True, settings.TRANSFER_JOB_TTL)
+        return ServiceResponse(status=ServiceStatus.success, message="Отмена задания запрошена", data=job.to_dict())
+
+    async def get(self, job_id: str) -> ServiceResponse:
+        job = await self._load(job_id)
+        if job is None:
+            return ServiceResponse(status=ServiceStatus.error, message="Задание не найдено", error=job_id)
+        return ServiceResponse(status=ServiceStatus.success, message="Задание передачи", data=job.to_dict())
+
+    async def list(self) -> ServiceResponse:
+        jobs = sorted((await asyncio.to_thread(shared_store.items, JOB_PREFIX)).values(), key=lambda j: j["created_at"], reverse=True)
+        return ServiceResponse(status=ServiceStatus.success, message="Задания передачи", data={"jobs": jobs})
+
+    async def stop(self) -> None:
+        """Остановка приложения: выполняющиеся задания отменяются и могут быть продолжены через resume"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+
+    def _watch_sync(self, job: TransferJob) -> bool:
+        if shared_store.get(CANCEL_PREFIX + job.id):
+            return True
+        self._save_sync(job)
+        return False
+
+    async def _watch(self, job: TransferJob, task: asyncio.Task, stop: asyncio.Event) -> None:
+        """Периодически сохраняет прогресс и отменяет задание, если отмену запросили из другого воркера.
+        Завершается сама по stop, без cancel: начатая в потоке запись успевает закончиться до итогового сохранения"""
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=SAVE_INTERVAL)
+            except asyncio.TimeoutError:
+                if await asyncio.to_thread(self._watch_sync, job) and not stop.is_set():
+                    task.cancel()  # после stop задание уже в finally: отмена сорвала бы итоговое сохранение
+                    return
+
+    async def _run(self, job: TransferJob) -> None:
+        job.status, job.started_at = TransferStatus.running, time.time()
+        await self._save(job)
+        stop = asyncio.Event()
+        watcher = asyncio.create_task(self._watch(job, asyncio.current_task(), stop))
+        try:
+            async with self._client(job.target, self.logger) as client:
+                async with client.start_sftp() as sftp:
+                    transfer = PipelinedSFTP(sftp, settings.TRANSFER_BLOCK_SIZE, settings.TRANSFER_PIPELINE)
+                    semaphore = asyncio.Semaphore(settings.TRANSFER_FILE_CONCURRENCY)
+                    await asyncio.gather(*(self._run_file(job, transfer, item, semaphore)
+                                           for item in job.files if item.status != TransferStatus.done))
+            failed = [f for f in job.files if f.status == TransferStatus.failed]
+            job.status = TransferStatus.failed if failed else TransferStatus.done
+            if failed:
+                job.error = f"Не переданы файлы: {len(failed)} из {len(job.files)}"
+        except asyncio.CancelledError:
+            job.mark_cancelled()
+        except Exception as e:
+            self.logger.error(f"Ошибка задания передачи {job.id}: {e}")
+            job.status, job.error = TransferStatus.failed, str(e)
+        finally:
+            stop.set()
+            await watcher
+            job.finished_at = time.time()
+            await asyncio.to_thread(shared_store.delete, CANCEL_PREFIX + job.id)
+            await self._save(job)
+            self._tasks.pop(job.id, None)
+        self.logger.info(f"Задание передачи {job.id} завершено: {job.status.value}")
+
+    async def _run_file(self, job: TransferJob, transfer: PipelinedSFTP, item: TransferFile,
+                        semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            item.status, item.error = TransferStatus.running, None
+            item.started_at, item.finished_at = time.time(), None
+
+            def progress(done: int) -> None:
+                item.done_bytes = done
+
+            try:
+                local = self.local_path(item.local)
+                if job.direction == TransferDirection.download:
+                    await self._download(transfer, item, local, progress)
+                else:
+                    await self._upload(transfer, item, local, progress)
+                item.status = TransferStatus.done
+            except asyncio.CancelledError:
+                item.status = TransferStatus.cancelled
+                raise
+            except Exception as e:
+                self.logger.warning(f"Файл {item.remote} ({job.id}) не передан: {e}")
+                item.status, item.error = TransferStatus.failed, str(e)
+            finally:
+                item.finished_at = time.time()
+
+    @staticmethod
+    def _same_source(item: TransferFile, size: int, mtime: int) -> bool:
+        """Докачка только того же источника: размер и mtime совпадают с записанными в задании"""
+        return (item.size, item.mtime) == (size, mtime)
+
+    async def _download(self, transfer: PipelinedSFTP, item: TransferFile, local: Path, progress) -> None:
+        attrs = await transfer.sftp.stat(item.remote)
+        size, mtime = attrs.size or 0, attrs.mtime or 0
+        part = local.with_name(local.name + ".part")
+        offset = 0
+        # локальный .part пишется строго по порядку: всё, что в нём есть, — непрерывное начало файла
+        if self._same_source(item, size, mtime) and part.exists():
+            offset = min(part.stat().st_size, size)
+        item.size, item.mtime, item.resumed_from, item.done_bytes = size, mtime, offset, offset
+        item.sha256 = await transfer.download(item.remote, part, size, offset, progress)
+        await asyncio.to_thread(os.replace, part, local)
+        self.logger.info(f"Скачан {item.remote} -> {local} ({size} байт, sha256 {item.sha256})")
+
+    async def _upload(self, transfer: PipelinedSFTP, item: TransferFile, local: Path, progress) -> None:
+        stat = await asyncio.to_thread(local.stat)
+        size, mtime = stat.st_size, int(stat.st_mtime)
+        part = item.remote + ".part"
+        offset = 0
+        # удалённые записи завершаются не по порядку: продолжаем с подтверждённого непрерывного начала (done_bytes)
+        if self._same_source(item, size, mtime):
+            remote_size = await transfer.remote_size(part)
+            if remote_size is not None:
+                offset = min(remote_size, item.done_bytes, size)
+        item.size, item.mtime, item.resumed_from, item.done_bytes = size, mtime, offset, offset
+        item.sha256 = await transfer.upload(local, part, size, offset, progress)
+        await transfer.replace(part, item.remote)
+        self.logger.info(f"Загружен {local} -> {item.remote} ({size} байт, sha256 {item.sha256})")
+
+
+transfers = TransferService(logger)
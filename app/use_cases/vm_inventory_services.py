@@ -0,0 +1,143 @@
+# use_cases/vm_inventory_services.py
+import asyncio
+import hashlib
+import json
+import time
+from app.domain.vm import decode_guests
+from app.infrastructure.prox_api_client import ProxmoxAPIClient
+from app.infrastructure.vm_store import VMQuery, VMStore, VM_FIELDS
+from app.core.cache import TTLCache
+from app.core.response import ServiceResponse, ServiceStatus
+from app.core.shared_state import shared_store
+from app.core.settings import settings
+import logging
+logger = logging.getLogger(__name__)
+
+
+SNAPSHOT_KEY = "vm_inventory:snapshot"     # {"revision", "refreshed_at", "resources"}
+REVISION_KEY = "vm_inventory:revision"     # {"revision", "refreshed_at"} — дешёвая проверка без чтения снимка
+STALE_AFTER_TTLS = 3    # снимок старше стольких VM_STORE_TTL — лидер не обновляет его, воркер читает upstream сам
+
+
+def _revision(resources: list[dict]) -> str:
+    """Ревизия от содержимого: у одинаковых данных она одна во всех воркерах (ETag /prox/vms)"""
+    guests = sorted((vm.astuple() for vm in decode_guests(resources)), key=lambda t: t[0])
+    return hashlib.sha1(json.dumps(guests, default=str).encode()).hexdigest()[:16]
+
+
+class VMInventoryService:
+    """Запросы к инвентарю VM из памяти. Снимок cluster/resources перечитывает раз в VM_STORE_TTL (и сразу после
+    invalidate) фоновая задача лидера и кладёт в shared_store вместе с ревизией от содержимого. Воркеры применяют
+    новый снимок к своему VMStore диффом; upstream из пути запроса — только при холодном старте, после invalidate
+    в этом воркере или если лидер давно не обновлял снимок"""
+
+    def __init__(self, logger: logging.Logger, ttl: float | None = None):
+        self.logger = logging.getLogger(f"{logger.name}.{self.__class__.__name__}")
+        self.client = ProxmoxAPIClient(logger=self.logger)
+        self.store = VMStore()
+        self.ttl = settings.VM_STORE_TTL if ttl is None else ttl
+        self._refresh_cache = TTLCache(maxsize=1, namespace="vm_store")
+        self.revision: str | None = None   # ревизия снимка, применённого к self.store
+        self._stale = False
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def _refresh(self) -> dict:
+        resources = await self.client.get_vms()
+        snapshot = {"revision": _revision(resources), "refreshed_at": time.time(), "resources": resources}
+        await asyncio.to_thread(shared_store.set, SNAPSHOT_KEY, snapshot)
+        await asyncio.to_thread(shared_store.set, REVISION_KEY,
+                                {"revision": snapshot["revision"], "refreshed_at": snapshot["refreshed_at"]})
+        return snapshot
+
+    async def refresh(self) -> dict:
+        """Перечитывает cluster/resources и публикует снимок (одновременные вызовы объединяются)"""
+        snapshot, _, _ = await self._refresh_cache.get_or_load("refresh", self._refresh, self.ttl)
+        return snapshot
+
+    def _apply(self, snapshot: dict) -> None:
+        if snapshot["revision"] == self.revision:
+            return
+        changes = self.store.apply(snapshot["resources"])
+        self.revision = snapshot["revision"]
+        self.logger.debug(f"Инвентарь VM обновлён до ревизии {self.revision}: {changes}")
+
+    async def invalidate(self) -> None:
+        """Перечитать cluster/resources, не дожидаясь VM_STORE_TTL (после операций со статусом VM):
+        следующий запрос этого воркера читает upstream сам, у лидера — ещё и внеочередной проход"""
+        await self._refresh_cache.invalidate()
+        self._stale = True
+        self._wakeup.set()
+
+    async def _loop(self) -> None:
+        failing = False
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.refresh()
+                if failing:
+                    self.logger.info("Инвентарь VM снова обновляется")
+                failing = False
+            except Exception as e:
+                # при недоступном Proxmox — одно предупреждение, а не по записи на каждый проход
+                (self.logger.debug if failing else self.logger.warning)(f"Не удалось обновить инвентарь VM: {e}")
+                failing = True
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.ttl)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        """Фоновое обновление снимка — задача лидера (leader.register)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _sync(self) -> None:
+        """Приводит self.store к актуальному снимку"""
+        state = await asyncio.to_thread(shared_store.get, REVISION_KEY)
+        if self._stale or state is None or time.time() - state["refreshed_at"] > self.ttl * STALE_AFTER_TTLS:
+            snapshot = await self.refresh()
+            self._stale = False
+        elif state["revision"] != self.revision:
+            snapshot = await asyncio.to_thread(shared_store.get, SNAPSHOT_KEY)
+            if snapshot is None:
+                snapshot = await self.refresh()
+        else:
+            return
+        self._apply(snapshot)
+
+    @staticmethod
+    def parse_fields(fields: str | None) -> tuple[str, ...] | None:
+        if not fields:
+            return None
+        result = tuple(f.strip() for f in fields.split(",") if f.strip())
+        unknown = [f for f in result if f not in VM_FIELDS]
+        if unknown:
+            raise ValueError(f"Неизвестные поля: {', '.join(unknown)}. Доступны: {', '.join(VM_FIELDS)}")
+        return result
+
+    async def query(self, query: VMQuery) -> ServiceResponse:
+        try:
+            if query.sort and query.sort.lstrip("-") not in VM_FIELDS:
+                raise ValueError(f"Нельзя сортировать по полю '{query.sort.lstrip('-')}'")
+            await self._sync()
+        except ValueError as e:
+            return ServiceResponse(status=ServiceStatus.error, message="Некорректный запрос", error=str(e))
+        except Exception as e:
+            self.logger.error(f"Ошибка получения списка VM: {e}")
+            return ServiceResponse(status=ServiceStatus.error, message="Ошибка получения списка VM", error=str(e))
+        vms, total = self.store.query(query)
+        return ServiceResponse(status=ServiceStatus.success, message="Список VM", data={
+            "vms": vms,
+            "total": total,
+            "revision": self.revision,  # от содержимого, а не время обновления: ETag одинаков во всех воркерах
+        })
+
+
+vm_inventory = VMInventoryService(logger)